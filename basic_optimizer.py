@@ -2,20 +2,52 @@
 ULTRA SIMPLE Lineup Builder - GUARANTEED TO WORK
 """
 
-import pandas as pd
 import numpy as np
+from player_table import PlayerTable
+from config import BATCH_BUILD_SIZE, BATCH_BUILD_TEMPERATURE, DRAFTKINGS_POSITIONS
 
 SALARY_CAP = 50000
 
+# Slots in lineup order with the same salary rules as _build_lineup:
+# (slot type, positions, min salary, max salary). Salary kept back for later
+# slots comes from PlayerTable.salary_window, not fixed reserves.
+BATCH_SLOTS = [
+    ('QB', ['QB'], 5000, 7500),
+    ('RB', ['RB'], 0, 9000),
+    ('RB', ['RB'], 0, 8000),
+    ('WR', ['WR'], 0, 9000),
+    ('WR', ['WR'], 0, 8000),
+    ('WR', ['WR'], 0, 7000),
+    ('TE', ['TE'], 0, 7000),
+    ('FLEX', ['RB', 'WR', 'TE'], 0, SALARY_CAP),
+    ('DST', ['DST'], 0, SALARY_CAP),
+]
+FLEX_SLOT = 7
+
 class BasicOptimizer:
     def __init__(self, contest_type):
         self.contest_type = contest_type
         
-    def generate_lineups(self, player_pool, num_lineups=20):
-        """Generate valid lineups"""
+    def generate_lineups(self, player_pool, num_lineups=20, batch=False):
+        """
+        Generate valid lineups
+        
+        With batch=True lineups come from build_batch (value-weighted random
+        picks, thousands per second) instead of one _build_lineup at a time.
+        """
         self.player_pool = player_pool
+        self.table = PlayerTable(player_pool)
         lineups = []
         
+        if batch:
+            for i in range(10):  # Try up to 10 batches
+                needed = num_lineups - len(lineups)
+                ids = self.build_batch(min(max(needed, 1), BATCH_BUILD_SIZE))
+                lineups.extend(self._lineup_from_ids(row) for row in ids[:needed])
+                if len(lineups) >= num_lineups:
+                    break
+            return lineups if lineups else None
+        
         for i in range(num_lineups * 10):  # Try up to 10x
             lineup = self._build_lineup()
             if lineup:
@@ -27,89 +59,125 @@ class BasicOptimizer:
     
     def _build_lineup(self):
         """Build one valid lineup - SIMPLE VALUE-BASED"""
+        table = self.table
         lineup = []
         budget = SALARY_CAP
         used = []
+        remaining = dict(DRAFTKINGS_POSITIONS)
         
-        # Get pools for each position
-        qb_pool = self.player_pool[self.player_pool['Position'] == 'QB'].copy()
-        rb_pool = self.player_pool[self.player_pool['Position'] == 'RB'].copy()
-        wr_pool = self.player_pool[self.player_pool['Position'] == 'WR'].copy()
-        te_pool = self.player_pool[self.player_pool['Position'] == 'TE'].copy()
-        dst_pool = self.player_pool[self.player_pool['Position'] == 'DST'].copy()
+        # Value score (projection per $1k) with a random factor per player
+        pick_score = table.value * np.random.uniform(0.8, 1.2, table.n_players)
         
-        # Add value score (projection per $1k)
-        for pool in [qb_pool, rb_pool, wr_pool, te_pool, dst_pool]:
-            pool['value_score'] = pool['Projection'] / (pool['Salary'] / 1000)
-            pool['random_factor'] = np.random.uniform(0.8, 1.2, len(pool))
-            pool['pick_score'] = pool['value_score'] * pool['random_factor']
+        def pick(slot, positions, max_salary, min_salary=0):
+            """
+            Best pick_score among unused candidates that keep the lineup
+            completable (remaining slots still fit between the floor and cap)
+            """
+            nonlocal budget
+            remaining[slot] -= 1
+            low, high = table.salary_window(budget, remaining)
+            ids = table.candidates(positions, min(max_salary, high), max(min_salary, low), exclude=used)
+            if len(ids) == 0:
+                return None
+            player = table.player(ids[np.argmax(pick_score[ids])])
+            lineup.append(player)
+            used.append(player['Name'])
+            budget -= player['Salary']
+            return player
         
         # Pick by value, avoiding salary cap issues
         # QB - mid-priced
-        qb = qb_pool[(qb_pool['Salary'] >= 5000) & (qb_pool['Salary'] <= 7500)].nlargest(1, 'pick_score')
-        if qb.empty: return None
-        lineup.append(qb.iloc[0].to_dict())
-        budget -= qb.iloc[0]['Salary']
-        used.append(qb.iloc[0]['Name'])
-        
-        # RB1 - value pick
-        rb1 = rb_pool[(rb_pool['Salary'] <= min(9000, budget - 35000)) & (~rb_pool['Name'].isin(used))].nlargest(1, 'pick_score')
-        if rb1.empty: return None
-        lineup.append(rb1.iloc[0].to_dict())
-        budget -= rb1.iloc[0]['Salary']
-        used.append(rb1.iloc[0]['Name'])
-        
-        # RB2 - value pick
-        rb2 = rb_pool[(rb_pool['Salary'] <= min(8000, budget - 27000)) & (~rb_pool['Name'].isin(used))].nlargest(1, 'pick_score')
-        if rb2.empty: return None
-        lineup.append(rb2.iloc[0].to_dict())
-        budget -= rb2.iloc[0]['Salary']
-        used.append(rb2.iloc[0]['Name'])
-        
-        # WR1
-        wr1 = wr_pool[(wr_pool['Salary'] <= min(9000, budget - 20000)) & (~wr_pool['Name'].isin(used))].nlargest(1, 'pick_score')
-        if wr1.empty: return None
-        lineup.append(wr1.iloc[0].to_dict())
-        budget -= wr1.iloc[0]['Salary']
-        used.append(wr1.iloc[0]['Name'])
-        
-        # WR2
-        wr2 = wr_pool[(wr_pool['Salary'] <= min(8000, budget - 13000)) & (~wr_pool['Name'].isin(used))].nlargest(1, 'pick_score')
-        if wr2.empty: return None
-        lineup.append(wr2.iloc[0].to_dict())
-        budget -= wr2.iloc[0]['Salary']
-        used.append(wr2.iloc[0]['Name'])
-        
-        # WR3
-        wr3 = wr_pool[(wr_pool['Salary'] <= min(7000, budget - 8500)) & (~wr_pool['Name'].isin(used))].nlargest(1, 'pick_score')
-        if wr3.empty: return None
-        lineup.append(wr3.iloc[0].to_dict())
-        budget -= wr3.iloc[0]['Salary']
-        used.append(wr3.iloc[0]['Name'])
+        if not pick('QB', 'QB', 7500, 5000): return None
+        
+        # RB1 / RB2 - value picks
+        if not pick('RB', 'RB', 9000): return None
+        if not pick('RB', 'RB', 8000): return None
+        
+        # WR1 / WR2 / WR3
+        if not pick('WR', 'WR', 9000): return None
+        if not pick('WR', 'WR', 8000): return None
+        if not pick('WR', 'WR', 7000): return None
         
         # TE
-        te = te_pool[(te_pool['Salary'] <= min(7000, budget - 5000)) & (~te_pool['Name'].isin(used))].nlargest(1, 'pick_score')
-        if te.empty: return None
-        lineup.append(te.iloc[0].to_dict())
-        budget -= te.iloc[0]['Salary']
-        used.append(te.iloc[0]['Name'])
+        if not pick('TE', 'TE', 7000): return None
         
         # FLEX - any RB/WR/TE
-        flex_pool = pd.concat([rb_pool, wr_pool, te_pool])
-        flex = flex_pool[(flex_pool['Salary'] <= budget - 2500) & (~flex_pool['Name'].isin(used))].nlargest(1, 'pick_score')
-        if flex.empty: return None
-        flex_player = flex.iloc[0].to_dict()
-        flex_player['PositionSlot'] = f"FLEX ({flex_player['Position']})"
-        lineup.append(flex_player)
-        budget -= flex.iloc[0]['Salary']
-        used.append(flex.iloc[0]['Name'])
+        flex = pick('FLEX', ['RB', 'WR', 'TE'], SALARY_CAP)
+        if not flex: return None
+        flex['PositionSlot'] = f"FLEX ({flex['Position']})"
         
         # DST
-        dst = dst_pool[dst_pool['Salary'] <= budget].nlargest(1, 'pick_score')
-        if dst.empty: return None
-        lineup.append(dst.iloc[0].to_dict())
-        budget -= dst.iloc[0]['Salary']
+        if not pick('DST', 'DST', SALARY_CAP): return None
+        
+        return self._lineup_dict(lineup)
+    
+    def build_batch(self, n_lineups, rng=None, temperature=BATCH_BUILD_TEMPERATURE):
+        """
+        Build up to n_lineups lineups at once with Gumbel-top-k random keys
+        
+        Each lineup (row) gets one key per player, log(value) / temperature plus
+        Gumbel noise, drawn as a single (n_lineups x players) matrix. Each slot
+        takes the highest key among the row's allowed candidates, which samples
+        players in proportion to value^(1 / temperature); a picked player's key
+        drops to -inf, so a position's slots are a weighted top-k without
+        replacement. Per slot, each row masks candidates outside its salary
+        window (PlayerTable.salary_window on the row's remaining budget, within
+        the same limits as _build_lineup), and rows left with no allowed
+        candidate for a slot are dropped.
         
+        Args:
+            n_lineups: Lineups to draw (K)
+            rng: Random generator
+            temperature: Key scale; lower concentrates picks on the best values
+        
+        Returns:
+            Integer array of shape (valid lineups, 9) with table player ids in slot order
+        """
+        table = self.table
+        rng = rng if rng is not None else np.random.default_rng()
+        
+        with np.errstate(divide='ignore'):
+            # Zero projections get a -inf key and are never picked
+            log_value = np.log(np.maximum(table.value, 0)) / temperature
+        keys = log_value + rng.gumbel(size=(n_lineups, table.n_players)).astype(np.float32)
+        
+        rows = np.arange(n_lineups)
+        lineups = np.zeros((n_lineups, len(BATCH_SLOTS)), dtype=np.int64)
+        budget = np.full(n_lineups, SALARY_CAP, dtype=np.int64)
+        valid = np.ones(n_lineups, dtype=bool)
+        
+        remaining = dict(DRAFTKINGS_POSITIONS)
+        
+        for slot, (slot_type, positions, min_salary, max_salary) in enumerate(BATCH_SLOTS):
+            ids = table.candidates(positions, max_salary, min_salary)
+            if len(ids) == 0:
+                return lineups[:0]
+            
+            # Mask candidates that would leave this row's lineup uncompletable
+            remaining[slot_type] -= 1
+            low, high = table.salary_window(budget, remaining)
+            salary = table.salary[ids]
+            allowed = (salary >= low[:, None]) & (salary <= high[:, None])
+            slot_keys = np.where(allowed, keys[:, ids], -np.inf)
+            best = np.argmax(slot_keys, axis=1)
+            valid &= np.isfinite(slot_keys[rows, best])
+            
+            picks = ids[best]
+            lineups[:, slot] = picks
+            keys[rows, picks] = -np.inf  # Used players can't be picked again
+            budget -= table.salary[picks]
+        
+        return lineups[valid]
+    
+    def _lineup_from_ids(self, ids):
+        """Lineup dict from one build_batch row"""
+        lineup = [self.table.player(i) for i in ids]
+        flex = lineup[FLEX_SLOT]
+        flex['PositionSlot'] = f"FLEX ({flex['Position']})"
+        return self._lineup_dict(lineup)
+    
+    def _lineup_dict(self, lineup):
+        """Lineup dict with totals"""
         # Calculate totals
         total_proj = sum(p['Projection'] for p in lineup)
         total_sal = sum(p['Salary'] for p in lineup)
@@ -8,6 +8,8 @@ DFS Optimizer Configuration
 WINNING STRUCTURE from $250k 1st place finish (Wildcat 4,170 entries)
 """
 
+import os
+
 # Contest structure definitions - BASED ON ACTUAL WINNING DATA
 CONTEST_STRUCTURES = {
     'single_entry_grinder': {
@@ -252,6 +254,18 @@ POSITION_VARIANCE = {
     'DST': 4.0
 }
 
+# Latent factor loadings for correlated player outcomes (Monte Carlo)
+# game = shared game environment (pace/total), team = team offense,
+# script = game script (positive = benefits when own team leads),
+# opponent_team = opposing offense (DST only)
+CORRELATION_LOADINGS = {
+    'QB': {'game': 0.30, 'team': 0.55, 'script': -0.10},
+    'RB': {'game': 0.20, 'team': 0.30, 'script': 0.30},
+    'WR': {'game': 0.25, 'team': 0.45, 'script': -0.10},
+    'TE': {'game': 0.20, 'team': 0.35, 'script': -0.05},
+    'DST': {'game': -0.30, 'team': 0.0, 'script': 0.25, 'opponent_team': -0.40}
+}
+
 # Free data source URLs
 DATA_SOURCES = {
     'fantasypros_projections': 'https://www.fantasypros.com/nfl/projections/',
@@ -260,10 +274,54 @@ DATA_SOURCES = {
     'dfsboss_ownership': 'https://www.dfsboss.com/nfl-ownership-projections/'
 }
 
+# Payout ladder settings (DraftKings-style GPP)
+PAYOUT_LADDER = {
+    'rake': 0.15,               # DraftKings keeps ~15% of entry fees
+    'min_cash_multiple': 2.0,   # Min cash pays ~2x the entry fee
+    'individual_places': 10,    # Places paid individually before tiered bands
+    'band_growth': 1.25         # Each payout band is ~25% wider than the last
+}
+
 # Simulation settings
 MONTE_CARLO_ITERATIONS = 1000  # Reduced from 10,000 for speed
+SIMULATION_MEMORY_BUDGET = 2 * 1024 ** 3  # Bytes simulation matrices may use (blocks are sized to fit)
+SIMULATION_DTYPE = 'float32'  # Scenario / field score precision ('float32' halves memory vs 'float64')
+SIMULATION_BLOCK_ITERATIONS = 250  # Iterations per block (one RNG stream per block)
+SIMULATION_WORKERS = None  # Processes for large shared runs; None = one per CPU core, 1 = in-process
+SIMULATION_PARALLEL_MIN_SCORES = 50_000_000  # Runs scoring fewer (iterations x (lineups + field)) entries stay in-process
+SIMULATION_CONFIDENCE = 0.95  # Confidence level for reported ROI / cash% / win% intervals
+ADAPTIVE_MIN_ITERATIONS = 500  # Adaptive mode never stops a lineup before this many iterations
+ADAPTIVE_MAX_ITERATIONS = 20000  # Adaptive mode iteration cap per lineup
+SIMULATION_SAMPLING = 'plain'  # 'plain', 'antithetic', 'sobol' or 'halton'
+QMC_REPLICATE_POINTS = 64  # Rows per independent Sobol' / Halton scramble (replicates measure the error)
+QMC_MIN_REPLICATES = 16  # Fewer independent replicates than this: report no variance-reduction gain
+SIMULATION_CONTROL_VARIATE = False  # Correct estimates with each lineup's analytic mean score
+IMPORTANCE_MAX_TILT = 4.0  # Largest importance-sampling shift of the normal inputs (in SDs)
+TOP_PERCENTILE = 0.001  # Reported as top01_pct: finish in the top 0.1% of the field
+SCENARIO_BANK_ENABLED = True  # Reuse banked outcomes / field scores when re-simulating a slate (seeded shared runs only)
+SCENARIO_BANK_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser(os.path.join('~', '.cache')),
+                                 'dfs-optimizer', 'scenario_bank')
+SCENARIO_BANK_QUOTA = 5 * 1024 ** 3  # Disk quota in bytes; least-recently-used entries evicted first
+FIELD_SKETCH_BINS = None  # e.g. 1024: keep a per-iteration field quantile sketch instead of every score
+ANALYTIC_FIELD_SAMPLE = 20000  # Field lineups sampled to measure field moments for the analytic screen
+HALVING_INITIAL_ITERATIONS = 250  # Successive halving: first-round iterations per lineup (doubles each round)
+PORTFOLIO_SEASON_CONTESTS = 17  # Contests per season when measuring portfolio drawdown
+SIMULATION_DUPLICATION = True  # Split payouts with the expected field copies of each lineup
+DUPLICATION_SALARY_SAMPLE = 20000  # Raw field rosters sampled to measure the salary window's acceptance rate
 LINEUP_GENERATION_COUNT = 1000  # Generate this many candidates before filtering
 
+# Field generation (ownership-driven opponent lineups)
+FIELD_SALARY_FLOOR = 46000      # Field lineups rarely leave more than $4k unused
+FIELD_GENERATION_BATCH = 25000  # Field lineups sampled per vectorized batch
+
+# MILP optimizer (exact lineups via scipy.optimize.milp)
+MILP_MAX_OVERLAP = 6   # Lineups share at most this many players (the builders treat 7+ as duplicates)
+MILP_TIME_LIMIT = 10   # Seconds per lineup solve
+
+# Batch lineup building (Gumbel-top-k random keys)
+BATCH_BUILD_SIZE = 2000         # Lineups drawn per vectorized batch
+BATCH_BUILD_TEMPERATURE = 0.1   # Picks weighted by value^(1 / temperature); lower = closer to best value
+
 # Output settings
 TOP_LINEUPS_TO_RETURN = 20
 EXPORT_FORMAT = 'csv'  # For DraftKings upload
@@ -0,0 +1,224 @@
+"""
+Field Lineup Generator
+Samples realistic opponent lineups from projected ownership
+"""
+
+from itertools import permutations
+import numpy as np
+import pandas as pd
+from config import SALARY_CAP, FIELD_SALARY_FLOOR, FIELD_GENERATION_BATCH, DUPLICATION_SALARY_SAMPLE
+
+# DraftKings roster slots in lineup order: QB, RB, RB, WR, WR, WR, TE, FLEX, DST
+FIELD_SLOTS = [('QB', 1), ('RB', 2), ('WR', 3), ('TE', 1), ('FLEX', 1), ('DST', 1)]
+FLEX_POSITIONS = ['RB', 'WR', 'TE']
+ROSTER_SIZE = 9
+
+# Position order for roster counts, and the starters each needs before FLEX
+COUNT_POSITIONS = ['QB', 'RB', 'WR', 'TE', 'DST']
+STARTERS = np.array([1, 2, 3, 1, 1])
+
+
+class FieldGenerator:
+    """
+    Generate opponent lineups the way the field builds them
+    
+    Each slot is filled by sampling players in proportion to projected
+    Ownership (repeats are redrawn, so RB/WR slots draw without replacement),
+    then rows that break the salary cap or leave too much salary unused are
+    redrawn. Lineups are stored as (entries x 9) integer player-id arrays that
+    index the columns of the simulator's scenario matrix.
+    """
+    
+    def __init__(self, players: pd.DataFrame, salary_floor: int = FIELD_SALARY_FLOOR):
+        """
+        Args:
+            players: Player index (row = scenario column) with Position, Salary, Ownership
+            salary_floor: Minimum salary a field lineup uses
+        """
+        self.salary_floor = salary_floor
+        self.salaries = players['Salary'].to_numpy(dtype=np.int64)
+        self.id_dtype = np.int16 if len(players) < np.iinfo(np.int16).max else np.int32
+        
+        ownership = players['Ownership'].fillna(0).to_numpy(dtype=float)
+        positions = players['Position'].to_numpy()
+        self.ownership = ownership
+        self.position_codes = np.array([COUNT_POSITIONS.index(pos) if pos in COUNT_POSITIONS else -1
+                                        for pos in positions])
+        self.salary_acceptance = None  # Share of raw rosters inside the salary window (measured lazily)
+        
+        # Candidate ids and cumulative ownership per slot type (zero-owned players never picked)
+        self.candidates = {}
+        self.cumulative = {}
+        for pos in ['QB', 'RB', 'WR', 'TE', 'DST']:
+            self.candidates[pos] = np.flatnonzero((positions == pos) & (ownership > 0))
+        self.candidates['FLEX'] = np.concatenate([self.candidates[pos] for pos in FLEX_POSITIONS])
+        
+        for pos, ids in self.candidates.items():
+            self.cumulative[pos] = np.cumsum(ownership[ids])
+    
+    @classmethod
+    def can_build(cls, players: pd.DataFrame) -> bool:
+        """True if the player pool has the columns and depth to build field lineups"""
+        if players is None or not {'Position', 'Salary', 'Ownership'}.issubset(players.columns):
+            return False
+        owned = players[players['Ownership'].fillna(0) > 0]
+        counts = owned['Position'].value_counts()
+        return all(counts.get(pos, 0) >= n for pos, n in [('QB', 1), ('RB', 3), ('WR', 4), ('TE', 1), ('DST', 1)])
+    
+    def generate(self, n_entries: int, rng: np.random.Generator = None, max_rounds: int = 50) -> np.ndarray:
+        """
+        Sample field lineups
+        
+        Returns:
+            Integer array of shape (n_entries, 9) with player ids per roster slot
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+        lineups = np.empty((n_entries, ROSTER_SIZE), dtype=self.id_dtype)
+        
+        for start in range(0, n_entries, FIELD_GENERATION_BATCH):
+            stop = min(start + FIELD_GENERATION_BATCH, n_entries)
+            pending = np.arange(start, stop)
+            
+            # Redraw only the rows that break salary rules
+            for _ in range(max_rounds):
+                batch = self._sample_rosters(len(pending), rng)
+                salary = self.salaries[batch].sum(axis=1)
+                valid = (salary <= SALARY_CAP) & (salary >= self.salary_floor)
+                lineups[pending[valid]] = batch[valid]
+                pending = pending[~valid]
+                if len(pending) == 0:
+                    break
+            else:
+                # Salary window too tight for this pool: keep cap-legal draws only
+                while len(pending):
+                    batch = self._sample_rosters(len(pending), rng)
+                    valid = self.salaries[batch].sum(axis=1) <= SALARY_CAP
+                    lineups[pending[valid]] = batch[valid]
+                    pending = pending[~valid]
+        
+        return lineups
+    
+    def expected_copies(self, lineups: np.ndarray, n_entries: int, rng: np.random.Generator = None) -> np.ndarray:
+        """
+        Expected number of field entries identical to each lineup
+        
+        A roster's probability under this generator is the product of its
+        players' Ownership (summed as logs, so it never underflows) over the
+        product of each slot draw's remaining ownership: a slot's total minus
+        the players already drawn from its pool (repeats are redrawn). That
+        denominator depends on draw order, so it is summed over every way the
+        roster's RBs / WRs / TEs can fill their slots and FLEX. Rosters outside
+        the salary window are never built (0 copies); the rest are scaled by
+        1 / the share of raw rosters inside it. Lineups are grouped by which
+        position fills FLEX and each group is computed in one vectorized pass.
+        
+        Args:
+            lineups: (n_lineups x 9) player ids
+            n_entries: Field size
+            
+        Returns:
+            Array of shape (n_lineups,): the Poisson mean of each lineup's field copies
+        """
+        if self.salary_acceptance is None:
+            rng = rng if rng is not None else np.random.default_rng()
+            salary = self.salaries[self._sample_rosters(DUPLICATION_SALARY_SAMPLE, rng)].sum(axis=1)
+            self.salary_acceptance = max(np.mean((salary <= SALARY_CAP) & (salary >= self.salary_floor)),
+                                         1 / DUPLICATION_SALARY_SAMPLE)
+        
+        # Group each roster's players by position: QB, RBs, WRs, TEs, DST
+        codes = self.position_codes[lineups]
+        order = np.argsort(codes, axis=1, kind='stable')
+        ownership = self.ownership[np.take_along_axis(lineups, order, axis=1)]
+        counts = (codes[:, :, None] == np.arange(len(COUNT_POSITIONS))).sum(axis=1)
+        
+        salary = self.salaries[lineups].sum(axis=1)
+        in_window = (salary <= SALARY_CAP) & (salary >= self.salary_floor)
+        totals = {pos: self.cumulative[pos][-1] for pos in self.cumulative}
+        
+        arrangements = np.zeros(len(lineups))
+        for flex_pos in FLEX_POSITIONS:
+            shape = STARTERS + (np.array(COUNT_POSITIONS) == flex_pos)
+            rows = np.flatnonzero((counts == shape).all(axis=1) & in_window)
+            if len(rows) == 0:
+                continue
+            
+            # Ownership per position group (columns are contiguous after the sort)
+            ends = np.cumsum(shape)
+            groups = {pos: ownership[rows, end - size:end] for pos, size, end in zip(COUNT_POSITIONS, shape, ends)}
+            flex_drawn = sum(groups[pos].sum(axis=1) for pos in FLEX_POSITIONS)
+            
+            fixed = 1 / (totals['QB'] * totals['DST'])
+            for pos in FLEX_POSITIONS:
+                if pos != flex_pos:
+                    fixed = fixed * _ordered_draws(groups[pos], totals[pos])
+            
+            # Any player of the FLEX position's group can be the FLEX draw
+            group = groups[flex_pos]
+            for f in range(group.shape[1]):
+                others = np.delete(group, f, axis=1)
+                flex_draw = totals['FLEX'] - (flex_drawn - group[:, f])
+                arrangements[rows] += fixed * _ordered_draws(others, totals[flex_pos]) / flex_draw
+        
+        with np.errstate(divide='ignore'):
+            # Unowned players or impossible rosters (log 0) get no copies
+            log_probability = (np.log(ownership).sum(axis=1) + np.log(arrangements)
+                               - np.log(self.salary_acceptance))
+        return n_entries * np.exp(log_probability)
+    
+    def _sample_rosters(self, n: int, rng: np.random.Generator) -> np.ndarray:
+        """Draw n rosters slot by slot, weighted by ownership, no repeated players"""
+        rosters = np.empty((n, ROSTER_SIZE), dtype=np.int64)
+        column = 0
+        
+        for pos, count in FIELD_SLOTS:
+            for _ in range(count):
+                rosters[:, column] = self._draw(pos, n, rng)
+                
+                # Redraw rows that repeat a player already on the roster
+                repeated = np.flatnonzero((rosters[:, :column] == rosters[:, column:column + 1]).any(axis=1))
+                while len(repeated):
+                    rosters[repeated, column] = self._draw(pos, len(repeated), rng)
+                    clash = (rosters[repeated, :column] == rosters[repeated, column:column + 1]).any(axis=1)
+                    repeated = repeated[clash]
+                column += 1
+        
+        return rosters
+    
+    def _draw(self, pos: str, n: int, rng: np.random.Generator) -> np.ndarray:
+        """n player ids for one slot by inverse-CDF sampling on ownership"""
+        cumulative = self.cumulative[pos]
+        picks = np.searchsorted(cumulative, rng.random(n) * cumulative[-1], side='right')
+        return self.candidates[pos][np.minimum(picks, len(cumulative) - 1)]
+    
+    @staticmethod
+    def score(lineups: np.ndarray, scenarios: np.ndarray) -> np.ndarray:
+        """
+        Score field lineups against a block of scenarios
+        
+        Args:
+            lineups: (n_entries x 9) player ids
+            scenarios: (n_iterations x n_players) player outcomes
+        
+        Returns:
+            Array of shape (n_iterations, n_entries)
+        """
+        field_scores = scenarios[:, lineups[:, 0]]
+        for slot in range(1, lineups.shape[1]):
+            field_scores += scenarios[:, lineups[:, slot]]
+        return field_scores
+
+
+def _ordered_draws(ownership: np.ndarray, total: float) -> np.ndarray:
+    """
+    Sum over every draw order of one position's players of prod(1 / remaining ownership)
+    
+    Args:
+        ownership: (n_rosters x k) ownership of the k players drawn for the position's slots
+        total: The position's total ownership
+    """
+    result = np.zeros(len(ownership))
+    for order in permutations(range(ownership.shape[1])):
+        drawn = ownership[:, list(order)]
+        before = np.cumsum(drawn, axis=1) - drawn
+        result += 1 / np.prod(total - before, axis=1)
+    return result
@@ -26,13 +26,14 @@ class DFSOptimizer:
         self.ownership_projector = OwnershipProjector()
         self.optimizer = BasicOptimizer(contest_type)  # ULTRA SIMPLE
         
-    def run(self, player_pool_path: str, num_lineups: int = 20) -> pd.DataFrame:
+    def run(self, player_pool_path: str, num_lineups: int = 20, simulate: bool = False) -> pd.DataFrame:
         """
         Main workflow with optional player locks
         
         Args:
             player_pool_path: Path to CSV with DK player pool
             num_lineups: Number of lineups to generate
+            simulate: Rank lineups by simulated ROI (successive halving) instead of projection
             locks: Dict of locked players by position (optional)
             **kwargs: Backward compatibility
             
@@ -93,6 +94,12 @@ class DFSOptimizer:
         print(f"   ✓ Generated {len(lineups)} unique lineups")
         print()
         
+        if simulate:
+            print("🎲 Simulating tournaments...")
+            results = self._simulate_lineups(lineups, player_pool)
+            print()
+            return results, lineups
+        
         # Skip simulation for now - just return lineups
         results = pd.DataFrame([
             {
@@ -106,6 +113,21 @@ class DFSOptimizer:
         
         return results, lineups
     
+    def _simulate_lineups(self, lineups: List[Dict], player_pool: pd.DataFrame) -> pd.DataFrame:
+        """
+        Simulate the contest and race the lineups for the top TOP_LINEUPS_TO_RETURN
+        
+        Successive halving gives every lineup a small iteration budget and
+        spends the rest on contenders, so large pools stay affordable.
+        """
+        simulator = MonteCarloSimulator(
+            contest_entries=self.contest_rules['entries'],
+            payout_structure=create_payout_structure(self.contest_type, self.entry_fee)
+        )
+        
+        return simulator.batch_simulate(lineups, player_pool,
+                                        top_n=min(TOP_LINEUPS_TO_RETURN, len(lineups)))
+    
     def _load_player_pool(self, path: str) -> pd.DataFrame:
         """
         Load player pool from CSV
@@ -420,6 +442,8 @@ def main():
                        help='Path to player pool CSV')
     parser.add_argument('--num-lineups', type=int, default=20,
                        help='Number of lineups to generate')
+    parser.add_argument('--simulate', action='store_true',
+                       help='Rank lineups by simulated ROI')
     
     args = parser.parse_args()
     
@@ -432,7 +456,8 @@ def main():
     # Run optimization
     results, lineups = optimizer.run(
         player_pool_path=args.players,
-        num_lineups=args.num_lineups
+        num_lineups=args.num_lineups,
+        simulate=args.simulate
     )
     
     # Display results for CLI
@@ -0,0 +1,210 @@
+"""
+MILP Lineup Optimizer
+Exact lineups from scipy.optimize.milp instead of randomized picks and rejection
+"""
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import milp, LinearConstraint, Bounds
+from typing import List, Dict
+from config import (SALARY_CAP, DRAFTKINGS_POSITIONS, STACK_RULES, CONTEST_STRUCTURES,
+                    MILP_MAX_OVERLAP, MILP_TIME_LIMIT)
+
+FLEX_POSITIONS = ['RB', 'WR', 'TE']
+SALARY_FLOOR = 48000  # Same floor the builders' validators enforce
+
+# Ownership tiers behind the CONTEST_STRUCTURES bands (same cutoffs as WinningOptimizer)
+ULTRA_LEVERAGE_MAX = 5     # Ultra-leverage: under 5% owned
+CORE_OWNERSHIP = (10, 25)  # Core: 10-25% owned
+HEAVY_CHALK_MIN = 25       # Heavy chalk: over 25% owned
+
+
+class MILPOptimizer:
+    """
+    Build provably optimal lineups with mixed-integer programming
+    
+    Each player is one binary variable. Roster slots (DRAFTKINGS_POSITIONS),
+    the salary window, the contest's ownership bands and a STACK_RULES QB
+    stack are linear constraints, and each solve maximizes total Projection.
+    After every lineup a diversity cut (share at most max_overlap players with
+    it) is added, so lineup k is the best lineup that differs enough from the
+    first k - 1.
+    
+    scipy.optimize.milp (HiGHS) takes no starting solution, so solves are not
+    warm-started; the constraint matrix is built once and cuts are appended.
+    """
+    
+    def __init__(self, contest_type: str = 'small_gpp'):
+        self.contest_type = contest_type
+        self.contest_rules = CONTEST_STRUCTURES[contest_type]
+        self.player_pool = None
+    
+    def generate_lineups(self, player_pool: pd.DataFrame, num_lineups: int = 20,
+                         max_overlap: int = MILP_MAX_OVERLAP, ownership_bands: bool = True) -> List[Dict]:
+        """
+        Generate the num_lineups best distinct lineups
+        
+        Stack types rotate through the contest's qb_stack_type list. If the
+        ownership bands leave no feasible lineup they are dropped with a
+        warning; otherwise generation stops at the first infeasible solve.
+        
+        Args:
+            player_pool: DataFrame with Name, Position, Team, Salary, Projection, Ownership
+            num_lineups: Number of lineups to generate
+            max_overlap: Most players any two lineups may share
+            ownership_bands: Enforce the contest's ownership total / tier counts
+            
+        Returns:
+            List of lineup dicts (players in slot order, totals as in BasicOptimizer)
+        """
+        self.player_pool = player_pool.dropna(subset=['Name', 'Position', 'Salary', 'Projection']).reset_index(drop=True)
+        if 'Ownership' not in self.player_pool.columns:
+            self.player_pool['Ownership'] = 0.0
+        self.player_pool['Ownership'] = self.player_pool['Ownership'].fillna(0.0)
+        
+        base = self._roster_constraints()
+        if ownership_bands:
+            base = base + self._ownership_constraints()
+        
+        stack_types = [s for s in self.contest_rules.get('qb_stack_type', []) if s in STACK_RULES] or [None]
+        projection = self.player_pool['Projection'].to_numpy(dtype=float)
+        n_players = len(self.player_pool)
+        
+        lineups = []
+        cuts = np.zeros((0, n_players))
+        
+        print(f"   Solving {num_lineups} lineups (max {max_overlap} shared players)...")
+        
+        while len(lineups) < num_lineups:
+            stack = stack_types[len(lineups) % len(stack_types)]
+            constraints = base + self._stack_constraints(stack)
+            if len(cuts):
+                constraints.append(LinearConstraint(cuts, -np.inf, max_overlap))
+            
+            result = milp(-projection, integrality=np.ones(n_players), bounds=Bounds(0, 1),
+                          constraints=constraints, options={'time_limit': MILP_TIME_LIMIT})
+            
+            if result.x is None:
+                if ownership_bands and not lineups:
+                    print("   ⚠️  Ownership bands are infeasible for this pool, dropping them")
+                    base = self._roster_constraints()
+                    ownership_bands = False
+                    continue
+                print(f"   ⚠️  Stopped at {len(lineups)}/{num_lineups} lineups: {result.message}")
+                break
+            
+            chosen = np.flatnonzero(result.x > 0.5)
+            lineups.append(self._lineup_dict(chosen, stack))
+            
+            # Diversity cut: future lineups share at most max_overlap of these players
+            cut = np.zeros(n_players)
+            cut[chosen] = 1.0
+            cuts = np.vstack([cuts, cut])
+        
+        return lineups
+    
+    def _roster_constraints(self) -> List[LinearConstraint]:
+        """Slot counts (FLEX widens RB / WR / TE by one), roster size and salary window"""
+        positions = self.player_pool['Position'].to_numpy()
+        flex = DRAFTKINGS_POSITIONS.get('FLEX', 0)
+        roster_size = sum(DRAFTKINGS_POSITIONS.values())
+        
+        rows, lower, upper = [], [], []
+        for pos, count in DRAFTKINGS_POSITIONS.items():
+            if pos == 'FLEX':
+                continue
+            rows.append((positions == pos).astype(float))
+            lower.append(count)
+            upper.append(count + flex if pos in FLEX_POSITIONS else count)
+        
+        rows.append(np.ones(len(positions)))
+        lower.append(roster_size)
+        upper.append(roster_size)
+        
+        rows.append(self.player_pool['Salary'].to_numpy(dtype=float))
+        lower.append(SALARY_FLOOR)
+        upper.append(SALARY_CAP)
+        
+        return [LinearConstraint(np.array(rows), lower, upper)]
+    
+    def _ownership_constraints(self) -> List[LinearConstraint]:
+        """Contest ownership total and the ultra-leverage / core / heavy-chalk counts"""
+        ownership = self.player_pool['Ownership'].to_numpy(dtype=float)
+        rules = self.contest_rules
+        
+        rows, lower, upper = [], [], []
+        if 'ownership_total_range' in rules:
+            rows.append(ownership)
+            lower.append(rules['ownership_total_range'][0])
+            upper.append(rules['ownership_total_range'][1])
+        if 'ultra_leverage_required' in rules:
+            rows.append((ownership < ULTRA_LEVERAGE_MAX).astype(float))
+            lower.append(rules['ultra_leverage_required'][0])
+            upper.append(rules['ultra_leverage_required'][1])
+        if 'core_players_required' in rules:
+            rows.append(((ownership >= CORE_OWNERSHIP[0]) & (ownership <= CORE_OWNERSHIP[1])).astype(float))
+            lower.append(rules['core_players_required'][0])
+            upper.append(rules['core_players_required'][1])
+        if 'heavy_chalk_max' in rules:
+            rows.append((ownership > HEAVY_CHALK_MIN).astype(float))
+            lower.append(0)
+            upper.append(rules['heavy_chalk_max'])
+        
+        return [LinearConstraint(np.array(rows), lower, upper)] if rows else []
+    
+    def _stack_constraints(self, stack: str = None) -> List[LinearConstraint]:
+        """
+        For every QB q: (same-team stack players) - min_correlation * x_q >= 0,
+        plus an opposing RB / WR / TE when the contest requires a bring-back
+        """
+        if stack is None or 'Team' not in self.player_pool.columns:
+            return []
+        
+        rule = STACK_RULES[stack]
+        positions = self.player_pool['Position'].to_numpy()
+        teams = self.player_pool['Team'].to_numpy()
+        opponents = self.player_pool['Opponent'].to_numpy() if 'Opponent' in self.player_pool.columns else None
+        stackable = np.isin(positions, rule['positions'])
+        
+        rows, lower = [], []
+        for q in np.flatnonzero(positions == 'QB'):
+            row = (stackable & (teams == teams[q])).astype(float)
+            row[q] = -rule['min_correlation']
+            rows.append(row)
+            lower.append(0)
+            
+            if self.contest_rules.get('bring_back_required') and opponents is not None:
+                row = (np.isin(positions, FLEX_POSITIONS) & (teams == opponents[q])).astype(float)
+                row[q] = -1
+                rows.append(row)
+                lower.append(0)
+        
+        return [LinearConstraint(np.array(rows), lower, np.inf)] if rows else []
+    
+    def _lineup_dict(self, chosen: np.ndarray, stack: str = None) -> Dict:
+        """Lineup dict with players in slot order; the cheapest extra RB / WR / TE is FLEX"""
+        players = self.player_pool.iloc[chosen].sort_values('Salary', ascending=False).to_dict('records')
+        
+        slots = {pos: [p for p in players if p['Position'] == pos] for pos in DRAFTKINGS_POSITIONS if pos != 'FLEX'}
+        flex = []
+        for pos in FLEX_POSITIONS:
+            if len(slots[pos]) > DRAFTKINGS_POSITIONS[pos]:
+                flex_player = dict(slots[pos].pop())
+                flex_player['PositionSlot'] = f"FLEX ({pos})"
+                flex.append(flex_player)
+        
+        lineup = slots['QB'] + slots['RB'] + slots['WR'] + slots['TE'] + flex + slots['DST']
+        
+        total_proj = sum(p['Projection'] for p in lineup)
+        total_sal = sum(p['Salary'] for p in lineup)
+        total_own = sum(p['Ownership'] for p in lineup)
+        
+        return {
+            'players': lineup,
+            'total_projection': total_proj,
+            'total_salary': total_sal,
+            'total_ownership': total_own,
+            'avg_ownership': total_own / len(lineup),
+            'salary_remaining': SALARY_CAP - total_sal,
+            'stack_type': stack
+        }
@@ -7,7 +7,8 @@ import pandas as pd
 import numpy as np
 from typing import List, Dict, Tuple
 from itertools import combinations
-from config import SALARY_CAP, DRAFTKINGS_POSITIONS, CONTEST_STRUCTURES
+from config import SALARY_CAP, DRAFTKINGS_POSITIONS, CONTEST_STRUCTURES, LINEUP_GENERATION_COUNT
+from player_table import PlayerTable, LineupBitsets
 
 
 class LineupOptimizer:
@@ -20,9 +21,14 @@ class LineupOptimizer:
     def generate_lineups(self, 
                         player_pool: pd.DataFrame,
                         num_lineups: int = 20,
-                        contest_type: str = None) -> List[Dict]:
+                        contest_type: str = None,
+                        simulator=None) -> List[Dict]:
         """
         Generate optimal lineups for contest using table-based approach
+        
+        With a MonteCarloSimulator, LINEUP_GENERATION_COUNT candidates are built
+        and the portfolio is picked by simulated marginal payout instead of
+        the projection/ownership score.
         """
         if contest_type:
             self.contest_rules = CONTEST_STRUCTURES[contest_type]
@@ -34,6 +40,10 @@ class LineupOptimizer:
         
         # Add value column for smart selection
         self.player_pool['Value'] = self.player_pool['Projection'] / (self.player_pool['Salary'] / 1000)
+        self.table = PlayerTable(self.player_pool)
+        self.portfolio = LineupBitsets(self.table)      # Accepted lineups' players
+        self.stack_cores = LineupBitsets(self.table)    # Their top 3 salaries
+        self.portfolio_qbs = []
         
         print(f"   Player pool: {len(self.player_pool)} players")
         position_counts = self.player_pool['Position'].value_counts().to_dict()
@@ -48,13 +58,14 @@ class LineupOptimizer:
                 return []
         
         # Generate lineup candidates
+        num_candidates = max(num_lineups, LINEUP_GENERATION_COUNT) if simulator else num_lineups
         candidates = []
         attempts = 0
-        max_attempts = num_lineups * 20  # Much more aggressive attempts
+        max_attempts = num_candidates * 20  # Much more aggressive attempts
         
         print(f"   Generating lineups (up to {max_attempts} attempts)...")
         
-        while len(candidates) < num_lineups and attempts < max_attempts:
+        while len(candidates) < num_candidates and attempts < max_attempts:
             try:
                 lineup = self._build_lineup_from_table()
                 
@@ -62,7 +73,7 @@ class LineupOptimizer:
                     if not self._is_duplicate(lineup, candidates):
                         candidates.append(lineup)
                         if len(candidates) % 5 == 0:  # Progress every 5 lineups
-                            print(f"   Generated {len(candidates)}/{num_lineups} lineups", end='\r')
+                            print(f"   Generated {len(candidates)}/{num_candidates} lineups", end='\r')
             except Exception as e:
                 # Debug: show first error
                 if attempts == 0:
@@ -79,120 +90,77 @@ class LineupOptimizer:
         if len(candidates) < num_lineups:
             print(f"   ⚠️  Only generated {len(candidates)}/{num_lineups} lineups")
         
+        if simulator is not None:
+            # Pick the portfolio by simulated marginal payout
+            picked = simulator.select_portfolio(candidates, self.player_pool, num_lineups)
+            return [candidates[i - 1] for i in picked['lineup_id']]
+        
         # Score and rank lineups
         scored_lineups = self._score_lineups(candidates)
         
         return scored_lineups[:num_lineups]
     
     def _build_lineup_from_table(self) -> Dict:
-        """Build a single lineup using pure DataFrame operations (FAST)"""
+        """Build a single lineup from PlayerTable array slices (FAST)"""
+        table = self.table
         
         # Start with empty lineup
         lineup_players = []
+        used_names = []
         remaining_salary = SALARY_CAP
         
-        # Step 1: Select QB (crucial decision)
-        qb_pool = self.player_pool[
-            (self.player_pool['Position'] == 'QB') &
-            (self.player_pool['Salary'] <= remaining_salary * 0.20)  # Max 20% of cap
-        ].copy()
+        # Weight by value with some randomness
+        weight = table.value * np.random.uniform(0.8, 1.2, table.n_players)
         
-        if qb_pool.empty:
-            return None
+        # Finish inside the validator's salary window and (relaxed) projection range
+        proj_min, proj_max = self.contest_rules['projection_target']
+        projection_target = (proj_min * 0.9, proj_max * 1.1)
+        
+        def take(positions, max_salary=SALARY_CAP, count=1, team=None):
+            """
+            Add up to count of the best-weighted candidates that keep the lineup
+            completable (this replaces per-step budget shares as salary reserves)
+            """
+            nonlocal remaining_salary
+            for taken in range(count):
+                ids = table.candidates(positions, max_salary, exclude=used_names, team=team)
+                ids = table.feasible(ids, lineup_players, remaining_salary, projection_target)
+                if len(ids) == 0:
+                    return taken
+                player = table.player(ids[np.argmax(weight[ids])])
+                lineup_players.append(player)
+                used_names.append(player['Name'])
+                remaining_salary -= player['Salary']
+            return count
         
-        # Weight by value with some randomness
-        qb_pool['weight'] = qb_pool['Value'] * np.random.uniform(0.8, 1.2, len(qb_pool))
-        qb = qb_pool.nlargest(1, 'weight').iloc[0]
-        lineup_players.append(qb.to_dict())
-        remaining_salary -= qb['Salary']
+        # Step 1: Select QB (crucial decision)
+        if take('QB', remaining_salary * 0.20) == 0:  # Max 20% of cap
+            return None
         
         # Get QB's team for stacking
-        qb_team = qb['Team']
+        qb_team = lineup_players[0]['Team']
         
-        # Step 2: Stack with 2 pass catchers from QB's team
-        stack_pool = self.player_pool[
-            (self.player_pool['Team'] == qb_team) &
-            (self.player_pool['Position'].isin(['WR', 'TE'])) &
-            (self.player_pool['Salary'] <= remaining_salary * 0.4)  # Leave room for rest
-        ].copy()
-        
-        stack_count = min(2, len(stack_pool))
-        if stack_count > 0:
-            stack_pool['weight'] = stack_pool['Value'] * np.random.uniform(0.8, 1.2, len(stack_pool))
-            stack_players = stack_pool.nlargest(stack_count, 'weight')
-            
-            for _, player in stack_players.iterrows():
-                lineup_players.append(player.to_dict())
-                remaining_salary -= player['Salary']
+        # Step 2: Stack with up to 2 pass catchers from QB's team
+        take(['WR', 'TE'], count=2, team=qb_team)
         
         # Step 3: Fill RBs (need at least 2)
-        used_names = [p['Name'] for p in lineup_players]
-        rb_pool = self.player_pool[
-            (self.player_pool['Position'] == 'RB') &
-            (~self.player_pool['Name'].isin(used_names)) &
-            (self.player_pool['Salary'] <= remaining_salary * 0.35)
-        ].copy()
-        
         rb_needed = 2
-        if len(rb_pool) >= rb_needed:
-            rb_pool['weight'] = rb_pool['Value'] * np.random.uniform(0.8, 1.2, len(rb_pool))
-            rbs = rb_pool.nlargest(rb_needed, 'weight')
-            
-            for _, player in rbs.iterrows():
-                lineup_players.append(player.to_dict())
-                remaining_salary -= player['Salary']
-        else:
+        if take('RB', count=rb_needed) < rb_needed:
             return None
         
         # Step 4: Fill remaining WRs (need total of 3)
-        used_names = [p['Name'] for p in lineup_players]
         current_wrs = sum(1 for p in lineup_players if p['Position'] == 'WR')
         wr_needed = 3 - current_wrs
         
-        if wr_needed > 0:
-            wr_pool = self.player_pool[
-                (self.player_pool['Position'] == 'WR') &
-                (~self.player_pool['Name'].isin(used_names)) &
-                (self.player_pool['Salary'] <= remaining_salary * 0.35)
-            ].copy()
-            
-            if len(wr_pool) >= wr_needed:
-                wr_pool['weight'] = wr_pool['Value'] * np.random.uniform(0.8, 1.2, len(wr_pool))
-                wrs = wr_pool.nlargest(wr_needed, 'weight')
-                
-                for _, player in wrs.iterrows():
-                    lineup_players.append(player.to_dict())
-                    remaining_salary -= player['Salary']
-            else:
-                return None
+        if wr_needed > 0 and take('WR', count=wr_needed) < wr_needed:
+            return None
         
         # Step 5: Fill TE if not already have one from stack
         current_tes = sum(1 for p in lineup_players if p['Position'] == 'TE')
-        if current_tes == 0:
-            used_names = [p['Name'] for p in lineup_players]
-            te_pool = self.player_pool[
-                (self.player_pool['Position'] == 'TE') &
-                (~self.player_pool['Name'].isin(used_names)) &
-                (self.player_pool['Salary'] <= remaining_salary * 0.35)
-            ].copy()
-            
-            if not te_pool.empty:
-                te_pool['weight'] = te_pool['Value'] * np.random.uniform(0.8, 1.2, len(te_pool))
-                te = te_pool.nlargest(1, 'weight').iloc[0]
-                lineup_players.append(te.to_dict())
-                remaining_salary -= te['Salary']
-            else:
-                return None
+        if current_tes == 0 and take('TE') == 0:
+            return None
         
         # Step 6: Fill FLEX (RB/WR/TE) - prefer RB or WR over TE
-        used_names = [p['Name'] for p in lineup_players]
-        
-        # Count current positions to avoid duplicates
-        current_positions = {}
-        for p in lineup_players:
-            pos = p['Position']
-            current_positions[pos] = current_positions.get(pos, 0) + 1
-        
         # We already have 1 TE required, so for FLEX prefer RB/WR
         # Only use TE in FLEX if we have good value
         flex_positions = ['RB', 'WR']
@@ -201,36 +169,17 @@ class LineupOptimizer:
         if np.random.random() < 0.15:  # Only 15% chance to consider TE for FLEX
             flex_positions.append('TE')
         
-        flex_pool = self.player_pool[
-            (self.player_pool['Position'].isin(flex_positions)) &
-            (~self.player_pool['Name'].isin(used_names)) &
-            (self.player_pool['Salary'] <= remaining_salary * 0.5)
-        ].copy()
-        
-        if not flex_pool.empty:
-            flex_pool['weight'] = flex_pool['Value'] * np.random.uniform(0.8, 1.2, len(flex_pool))
-            flex = flex_pool.nlargest(1, 'weight').iloc[0]
-            lineup_players.append(flex.to_dict())
-            remaining_salary -= flex['Salary']
-        else:
+        if take(flex_positions) == 0:
             return None
         
         # Step 7: Fill DST (usually cheap)
-        used_names = [p['Name'] for p in lineup_players]
-        dst_pool = self.player_pool[
-            (self.player_pool['Position'] == 'DST') &
-            (~self.player_pool['Name'].isin(used_names)) &
-            (self.player_pool['Salary'] <= remaining_salary)
-        ].copy()
-        
-        if not dst_pool.empty:
-            dst_pool['weight'] = dst_pool['Value'] * np.random.uniform(0.8, 1.2, len(dst_pool))
-            dst = dst_pool.nlargest(1, 'weight').iloc[0]
-            lineup_players.append(dst.to_dict())
-            remaining_salary -= dst['Salary']
-        else:
+        if take('DST') == 0:
             return None
         
+        total_salary = sum(p['Salary'] for p in lineup_players)
+        total_proj = sum(p['Projection'] for p in lineup_players)
+        total_own = sum(p['Ownership'] for p in lineup_players)
+        
         # Build final lineup dict with proper ordering
         return self._format_lineup_ordered(lineup_players, total_salary, total_proj, total_own)
     
@@ -377,33 +326,45 @@ class LineupOptimizer:
         Enhanced: Check multiple similarity thresholds
         """
         
-        lineup_players = set(p['Name'] for p in lineup['players'])
+        portfolio = self.portfolio
+        portfolio.sync(existing)
+        if len(self.stack_cores) > len(existing):
+            self.stack_cores = LineupBitsets(self.table)
+            self.portfolio_qbs = []
+        for existing_lineup in existing[len(self.stack_cores):]:
+            self.stack_cores.add(self._top3_ids(existing_lineup))
+            self.portfolio_qbs.append(self._qb_id(existing_lineup))
         
-        for existing_lineup in existing:
-            existing_players = set(p['Name'] for p in existing_lineup['players'])
-            
-            # Count matching players
-            matches = len(lineup_players & existing_players)
-            
-            # Reject if 7+ players match (too similar)
-            if matches >= 7:
-                return True
-            
-            # Also reject if same QB + same top 3 salary players (stack clone)
-            lineup_qb = [p['Name'] for p in lineup['players'] if p['Position'] == 'QB'][0]
-            existing_qb = [p['Name'] for p in existing_lineup['players'] if p['Position'] == 'QB'][0]
-            
-            if lineup_qb == existing_qb:
-                # Get top 3 by salary
-                lineup_top3 = set([p['Name'] for p in sorted(lineup['players'], key=lambda x: x['Salary'], reverse=True)[:3]])
-                existing_top3 = set([p['Name'] for p in sorted(existing_lineup['players'], key=lambda x: x['Salary'], reverse=True)[:3]])
-                
-                # If same QB and 2 of top 3 match, it's too similar
-                if len(lineup_top3 & existing_top3) >= 2:
-                    return True
+        lineup_ids = portfolio.lineup_ids(lineup)
+        
+        # Exact repeat (hash lookup)
+        if portfolio.contains(lineup_ids):
+            return True
+        
+        if len(existing) == 0:
+            return False
+        
+        # Reject if 7+ players match (too similar), popcount against every lineup at once
+        if (portfolio.overlaps(lineup_ids) >= 7).any():
+            return True
+        
+        # Also reject if same QB + same top 3 salary players (stack clone):
+        # same QB and 2 of top 3 match is too similar
+        same_qb = np.asarray(self.portfolio_qbs) == self._qb_id(lineup)
+        if same_qb.any() and (self.stack_cores.overlaps(self._top3_ids(lineup))[same_qb] >= 2).any():
+            return True
         
         return False
     
+    def _qb_id(self, lineup: Dict) -> int:
+        """PlayerTable id of a lineup's QB"""
+        return self.table.index[[p['Name'] for p in lineup['players'] if p['Position'] == 'QB'][0]]
+    
+    def _top3_ids(self, lineup: Dict) -> List[int]:
+        """PlayerTable ids of a lineup's 3 highest salaries"""
+        top3 = sorted(lineup['players'], key=lambda x: x['Salary'], reverse=True)[:3]
+        return [self.table.index[p['Name']] for p in top3]
+    
     def _score_lineups(self, lineups: List[Dict]) -> List[Dict]:
         """
         Score and rank lineups
@@ -0,0 +1,371 @@
+"""
+Player Table
+Contiguous NumPy arrays of the player pool, built once per run for fast picks
+"""
+
+from itertools import product
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Tuple, Union
+from config import SALARY_CAP, DRAFTKINGS_POSITIONS
+
+# Position codes (uint8) in roster order
+POSITIONS = ['QB', 'RB', 'WR', 'TE', 'DST']
+NO_TEAM = np.iinfo(np.uint8).max  # Code for a missing team / opponent
+
+# Roster slot types (FLEX takes an RB / WR / TE) and the salary floor the validators enforce
+SLOT_TYPES = ['QB', 'RB', 'WR', 'TE', 'FLEX', 'DST']
+FLEX_POSITIONS = ['RB', 'WR', 'TE']
+SALARY_FLOOR = 48000
+TAIL_SLOTS = 2  # feasible() checks the last this many open slots exactly
+
+
+class PlayerTable:
+    """
+    Array view of a player pool for lineup builders
+
+    Holds one contiguous array per column (salary int32, projection and
+    ownership float32, position / team / opponent uint8 codes) plus, per
+    position, the player ids sorted by salary. A pick takes a salary window
+    with two binary searches on that position's slice, then scores the few
+    candidates left, instead of masking, copying and re-indexing the whole
+    DataFrame. Player dicts are built once, so a picked player costs one
+    dict copy.
+    """
+
+    def __init__(self, players: pd.DataFrame):
+        """
+        Args:
+            players: DataFrame with Name, Position, Team, Salary, Projection, Ownership
+                     (Opponent and Category are used when present)
+        """
+        players = players.reset_index(drop=True)
+        self.n_players = len(players)
+        self.records = players.to_dict('records')
+        self.names = players['Name'].to_numpy()
+        self.index = {name: i for i, name in enumerate(self.names)}
+
+        self.salary = players['Salary'].to_numpy(dtype=np.int32)
+        self.projection = players['Projection'].to_numpy(dtype=np.float32)
+        ownership = players['Ownership'] if 'Ownership' in players.columns else pd.Series(0.0, index=players.index)
+        self.ownership = ownership.fillna(0).to_numpy(dtype=np.float32)
+        self.value = self.projection / (self.salary.astype(np.float32) / 1000)
+
+        self.position = self._codes(players['Position'], POSITIONS)
+        self.teams = sorted(players['Team'].dropna().astype(str).unique()) if 'Team' in players.columns else []
+        self.team = self._codes(players['Team'], self.teams) if 'Team' in players.columns else np.full(self.n_players, NO_TEAM, dtype=np.uint8)
+        if 'Opponent' in players.columns:
+            self.opponent = self._codes(players['Opponent'], self.teams)
+        else:
+            self.opponent = np.full(self.n_players, NO_TEAM, dtype=np.uint8)
+        self.category = players['Category'].to_numpy() if 'Category' in players.columns else None
+
+        # Per position: player ids and their salaries, sorted by salary
+        self.by_position = {}
+        self.sorted_salary = {}
+        for code, pos in enumerate(POSITIONS):
+            ids = np.flatnonzero(self.position == code)
+            ids = ids[np.argsort(self.salary[ids], kind='stable')]
+            self.by_position[pos] = ids
+            self.sorted_salary[pos] = self.salary[ids]
+        
+        self.fill_table = self._fill_table()
+    
+    def _fill_table(self) -> Dict[tuple, np.ndarray]:
+        """
+        Bounds for filling every set of open roster slots
+        
+        Keyed by open-slot counts in SLOT_TYPES order, each entry is
+        [min salary, max salary, min projection, max projection] over all ways
+        to fill those slots with distinct players (each bound on its own).
+        The k cheapest (or priciest / lowest / highest projected) players of
+        a position fill its k slots, and an open FLEX takes the best next
+        player of whichever RB / WR / TE is best for that bound. Slots the
+        pool can't fill get [inf, -inf, inf, -inf].
+        """
+        # Prefix sums of each position's sorted salaries / projections
+        prefix = {}
+        for pos in POSITIONS:
+            ids = np.flatnonzero(self.position == POSITIONS.index(pos))
+            columns = []
+            for values in (self.salary[ids].astype(float), self.projection[ids].astype(float)):
+                ascending = np.sort(values)
+                columns.append(np.concatenate([[0], np.cumsum(ascending)]))
+                columns.append(np.concatenate([[0], np.cumsum(ascending[::-1])]))
+            prefix[pos] = columns  # min salary, max salary, min projection, max projection
+        
+        def fill(counts: Dict[str, int]) -> np.ndarray:
+            bounds = np.array([0.0, 0.0, 0.0, 0.0])
+            for pos, count in counts.items():
+                if count >= len(prefix[pos][0]):
+                    return np.array([np.inf, -np.inf, np.inf, -np.inf])
+                bounds += [column[count] for column in prefix[pos]]
+            return bounds
+        
+        table = {}
+        ranges = [range(DRAFTKINGS_POSITIONS.get(slot, 0) + 1) for slot in SLOT_TYPES]
+        for key in product(*ranges):
+            open_slots = dict(zip(SLOT_TYPES, key))
+            flex = open_slots.pop('FLEX')
+            if not flex:
+                table[key] = fill(open_slots)
+                continue
+            options = np.array([fill({**open_slots, pos: open_slots[pos] + flex}) for pos in FLEX_POSITIONS])
+            table[key] = np.array([options[:, 0].min(), options[:, 1].max(), options[:, 2].min(), options[:, 3].max()])
+        return table
+    
+    def fill_bounds(self, open_slots: Dict[str, int]) -> np.ndarray:
+        """[min salary, max salary, min projection, max projection] to fill open_slots (see _fill_table)"""
+        return self.fill_table[tuple(open_slots.get(slot, 0) for slot in SLOT_TYPES)]
+    
+    def salary_window(self, budget: float, open_after: Dict[str, int],
+                      floor: float = SALARY_FLOOR) -> Tuple[float, float]:
+        """
+        Salary range for the next pick that keeps the lineup completable
+        
+        Args:
+            budget: Salary left under SALARY_CAP before this pick
+            open_after: Slots still open after this pick
+            floor: Lowest total salary the lineup may finish at
+        
+        Returns:
+            (min salary, max salary): leave at least the cheapest fill of
+            open_after under the cap, and let the priciest fill still reach floor
+        """
+        min_fill, max_fill = self.fill_bounds(open_after)[:2]
+        return budget - (SALARY_CAP - floor) - max_fill, budget - min_fill
+    
+    def projection_window(self, projection_so_far: float, open_after: Dict[str, int],
+                          target: Tuple[float, float]) -> Tuple[float, float]:
+        """Projection range for the next pick that can still finish inside target (min, max)"""
+        bounds = self.fill_bounds(open_after)
+        return target[0] - projection_so_far - bounds[3], target[1] - projection_so_far - bounds[2]
+
+    @staticmethod
+    def _codes(values: pd.Series, labels: List[str]) -> np.ndarray:
+        """uint8 code of each value in labels (NO_TEAM when missing)"""
+        lookup = {label: code for code, label in enumerate(labels)}
+        return np.array([lookup.get(str(v), NO_TEAM) if pd.notna(v) else NO_TEAM for v in values], dtype=np.uint8)
+
+    def team_code(self, team: str) -> int:
+        """Code of a team name (NO_TEAM if it has no players)"""
+        return self.teams.index(team) if team in self.teams else NO_TEAM
+
+    def candidates(self, positions: Union[str, List[str]], max_salary: float = SALARY_CAP,
+                   min_salary: float = 0, exclude: List[str] = None, team: str = None,
+                   opponent: str = None) -> np.ndarray:
+        """
+        Player ids at the given position(s) within a salary window
+
+        Args:
+            positions: One position or a list of positions
+            max_salary: Highest salary allowed
+            min_salary: Lowest salary allowed
+            exclude: Player names to leave out (e.g. already in the lineup)
+            team: Only players on this team
+            opponent: Only players facing this team
+
+        Returns:
+            Player ids, ascending salary within each position
+        """
+        positions = [positions] if isinstance(positions, str) else positions
+        slices = []
+        for pos in positions:
+            salaries = self.sorted_salary.get(pos)
+            if salaries is None:
+                continue
+            lo = np.searchsorted(salaries, min_salary, side='left')
+            hi = np.searchsorted(salaries, max_salary, side='right')
+            slices.append(self.by_position[pos][lo:hi])
+
+        ids = np.concatenate(slices) if len(slices) > 1 else (slices[0] if slices else np.array([], dtype=np.int64))
+
+        for codes, name in ((self.team, team), (self.opponent, opponent)):
+            if name is not None:
+                # An unknown team matches nobody (NO_TEAM also marks players without one)
+                code = self.team_code(name)
+                ids = ids[codes[ids] == code] if code != NO_TEAM else ids[:0]
+        if exclude:
+            excluded = [self.index[name] for name in exclude if name in self.index]
+            ids = ids[~np.isin(ids, excluded)]
+        return ids
+
+    def by_projection(self, ids: np.ndarray) -> np.ndarray:
+        """ids ordered by projection, highest first (ties keep their order)"""
+        return ids[np.argsort(-self.projection[ids], kind='stable')]
+
+    def feasible(self, ids: np.ndarray, players: List[Dict], budget: float,
+                 projection_target: Tuple[float, float] = None, floor: float = SALARY_FLOOR) -> np.ndarray:
+        """
+        Candidates that keep a partial lineup completable
+        
+        Each candidate takes its position's open slot (or FLEX), and must leave
+        the slots still open fillable under the cap and up to the floor
+        (salary_window) and, with projection_target, inside that projection
+        range (projection_window). Candidates with no open slot are dropped.
+        Those bounds hold salary and projection separately, so once at most
+        TAIL_SLOTS slots would stay open the candidates are instead checked
+        against every actual way to fill them.
+        
+        Args:
+            ids: Candidate player ids
+            players: Player dicts already in the lineup
+            budget: Salary left under SALARY_CAP
+            projection_target: Optional (min, max) total projection
+            floor: Lowest total salary the lineup may finish at
+        """
+        keep = np.zeros(len(ids), dtype=bool)
+        positions = self.position[ids]
+        open_now = open_slots(players)
+        projection_so_far = sum(p['Projection'] for p in players)
+        used = [self.index[p['Name']] for p in players if p['Name'] in self.index]
+        
+        for code in np.unique(positions):
+            if code >= len(POSITIONS):
+                continue
+            open_after = open_slots(players + [{'Position': POSITIONS[code]}])
+            if open_after == open_now:
+                continue  # No slot left for this position
+            
+            low, high = self.salary_window(budget, open_after, floor)
+            salary = self.salary[ids]
+            ok = (positions == code) & (salary >= low) & (salary <= high)
+            if projection_target is not None:
+                low, high = self.projection_window(projection_so_far, open_after, projection_target)
+                projection = self.projection[ids]
+                ok &= (projection >= low) & (projection <= high)
+            
+            if 0 < sum(open_after.values()) <= TAIL_SLOTS and ok.any():
+                ok[ok] = self._tail_feasible(ids[ok], used, open_after, budget, floor,
+                                             projection_so_far, projection_target)
+            keep |= ok
+        return ids[keep]
+    
+    def _tail_feasible(self, ids: np.ndarray, used: List[int], open_after: Dict[str, int], budget: float,
+                       floor: float, projection_so_far: float, projection_target: Tuple[float, float] = None) -> np.ndarray:
+        """For each candidate, whether some fill of the last open slots finishes inside every window"""
+        # Every way to fill the open slots with unused players: (fills x slots) ids
+        fills = np.zeros((1, 0), dtype=np.int64)
+        for slot, count in open_after.items():
+            positions = FLEX_POSITIONS if slot == 'FLEX' else [slot]
+            pool = self.candidates(positions)
+            pool = pool[~np.isin(pool, used)]
+            for _ in range(count):
+                fills = np.concatenate([np.repeat(fills, len(pool), axis=0),
+                                        np.tile(pool, len(fills))[:, None]], axis=1)
+                fills = fills[(fills[:, :-1] != fills[:, -1:]).all(axis=1)]
+        if len(fills) == 0:
+            return np.zeros(len(ids), dtype=bool)
+        
+        # Candidate (rows) against fill (columns) totals
+        salary = self.salary[ids][:, None] + self.salary[fills].sum(axis=1)[None, :]
+        ok = (salary <= budget) & (salary >= budget - (SALARY_CAP - floor))
+        if projection_target is not None:
+            projection = projection_so_far + self.projection[ids][:, None] + self.projection[fills].sum(axis=1)[None, :]
+            ok &= (projection >= projection_target[0]) & (projection <= projection_target[1])
+        ok &= (fills[None, :, :] != ids[:, None, None]).all(axis=2)  # Candidate can't also fill a slot
+        return ok.any(axis=1)
+    
+    def category_scores(self, scores: Dict[str, float], default: float = 0.0) -> np.ndarray:
+        """Per-player array mapping Category labels to scores (all default without a Category column)"""
+        result = np.full(self.n_players, default, dtype=np.float32)
+        if self.category is not None:
+            for label, score in scores.items():
+                result[self.category == label] = score
+        return result
+
+    def player(self, i: int) -> Dict:
+        """Player dict for id i (a copy, so builders can add keys like PositionSlot)"""
+        return dict(self.records[i])
+
+    def find(self, name: str) -> Dict:
+        """Player dict by name"""
+        return self.player(self.index[name])
+
+
+def open_slots(players: List[Dict]) -> Dict[str, int]:
+    """Roster slots a partial lineup leaves open (extra RB / WR / TE fill FLEX)"""
+    remaining = dict(DRAFTKINGS_POSITIONS)
+    for p in players:
+        pos = p['Position']
+        if remaining.get(pos, 0) > 0:
+            remaining[pos] -= 1
+        elif pos in FLEX_POSITIONS and remaining.get('FLEX', 0) > 0:
+            remaining['FLEX'] -= 1
+    return remaining
+
+
+class LineupBitsets:
+    """
+    Portfolio of lineups as fixed-width player-id bitmasks
+
+    Each lineup is ceil(players / 64) uint64 words with bit i set for player
+    id i, stored as one row of a growing (lineups x words) array. Players
+    shared with every stored lineup are then popcount(new & row) summed over
+    the words, one vectorized pass over the whole portfolio, and exact repeats
+    are a hash-set lookup on the mask bytes.
+    """
+
+    def __init__(self, table: PlayerTable, capacity: int = 64):
+        """
+        Args:
+            table: PlayerTable whose ids the lineups use
+            capacity: Initial rows (doubles when full)
+        """
+        self.table = table
+        self.n_words = max(1, (table.n_players + 63) // 64)
+        self.masks = np.zeros((capacity, self.n_words), dtype=np.uint64)
+        self.count = 0
+        self.keys = set()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def encode(self, player_ids) -> np.ndarray:
+        """Bitmask of a set of player ids"""
+        ids = np.asarray(player_ids, dtype=np.uint64)
+        mask = np.zeros(self.n_words, dtype=np.uint64)
+        np.bitwise_or.at(mask, (ids >> np.uint64(6)).astype(np.int64), np.uint64(1) << (ids & np.uint64(63)))
+        return mask
+
+    def lineup_ids(self, lineup: Dict) -> List[int]:
+        """Player ids of a lineup dict"""
+        return [self.table.index[p['Name']] for p in lineup['players']]
+
+    def add(self, player_ids):
+        """Store a lineup's player ids"""
+        if self.count == len(self.masks):
+            self.masks = np.concatenate([self.masks, np.zeros_like(self.masks)])
+        mask = self.encode(player_ids)
+        self.masks[self.count] = mask
+        self.keys.add(mask.tobytes())
+        self.count += 1
+
+    def contains(self, player_ids) -> bool:
+        """True if exactly this set of players is stored"""
+        return self.encode(player_ids).tobytes() in self.keys
+
+    def overlaps(self, player_ids) -> np.ndarray:
+        """Players shared with each stored lineup, shape (len(self),)"""
+        shared = self.masks[:self.count] & self.encode(player_ids)
+        return _popcount(shared).sum(axis=1)
+
+    def sync(self, lineups: List[Dict]):
+        """Mirror a growing list of lineup dicts (adds the new tail, rebuilds if it changed)"""
+        if self.count > len(lineups):
+            self.count = 0
+            self.keys = set()
+        for lineup in lineups[self.count:]:
+            self.add(self.lineup_ids(lineup))
+
+
+# Set bits per byte, for NumPy versions without bitwise_count
+_BYTE_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def _popcount(words: np.ndarray) -> np.ndarray:
+    """Set bits in each uint64 word"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words)
+    counts = _BYTE_POPCOUNT[np.ascontiguousarray(words).view(np.uint8)]
+    return counts.reshape(words.shape + (8,)).sum(axis=-1)
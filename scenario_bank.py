@@ -0,0 +1,116 @@
+"""
+Scenario Bank
+Disk cache of simulated player outcomes and sorted field scores, reused across runs
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional
+from config import SCENARIO_BANK_DIR, SCENARIO_BANK_QUOTA
+
+# Player columns that determine sampled outcomes and the generated field
+OUTCOME_COLUMNS = ['Name', 'Position', 'Team', 'Opponent', 'Projection', 'StdDev']
+FIELD_COLUMNS = ['Name', 'Salary', 'Ownership']
+
+
+class ScenarioBank:
+    """
+    Memory-mapped store of simulation inputs keyed by a hash of the slate
+
+    Each entry is a directory holding .npy files:
+        scenarios.npy      (iterations x players) player outcomes
+        field_scores.npy   (iterations x entries) field scores, sorted per row
+        field_lineups.npy  (entries x 9) field player ids (when a field was generated)
+
+    Files are opened with mmap_mode, so a re-run reads only the rows it uses.
+    Entries are evicted least-recently-used first once the bank exceeds its
+    disk quota; an entry's directory mtime is its last use.
+    """
+
+    def __init__(self, directory: str = SCENARIO_BANK_DIR, quota_bytes: int = SCENARIO_BANK_QUOTA):
+        """
+        Args:
+            directory: Bank location (shared by the CLI and the Streamlit app)
+            quota_bytes: Disk quota for all entries together
+        """
+        self.directory = directory
+        self.quota_bytes = quota_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def key(players: pd.DataFrame, settings: Dict) -> str:
+        """
+        Hash of everything the banked arrays depend on
+
+        Args:
+            players: Player index (row order = scenario columns)
+            settings: Correlation loadings, sampling, dtype, contest size, seed, ...
+        """
+        digest = hashlib.sha256()
+        columns = [col for col in OUTCOME_COLUMNS + FIELD_COLUMNS if col in players.columns]
+        digest.update(pd.util.hash_pandas_object(players[columns].astype(str), index=True).to_numpy().tobytes())
+        digest.update(json.dumps(settings, sort_keys=True, default=str).encode())
+        return digest.hexdigest()[:24]
+
+    def path(self, key: str, name: str = None) -> str:
+        """Entry directory, or one of its array files"""
+        entry = os.path.join(self.directory, key)
+        return entry if name is None else os.path.join(entry, f"{name}.npy")
+
+    def rows(self, key: str) -> int:
+        """Number of banked iterations for key (0 if missing)"""
+        try:
+            return int(np.load(self.path(key, 'scenarios'), mmap_mode='r').shape[0])
+        except (OSError, ValueError):
+            return 0
+
+    def load(self, key: str, name: str) -> Optional[np.ndarray]:
+        """Read-only memory map of a banked array, marking the entry as used"""
+        path = self.path(key, name)
+        if not os.path.exists(path):
+            return None
+        os.utime(self.path(key))
+        return np.load(path, mmap_mode='r')
+
+    def writer(self, key: str) -> str:
+        """Staging directory for a new or extended entry (see commit)"""
+        staging = self.path(key) + f".tmp-{os.getpid()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        return staging
+
+    @staticmethod
+    def create(staging: str, name: str, shape: tuple, dtype) -> np.ndarray:
+        """Writable memory map for an array in a staging directory"""
+        return np.lib.format.open_memmap(os.path.join(staging, f"{name}.npy"), mode='w+',
+                                         dtype=dtype, shape=shape)
+
+    def commit(self, key: str, staging: str):
+        """Swap a finished staging directory in as the entry, then enforce the quota"""
+        entry = self.path(key)
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(staging, entry)
+        self.evict(keep=key)
+
+    def evict(self, keep: str = None):
+        """Delete least-recently-used entries until the bank fits in its quota"""
+        entries = []
+        for name in os.listdir(self.directory):
+            entry = os.path.join(self.directory, name)
+            if not os.path.isdir(entry) or '.tmp-' in name:
+                continue
+            size = sum(os.path.getsize(os.path.join(entry, f)) for f in os.listdir(entry))
+            entries.append((os.path.getmtime(entry), size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.quota_bytes:
+                break
+            if name == keep:
+                continue
+            shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+            total -= size
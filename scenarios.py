@@ -0,0 +1,226 @@
+"""
+Player Outcome Scenarios
+Correlated player score sampling driven by game-level latent factors
+"""
+
+import math
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr, ndtri
+from scipy.stats import qmc
+from typing import Dict
+from config import CORRELATION_LOADINGS, QMC_REPLICATE_POINTS
+
+# Ways to draw the standard normal inputs behind a block of scenarios
+SAMPLING_METHODS = ('plain', 'antithetic', 'sobol', 'halton')
+
+
+class GameFactorModel:
+    """
+    Latent factor model for correlated DFS player outcomes
+    
+    Every player's standardized score is a mix of a few shared factors plus
+    player-specific noise:
+        
+        z = game * G[game] + team * T[team] + script * side * S[game]
+            + opponent_team * T[opponent] + sqrt(1 - sum(loadings^2)) * noise
+        score = max(0, Projection + StdDev * z)
+    
+    G is the game environment (pace / total), T is the team's offensive
+    efficiency and S is game script (+1 side leading, -1 side trailing).
+    Each player touches at most four factors, so sampling costs
+    O(iterations x players) instead of the O(players^2) of a full covariance
+    Cholesky, and each player's marginal stays N(Projection, StdDev).
+    """
+    
+    def __init__(self, players: pd.DataFrame, loadings: Dict = None):
+        """
+        Args:
+            players: DataFrame with Position, Team, Opponent, Projection, StdDev
+            loadings: Per-position factor loadings (defaults to CORRELATION_LOADINGS)
+        """
+        self.loadings = CORRELATION_LOADINGS if loadings is None else loadings
+        self.means = players['Projection'].to_numpy(dtype=float)
+        self.stddevs = players['StdDev'].to_numpy(dtype=float)
+        self.n_players = len(players)
+        
+        teams = players['Team'].fillna('').astype(str).tolist() if 'Team' in players.columns else [''] * self.n_players
+        if 'Opponent' in players.columns:
+            opponents = players['Opponent'].fillna('').astype(str).tolist()
+        else:
+            opponents = [''] * self.n_players
+        positions = players['Position'].fillna('').astype(str).tolist() if 'Position' in players.columns else [''] * self.n_players
+        
+        # Index games (sorted team pair) and teams, including opponents with no players
+        game_ids, team_ids = {}, {}
+        for team, opp in zip(teams, opponents):
+            game_ids.setdefault(self._game_key(team, opp), len(game_ids))
+            team_ids.setdefault(team, len(team_ids))
+            if opp:
+                team_ids.setdefault(opp, len(team_ids))
+        
+        self.n_games = len(game_ids)
+        self.n_teams = len(team_ids)
+        
+        # Sparse loadings: (players x 4) factor column index + weight
+        # Factor columns: [G (games) | T (teams) | S (games)]
+        script_offset = self.n_games + self.n_teams
+        self.factor_index = np.zeros((self.n_players, 4), dtype=np.int64)
+        self.factor_weight = np.zeros((self.n_players, 4))
+        
+        for p, (team, opp, pos) in enumerate(zip(teams, opponents, positions)):
+            game_key = self._game_key(team, opp)
+            game = game_ids[game_key]
+            side = 1.0 if team == game_key[0] else -1.0
+            weights = self.loadings.get(pos, {})
+            
+            self.factor_index[p] = [
+                game,
+                self.n_games + team_ids[team],
+                script_offset + game,
+                self.n_games + team_ids[opp] if opp else self.n_games + team_ids[team]
+            ]
+            self.factor_weight[p] = [
+                weights.get('game', 0.0),
+                weights.get('team', 0.0),
+                weights.get('script', 0.0) * side,
+                weights.get('opponent_team', 0.0) if opp else 0.0
+            ]
+        
+        shared_variance = np.sum(self.factor_weight ** 2, axis=1)
+        self.noise_weight = np.sqrt(np.clip(1 - shared_variance, 0, 1))
+    
+    @staticmethod
+    def _game_key(team: str, opponent: str) -> tuple:
+        """Both teams in a game share one key; missing opponent = team-only game"""
+        return tuple(sorted([team, opponent])) if opponent else (team,)
+    
+    @property
+    def n_factors(self) -> int:
+        """Number of shared latent factors (game + team + script)"""
+        return 2 * self.n_games + self.n_teams
+    
+    @property
+    def dimension(self) -> int:
+        """Number of standard normal inputs per scenario (factors + player noise)"""
+        return self.n_factors + self.n_players
+    
+    def sample(self, n_iterations: int, rng: np.random.Generator = None, sampling: str = 'plain',
+               dtype=np.float64) -> np.ndarray:
+        """
+        Sample correlated player scores
+        
+        Args:
+            n_iterations: Number of scenarios
+            rng: Random generator
+            sampling: One of SAMPLING_METHODS (see standard_normals)
+            dtype: float64 or float32 (half the memory)
+        
+        Returns:
+            Array of shape (n_iterations, n_players)
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+        return self.transform(standard_normals(n_iterations, self.dimension, rng, sampling, dtype))
+    
+    def score_gradient(self, coefficients: np.ndarray) -> np.ndarray:
+        """
+        Gradient of sum(coefficients * score) with respect to the normal inputs
+        
+        Ignores the clip at zero, so it is exact wherever no player is clipped.
+        
+        Args:
+            coefficients: Weight per player, e.g. lineup incidence minus field exposure
+        
+        Returns:
+            Array of shape (dimension,)
+        """
+        scale = coefficients * self.stddevs
+        gradient = np.zeros(self.dimension)
+        gradient[self.n_factors:] = scale * self.noise_weight
+        for k in range(self.factor_index.shape[1]):
+            np.add.at(gradient, self.factor_index[:, k], scale * self.factor_weight[:, k])
+        return gradient
+    
+    def loading_matrix(self) -> np.ndarray:
+        """
+        Dense (players x dimension) map from normal inputs to score deviations
+        
+        Row p is the gradient of player p's (unclipped) score, so the players'
+        score covariance is loading_matrix() @ loading_matrix().T.
+        """
+        loadings = np.zeros((self.n_players, self.dimension))
+        rows = np.arange(self.n_players)
+        loadings[rows, self.n_factors + rows] = self.stddevs * self.noise_weight
+        for k in range(self.factor_index.shape[1]):
+            np.add.at(loadings, (rows, self.factor_index[:, k]), self.stddevs * self.factor_weight[:, k])
+        return loadings
+    
+    def expected_scores(self) -> np.ndarray:
+        """
+        Exact mean of each player's clipped score, E[max(0, Projection + StdDev * z)]
+        
+        Used as the known mean for control variates.
+        """
+        stddevs = np.maximum(self.stddevs, 1e-12)
+        ratio = self.means / stddevs
+        pdf = np.exp(-0.5 * ratio ** 2) / math.sqrt(2 * math.pi)
+        return self.means * ndtr(ratio) + stddevs * pdf
+    
+    def transform(self, normals: np.ndarray) -> np.ndarray:
+        """
+        Map standard normal inputs to player scores
+        
+        Args:
+            normals: Array of shape (n_iterations, dimension); first n_factors
+                     columns drive the shared factors, the rest player noise.
+                     Scores come back in the same dtype.
+        """
+        dtype = normals.dtype
+        factors = normals[:, :self.n_factors]
+        noise = normals[:, self.n_factors:]
+        
+        z = noise * self.noise_weight.astype(dtype)
+        for k in range(self.factor_index.shape[1]):
+            z += factors[:, self.factor_index[:, k]] * self.factor_weight[:, k].astype(dtype)
+        
+        scores = self.means.astype(dtype) + self.stddevs.astype(dtype) * z
+        return np.maximum(0, scores, out=scores)  # Can't score negative
+
+
+def standard_normals(n: int, dimension: int, rng: np.random.Generator, sampling: str = 'plain',
+                     dtype=np.float64) -> np.ndarray:
+    """
+    Draw an (n x dimension) block of standard normal inputs
+    
+    Sampling methods:
+        plain:      Independent pseudo-random normals
+        antithetic: Rows come in (z, -z) pairs, so rows 2k and 2k + 1 mirror each other
+        sobol:      Scrambled Sobol' points mapped through the normal inverse CDF
+        halton:     Scrambled Halton points mapped through the normal inverse CDF
+    
+    Quasi-random rows come in independently scrambled runs of
+    QMC_REPLICATE_POINTS (the last may be shorter), so averages stay unbiased
+    and the spread between those replicates measures the estimator's variance.
+    Quasi-random points are most uniform in their leading dimensions, which is
+    where GameFactorModel puts the shared game/team factors.
+    """
+    if sampling == 'antithetic':
+        half = rng.standard_normal(((n + 1) // 2, dimension), dtype=dtype)
+        normals = np.empty((n, dimension), dtype=dtype)
+        normals[0::2] = half
+        normals[1::2] = -half[:n // 2]
+        return normals
+    
+    if sampling in ('sobol', 'halton'):
+        normals = np.empty((n, dimension), dtype=dtype)
+        for start in range(0, n, QMC_REPLICATE_POINTS):
+            size = min(QMC_REPLICATE_POINTS, n - start)
+            if sampling == 'sobol':
+                # Sobol' balance needs a power-of-two point count; use its leading size points
+                points = qmc.Sobol(dimension, scramble=True, seed=rng).random_base2(max(0, math.ceil(math.log2(size))))[:size]
+            else:
+                points = qmc.Halton(dimension, scramble=True, seed=rng).random(size)
+            normals[start:start + size] = ndtri(np.clip(points, 1e-12, 1 - 1e-12))
+        return normals
+    
+    return rng.standard_normal((n, dimension), dtype=dtype)
@@ -6,6 +6,7 @@ import pandas as pd
 import numpy as np
 from typing import List, Dict
 from config import SALARY_CAP, CONTEST_STRUCTURES
+from player_table import PlayerTable, LineupBitsets
 
 
 class SimpleOptimizer:
@@ -23,6 +24,22 @@ class SimpleOptimizer:
         self.player_pool['Value'] = self.player_pool['Projection'] / (self.player_pool['Salary'] / 1000)
         self.locks = locks if locks else {}
         
+        # Array view for picks, with each player's category boost precomputed
+        self.table = PlayerTable(self.player_pool)
+        self.portfolio = LineupBitsets(self.table)
+        contest_entries = self.contest_rules['entries']
+        if contest_entries >= 100000:
+            # Millionaire Maker: Boost leverage, penalize chalk
+            boosts = {'💎 Leverage': 0.30, '🔥 Chalk': -0.20, '⭐ Core': 0.10}
+        elif contest_entries >= 10000:
+            # Mid GPP: Balanced
+            boosts = {'💎 Leverage': 0.10, '⭐ Core': 0.15, '🔥 Chalk': 0.05}
+        else:
+            # Small GPP: HEAVILY FAVOR CHALK AND CORE
+            boosts = {'🔥 Chalk': 0.35, '⭐ Core': 0.30, '💎 Leverage': -0.10, '✓ Flex': 0.05}
+        self.category_boost = self.table.category_scores(boosts)
+        self.excluded = self.table.category_scores({'🚫 Exclude': 1}) > 0
+        
         print(f"   Building {num_lineups} lineups...")
         
         # Show lock info
@@ -74,7 +91,7 @@ class SimpleOptimizer:
         
         # Lock QB
         if self.locks.get('QB'):
-            qb = self.player_pool[self.player_pool['Name'] == self.locks['QB']].iloc[0].to_dict()
+            qb = self.table.find(self.locks['QB'])
             lineup.append(qb)
             budget -= qb['Salary']
             used_names.append(qb['Name'])
@@ -83,7 +100,7 @@ class SimpleOptimizer:
         
         # Lock RBs
         for rb_name in self.locks.get('RB', []):
-            rb = self.player_pool[self.player_pool['Name'] == rb_name].iloc[0].to_dict()
+            rb = self.table.find(rb_name)
             lineup.append(rb)
             budget -= rb['Salary']
             used_names.append(rb['Name'])
@@ -91,7 +108,7 @@ class SimpleOptimizer:
         
         # Lock WRs
         for wr_name in self.locks.get('WR', []):
-            wr = self.player_pool[self.player_pool['Name'] == wr_name].iloc[0].to_dict()
+            wr = self.table.find(wr_name)
             lineup.append(wr)
             budget -= wr['Salary']
             used_names.append(wr['Name'])
@@ -99,7 +116,7 @@ class SimpleOptimizer:
         
         # Lock TE
         if self.locks.get('TE'):
-            te = self.player_pool[self.player_pool['Name'] == self.locks['TE']].iloc[0].to_dict()
+            te = self.table.find(self.locks['TE'])
             lineup.append(te)
             budget -= te['Salary']
             used_names.append(te['Name'])
@@ -107,7 +124,7 @@ class SimpleOptimizer:
         
         # Lock FLEX
         if self.locks.get('FLEX'):
-            flex = self.player_pool[self.player_pool['Name'] == self.locks['FLEX']].iloc[0].to_dict()
+            flex = self.table.find(self.locks['FLEX'])
             flex['PositionSlot'] = f"FLEX ({flex['Position']})"
             lineup.append(flex)
             budget -= flex['Salary']
@@ -116,7 +133,7 @@ class SimpleOptimizer:
         
         # Lock DST
         if self.locks.get('DST'):
-            dst = self.player_pool[self.player_pool['Name'] == self.locks['DST']].iloc[0].to_dict()
+            dst = self.table.find(self.locks['DST'])
             lineup.append(dst)
             budget -= dst['Salary']
             used_names.append(dst['Name'])
@@ -135,25 +152,18 @@ class SimpleOptimizer:
             qb_strategy = np.random.random()
             
             if qb_strategy < 0.40:
-                qb_pool = self.player_pool[
-                    (self.player_pool['Position'] == 'QB') &
-                    (self.player_pool['Salary'] >= 5000) &
-                    (self.player_pool['Salary'] <= 6500) &
-                    (self.player_pool['Projection'] >= 18) &
-                    (~self.player_pool['Name'].isin(used_names))
-                ].copy()
+                qb_pool = self.table.candidates('QB', 6500, min_salary=5000, exclude=used_names)
+                qb_pool = self.table.feasible(qb_pool[self.table.projection[qb_pool] >= 18], lineup, budget)
                 
-                if not qb_pool.empty:
-                    qb_pool['value_score'] = qb_pool['Projection'] / (qb_pool['Salary'] / 1000)
-                    qb_pool['qb_score'] = qb_pool['value_score'] * np.random.uniform(0.90, 1.10, len(qb_pool))
-                    weights = qb_pool['qb_score'] / qb_pool['qb_score'].sum()
-                    qb = qb_pool.sample(1, weights=weights).iloc[0].to_dict()
+                if len(qb_pool):
+                    qb_score = self.table.value[qb_pool] * np.random.uniform(0.90, 1.10, len(qb_pool))
+                    qb = self.table.player(np.random.choice(qb_pool, p=qb_score / qb_score.sum()))
                 else:
-                    qb = self._pick_player('QB', 7500, used_names)
+                    qb = self._pick_player('QB', 7500, used_names, lineup, budget)
             elif qb_strategy < 0.80:
-                qb = self._pick_player('QB', 7000, used_names)
+                qb = self._pick_player('QB', 7000, used_names, lineup, budget)
             else:
-                qb = self._pick_player('QB', 7500, used_names)
+                qb = self._pick_player('QB', 7500, used_names, lineup, budget)
             
             if not qb:
                 return None
@@ -166,29 +176,26 @@ class SimpleOptimizer:
         qb_team = locked_qb_team
         if not qb_team:
             return None
+        qb_opponent = qb.get('Opponent')
         
-        # Step 2: MANDATORY QB STACK - Pick 1-2 pass catchers from QB's team
-        stack_budget = int(budget * 0.30)
-        stack_pool = self.player_pool[
-            (self.player_pool['Team'] == qb_team) &
-            (self.player_pool['Position'].isin(['WR', 'TE'])) &
-            (self.player_pool['Salary'] <= stack_budget) &
-            (self.player_pool['Projection'] > 0)
-        ].sort_values('Projection', ascending=False)
-        
-        if stack_pool.empty:
-            return None  # NO STACK = REJECT LINEUP
-        
-        # Pick 1-2 stack pieces
-        stack_count = min(2, len(stack_pool))
+        # Step 2: MANDATORY QB STACK - Pick 1-2 pass catchers from QB's team,
+        # each one that keeps the rest of the lineup fillable under the cap
         stack_players = []
-        for i in range(stack_count):
-            if len(stack_pool) > i:
-                stacker = stack_pool.iloc[i].to_dict()
-                stack_players.append(stacker)
-                lineup.append(stacker)
-                budget -= stacker['Salary']
-                correlations.append(f"{qb['Name']}-{stacker['Name']} (same team)")
+        for i in range(2):
+            stack_pool = self.table.candidates(['WR', 'TE'], exclude=used_names, team=qb_team)
+            stack_pool = self.table.feasible(stack_pool[self.table.projection[stack_pool] > 0], lineup, budget)
+            if not len(stack_pool):
+                break
+            
+            stacker = self.table.player(self.table.by_projection(stack_pool)[0])
+            stack_players.append(stacker)
+            lineup.append(stacker)
+            budget -= stacker['Salary']
+            used_names.append(stacker['Name'])
+            correlations.append(f"{qb['Name']}-{stacker['Name']} (same team)")
+        
+        if not stack_players:
+            return None  # NO STACK = REJECT LINEUP
         
         # Track positions filled
         positions_filled = {'QB': 1, 'WR': 0, 'TE': 0, 'RB': 0}
@@ -201,17 +208,13 @@ class SimpleOptimizer:
         # 40% chance to add a bring-back (leverage play in high-scoring games)
         bring_back_added = False
         if np.random.random() < 0.40 and qb_opponent:
-            # Look for WR/RB from opponent team (cheap-ish for leverage)
-            bring_back_pool = self.player_pool[
-                (self.player_pool['Team'] == qb_opponent) &
-                (self.player_pool['Position'].isin(['WR', 'RB'])) &
-                (self.player_pool['Salary'] <= budget * 0.20) &
-                (self.player_pool['Ownership'] < 15) &  # Prefer lower owned
-                (~self.player_pool['Name'].isin(used_names))
-            ].sort_values('Projection', ascending=False)
+            # Look for WR/RB from opponent team (low-owned for leverage)
+            bring_back_pool = self.table.candidates(['WR', 'RB'], exclude=used_names, team=qb_opponent)
+            bring_back_pool = bring_back_pool[self.table.ownership[bring_back_pool] < 15]  # Prefer lower owned
+            bring_back_pool = self.table.feasible(bring_back_pool, lineup, budget)
             
-            if not bring_back_pool.empty:
-                bring_back = bring_back_pool.iloc[0].to_dict()
+            if len(bring_back_pool):
+                bring_back = self.table.player(self.table.by_projection(bring_back_pool)[0])
                 lineup.append(bring_back)
                 budget -= bring_back['Salary']
                 used_names.append(bring_back['Name'])
@@ -220,17 +223,10 @@ class SimpleOptimizer:
                 correlations.append(f"{bring_back['Name']} (bring-back vs {qb_team})")
         
         # Step 4: Fill RBs (need 2 total, accounting for bring-back)
-        # With cheap QB, we have more budget for STUD RBs
+        # Both can be studs up to $9k (CMC, Gibbs tier) when the rest still fits
         rbs_needed = 2 - positions_filled.get('RB', 0)
         for i in range(rbs_needed):
-            # First RB: Allow full $9k (CMC, Gibbs tier)
-            # Second RB: Still allow expensive ($7-9k)
-            if i == 0:
-                rb_max = min(9000, int(budget * 0.30))  # 30% for RB1 (was 25%)
-            else:
-                rb_max = min(9000, int(budget * 0.30))  # 30% for RB2 (was 25%)
-            
-            rb = self._pick_player('RB', rb_max, used_names)
+            rb = self._pick_player('RB', 9000, used_names, lineup, budget)
             if not rb:
                 return None
             lineup.append(rb)
@@ -239,18 +235,10 @@ class SimpleOptimizer:
             positions_filled['RB'] = positions_filled.get('RB', 0) + 1
         
         # Step 5: Fill remaining WRs (need 3 total)
-        # With QB savings, can afford multiple elite WRs
+        # With QB savings, can afford multiple elite WRs ($8-8.7k tier)
         wrs_needed = 3 - positions_filled['WR']
         for i in range(wrs_needed):
-            # All WRs can be studs now ($8-8.7k tier)
-            if i == 0:
-                wr_max = min(8700, int(budget * 0.32))  # 32% for WR1
-            elif i == 1:
-                wr_max = min(8700, int(budget * 0.35))  # 35% for WR2
-            else:
-                wr_max = min(8700, int(budget * 0.40))  # 40% for WR3
-            
-            wr = self._pick_player('WR', wr_max, used_names)
+            wr = self._pick_player('WR', 8700, used_names, lineup, budget)
             if not wr:
                 return None
             lineup.append(wr)
@@ -260,8 +248,7 @@ class SimpleOptimizer:
         
         # Step 6: Fill TE if needed
         if positions_filled['TE'] == 0:
-            te_max = int(budget * 0.50)
-            te = self._pick_player('TE', te_max, used_names)
+            te = self._pick_player('TE', SALARY_CAP, used_names, lineup, budget)
             if not te:
                 return None
             lineup.append(te)
@@ -274,31 +261,26 @@ class SimpleOptimizer:
         # 30% chance: opponent team (game stack)
         # 20% chance: best available (contrarian)
         
-        flex_max = int(budget * 0.70)
         flex_choice = np.random.random()
         
         if flex_choice < 0.50:
             # Try to triple stack (same team as QB)
-            flex_pool = self.player_pool[
-                (self.player_pool['Position'].isin(['RB', 'WR'])) &
-                (self.player_pool['Team'] == qb_team) &
-                (self.player_pool['Salary'] <= flex_max) &
-                (~self.player_pool['Name'].isin(used_names))
-            ].sort_values('Projection', ascending=False)
+            flex_pool = self.table.candidates(['RB', 'WR'], exclude=used_names, team=qb_team)
+            flex_pool = self.table.feasible(flex_pool, lineup, budget)
             
-            if not flex_pool.empty:
-                flex = flex_pool.iloc[0].to_dict()
+            if len(flex_pool):
+                flex = self.table.player(self.table.by_projection(flex_pool)[0])
                 correlations.append(f"{flex['Name']} (triple stack with {qb_team})")
             else:
-                flex_pool = self.player_pool[
-                    (self.player_pool['Position'].isin(['RB', 'WR'])) &
-                    (self.player_pool['Salary'] <= flex_max) &
-                    (~self.player_pool['Name'].isin(used_names))
-                ].sort_values('Projection', ascending=False)
-                flex = flex_pool.iloc[0].to_dict() if not flex_pool.empty else None
+                flex_pool = self.table.feasible(self.table.candidates(['RB', 'WR'], exclude=used_names), lineup, budget)
+                flex = self.table.player(self.table.by_projection(flex_pool)[0]) if len(flex_pool) else None
         else:
             # Standard FLEX pick
-            flex = self._pick_player(['RB', 'WR'], flex_max, used_names)
+            flex = self._pick_player(['RB', 'WR'], SALARY_CAP, used_names, lineup, budget)
+        
+        if not flex:
+            # The completable fills may need a TE in the FLEX
+            flex = self._pick_player(['RB', 'WR', 'TE'], SALARY_CAP, used_names, lineup, budget)
         
         if not flex:
             return None
@@ -325,32 +307,25 @@ class SimpleOptimizer:
             rb_teams = [rb.get('Team') for rb in our_rbs]
             
             for rb_team in rb_teams:
-                dst_pool = self.player_pool[
-                    (self.player_pool['Position'] == 'DST') &
-                    (self.player_pool.get('Opponent', '') == rb_team) &  # DST vs our RB's team
-                    (self.player_pool['Salary'] <= budget)
-                ].sort_values('Projection', ascending=False)
+                dst_pool = self.table.candidates('DST', opponent=rb_team)  # DST vs our RB's team
+                dst_pool = self.table.feasible(dst_pool, lineup, budget)
                 
-                if not dst_pool.empty:
-                    dst = dst_pool.iloc[0].to_dict()
+                if len(dst_pool):
+                    dst = self.table.player(self.table.by_projection(dst_pool)[0])
                     correlations.append(f"{dst['Name']} DST vs {our_rbs[0]['Name']}'s team (contrarian leverage)")
                     break
         
         elif dst_choice < 0.70 and qb_opponent:
             # Pick DST from opponent team (they're defending our QB)
-            dst_pool = self.player_pool[
-                (self.player_pool['Position'] == 'DST') &
-                (self.player_pool['Team'] == qb_opponent) &
-                (self.player_pool['Salary'] <= budget)
-            ]
+            dst_pool = np.sort(self.table.feasible(self.table.candidates('DST', team=qb_opponent), lineup, budget))
             
-            if not dst_pool.empty:
-                dst = dst_pool.iloc[0].to_dict()
+            if len(dst_pool):
+                dst = self.table.player(dst_pool[0])
                 correlations.append(f"{dst['Name']} DST (opponent of our QB)")
         
         # Fallback: Best DST available
         if not dst:
-            dst = self._pick_player('DST', budget, used_names)
+            dst = self._pick_player('DST', SALARY_CAP, used_names, lineup, budget)
         
         if not dst:
             return None
@@ -382,18 +357,18 @@ class SimpleOptimizer:
         
         if contest_entries >= 100000:
             # Millionaire Maker: Need leverage but not too contrarian
-            if total_own < 60 or total_own > 110:
-                return None
+            own_target_min, own_target_max = 60, 110
         elif contest_entries >= 10000:
             # Mid GPP: Balanced approach
-            if total_own < 90 or total_own > 140:
-                return None
+            own_target_min, own_target_max = 90, 140
         else:
             # Small GPP: HAMMER CHALK WITH LEVERAGE SPRINKLES
             # Target: 120-150% total ownership (13-17% avg)
             # This means: 5-6 chalk pieces + 3-4 leverage pieces
-            if total_own < 110 or total_own > 160:
-                return None
+            own_target_min, own_target_max = 110, 160
+        
+        if total_own < own_target_min or total_own > own_target_max:
+            return None
         
         # Build stack description
         stack_positions = [p['Position'] for p in stack_teammates]
@@ -431,111 +406,79 @@ class SimpleOptimizer:
             'game_stacks': game_stack_desc if game_stack_desc else ["Single game focus"]
         }
     
-    def _pick_player(self, position, max_salary: int, used_names: List[str]) -> Dict:
-        """Pick player using CONTEST-SPECIFIC strategy and respecting categories"""
-        
-        # Handle multiple positions
-        if isinstance(position, list):
-            pool = self.player_pool[
-                (self.player_pool['Position'].isin(position)) &
-                (~self.player_pool['Name'].isin(used_names)) &
-                (self.player_pool['Salary'] <= max_salary) &
-                (self.player_pool['Projection'] > 0)
-            ].copy()
-        else:
-            pool = self.player_pool[
-                (self.player_pool['Position'] == position) &
-                (~self.player_pool['Name'].isin(used_names)) &
-                (self.player_pool['Salary'] <= max_salary) &
-                (self.player_pool['Projection'] > 0)
-            ].copy()
-        
-        if pool.empty:
-            return None
+    def _pick_player(self, position, max_salary: int, used_names: List[str],
+                     lineup: List[Dict], budget: int) -> Dict:
+        """
+        Pick player using CONTEST-SPECIFIC strategy and respecting categories
         
-        # Exclude players marked as excluded
-        if 'Category' in pool.columns:
-            pool = pool[pool['Category'] != '🚫 Exclude']
-            
-            if pool.empty:
-                return None
+        Only candidates that leave the lineup's open slots fillable between the
+        salary floor and the cap (PlayerTable.feasible on the partial lineup and
+        its remaining budget) are considered.
+        """
         
-        # CONTEST-SPECIFIC STRATEGY with category awareness
-        contest_entries = self.contest_rules['entries']
+        # One position or a list of positions
+        ids = self.table.candidates(position, max_salary, exclude=used_names)
         
-        # Add category-based score boosts
-        if 'Category' in pool.columns:
-            pool['category_boost'] = 0.0
-            
-            if contest_entries >= 100000:
-                # Millionaire Maker: Boost leverage, penalize chalk
-                pool.loc[pool['Category'] == '💎 Leverage', 'category_boost'] = 0.30
-                pool.loc[pool['Category'] == '🔥 Chalk', 'category_boost'] = -0.20
-                pool.loc[pool['Category'] == '⭐ Core', 'category_boost'] = 0.10
-            elif contest_entries >= 10000:
-                # Mid GPP: Balanced
-                pool.loc[pool['Category'] == '💎 Leverage', 'category_boost'] = 0.10
-                pool.loc[pool['Category'] == '⭐ Core', 'category_boost'] = 0.15
-                pool.loc[pool['Category'] == '🔥 Chalk', 'category_boost'] = 0.05
-            else:
-                # Small GPP: HEAVILY FAVOR CHALK AND CORE
-                pool.loc[pool['Category'] == '🔥 Chalk', 'category_boost'] = 0.35  # Big boost!
-                pool.loc[pool['Category'] == '⭐ Core', 'category_boost'] = 0.30   # Big boost!
-                pool.loc[pool['Category'] == '💎 Leverage', 'category_boost'] = -0.10  # Slight penalty
-                pool.loc[pool['Category'] == '✓ Flex', 'category_boost'] = 0.05
-        else:
-            pool['category_boost'] = 0.0
+        # Exclude players marked as excluded (and zero projections)
+        ids = ids[(self.table.projection[ids] > 0) & ~self.excluded[ids]]
+        ids = self.table.feasible(ids, lineup, budget)
+        
+        if len(ids) == 0:
+            return None
+        
+        # CONTEST-SPECIFIC STRATEGY (category boosts precomputed in generate_lineups)
+        contest_entries = self.contest_rules['entries']
         
         # Calculate base scores based on contest type
         if contest_entries >= 100000:
             # Millionaire Maker - still need leverage
-            pool['proj_norm'] = pool['Projection'] / pool['Projection'].max()
-            pool['own_leverage'] = (100 - pool['Ownership']) / 100
-            pool['pick_score'] = (pool['proj_norm'] * 0.40) + (pool['own_leverage'] * 0.60)
+            proj_weight, own_weight = 0.40, 0.60
             top_pct = 0.35
             
         elif contest_entries >= 10000:
             # Mid GPP - balanced
-            pool['proj_norm'] = pool['Projection'] / pool['Projection'].max()
-            pool['own_leverage'] = (100 - pool['Ownership']) / 100
-            pool['pick_score'] = (pool['proj_norm'] * 0.60) + (pool['own_leverage'] * 0.40)
+            proj_weight, own_weight = 0.60, 0.40
             top_pct = 0.40
             
         else:
             # Small GPP - HAMMER PROJECTION, ownership secondary
             # 85% projection, 15% ownership
-            pool['proj_norm'] = pool['Projection'] / pool['Projection'].max()
-            pool['own_leverage'] = (100 - pool['Ownership']) / 100
-            pool['pick_score'] = (pool['proj_norm'] * 0.85) + (pool['own_leverage'] * 0.15)
+            proj_weight, own_weight = 0.85, 0.15
             
             # Pick from top 30% by projection (studs + high scorers)
             top_pct = 0.30
         
+        projection = self.table.projection[ids].astype(float)
+        proj_norm = projection / projection.max()
+        own_leverage = (100 - self.table.ownership[ids].astype(float)) / 100
+        pick_score = (proj_norm * proj_weight) + (own_leverage * own_weight)
+        
         # Apply category boost
-        pool['pick_score'] = pool['pick_score'] + pool['category_boost']
+        pick_score = pick_score + self.category_boost[ids]
         
         # Add randomness for variety
-        pool['pick_score'] *= np.random.uniform(0.90, 1.10, len(pool))
+        pick_score *= np.random.uniform(0.90, 1.10, len(ids))
         
         # Select from top pool
-        top_n = max(1, int(len(pool) * top_pct))
-        top_pool = pool.nlargest(top_n, 'pick_score')
+        top_n = max(1, int(len(ids) * top_pct))
+        top = np.argsort(-pick_score, kind='stable')[:top_n]
         
         # Weight by score
-        weights = top_pool['pick_score'] / top_pool['pick_score'].sum()
+        weights = pick_score[top] / pick_score[top].sum()
         
-        return top_pool.sample(1, weights=weights).iloc[0].to_dict()
+        return self.table.player(np.random.choice(ids[top], p=weights))
     
     def _is_duplicate(self, lineup: Dict, lineups: List[Dict]) -> bool:
         """Check if too similar to existing"""
         
-        new_players = set(p['Name'] for p in lineup['players'])
+        self.portfolio.sync(lineups)
+        player_ids = self.portfolio.lineup_ids(lineup)
         
-        for existing in lineups:
-            existing_players = set(p['Name'] for p in existing['players'])
-            
-            # If 7+ match, it's a dupe
-            if len(new_players & existing_players) >= 7:
-                return True
+        # Exact repeat (hash lookup), then 7+ matching players against every lineup at once
+        if self.portfolio.contains(player_ids):
+            return True
+        
+        if (self.portfolio.overlaps(player_ids) >= 7).any():
+            return True
         
         return False
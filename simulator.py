@@ -3,16 +3,39 @@ Monte Carlo Tournament Simulator
 Simulates thousands of tournaments to calculate expected ROI
 """
 
+import os
+import time
 import numpy as np
 import pandas as pd
+from scipy.special import ndtr, ndtri
+from scipy.stats import chi2
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from statistics import NormalDist
 from typing import Dict, List, Tuple
-from config import MONTE_CARLO_ITERATIONS
+from config import (MONTE_CARLO_ITERATIONS, SIMULATION_MEMORY_BUDGET, SIMULATION_DTYPE, PAYOUT_LADDER,
+                    SIMULATION_BLOCK_ITERATIONS, SIMULATION_WORKERS,
+                    SIMULATION_PARALLEL_MIN_SCORES, SIMULATION_CONFIDENCE,
+                    ADAPTIVE_MIN_ITERATIONS, ADAPTIVE_MAX_ITERATIONS, SIMULATION_SAMPLING,
+                    SIMULATION_CONTROL_VARIATE, IMPORTANCE_MAX_TILT, TOP_PERCENTILE,
+                    SCENARIO_BANK_ENABLED, CORRELATION_LOADINGS, FIELD_SALARY_FLOOR,
+                    FIELD_SKETCH_BINS, ANALYTIC_FIELD_SAMPLE, HALVING_INITIAL_ITERATIONS,
+                    PORTFOLIO_SEASON_CONTESTS, SIMULATION_DUPLICATION, QMC_REPLICATE_POINTS,
+                    QMC_MIN_REPLICATES)
+from scenarios import GameFactorModel, SAMPLING_METHODS, standard_normals
+from field_generator import FieldGenerator, ROSTER_SIZE
+from scenario_bank import ScenarioBank
 
 
 class MonteCarloSimulator:
     """Simulate DFS tournaments to calculate win probability and ROI"""
     
-    def __init__(self, contest_entries: int, payout_structure: Dict):
+    def __init__(self, contest_entries: int, payout_structure: Dict, correlated: bool = True,
+                 iterations: int = None, workers: int = SIMULATION_WORKERS, seed: int = None,
+                 sampling: str = SIMULATION_SAMPLING, control_variate: bool = SIMULATION_CONTROL_VARIATE,
+                 dtype: str = SIMULATION_DTYPE, memory_budget: int = SIMULATION_MEMORY_BUDGET,
+                 scenario_bank: ScenarioBank = None, field_sketch_bins: int = FIELD_SKETCH_BINS,
+                 duplication: bool = SIMULATION_DUPLICATION):
         """
         Args:
             contest_entries: Number of entries in contest
@@ -20,12 +43,70 @@ class MonteCarloSimulator:
                 {
                     'entry_fee': 100,
                     'places_paid': 1400,  # Top 10% of 14k
-                    'payouts': {1: 50000, 2: 25000, ...}
+                    'payouts': {1: 50000, 2: 25000, ...},
+                    'payout_table': np.ndarray  # Optional, payout for every paid place
                 }
+            correlated: Sample player outcomes from the game-level factor model
+                        (False = independent N(Projection, StdDev) draws)
+            iterations: Simulated contests per run (default MONTE_CARLO_ITERATIONS)
+            workers: Processes to split large shared runs across (None = one per
+                     CPU core, 1 = always in-process); simulate_lineup and runs
+                     below SIMULATION_PARALLEL_MIN_SCORES always run in-process
+            seed: Seed for reproducible runs (same results for any worker count)
+            sampling: Variance reduction for player outcomes: 'plain', 'antithetic',
+                      'sobol' or 'halton' (quasi-Monte Carlo)
+            control_variate: Correct ROI / cash% / win% with each lineup's score,
+                             whose exact mean is known from the projections
+            dtype: Float precision of scenario and field matrices ('float32' or 'float64')
+            memory_budget: Bytes the simulation matrices may use; iteration blocks
+                           are sized so a run never exceeds it
+            scenario_bank: Disk cache of outcomes and field scores reused across seeded
+                           runs (default: the shared bank when SCENARIO_BANK_ENABLED);
+                           unseeded runs never read or write it
+            field_sketch_bins: Keep each iteration's field as a quantile sketch with
+                               this many evenly spaced ranks (plus every payout
+                               breakpoint) instead of all contest_entries scores;
+                               None keeps the exact field
+            duplication: Split each lineup's payouts with its expected field copies
+                         (FieldGenerator.expected_copies); needs an ownership-driven field
         """
         self.contest_entries = contest_entries
         self.payout_structure = payout_structure
-        self.iterations = MONTE_CARLO_ITERATIONS
+        self.iterations = iterations or MONTE_CARLO_ITERATIONS
+        self.correlated = correlated
+        self.workers = workers or os.cpu_count() or 1
+        self.seed = seed
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.confidence = SIMULATION_CONFIDENCE
+        self.control_variate = control_variate
+        self.dtype = np.dtype(dtype)
+        self.memory_budget = memory_budget
+        
+        if scenario_bank is None and SCENARIO_BANK_ENABLED:
+            scenario_bank = ScenarioBank()
+        self.scenario_bank = scenario_bank
+        self.field_sketch_bins = field_sketch_bins
+        self.duplication = duplication
+        
+        if sampling not in SAMPLING_METHODS:
+            print(f"Unknown sampling method '{sampling}', using plain sampling")
+            sampling = 'plain'
+        self.sampling = sampling
+        
+        # Dense rank-indexed payouts: payout_table[placement - 1], last entry is 0 (unpaid)
+        self.payout_table = np.append(_payout_table_from_structure(payout_structure), 0.0)
+        
+        # Shared scenario state from the last batch run
+        self.player_index = None  # One row per player; row = scenario column
+        self.scenarios = None     # (iterations x players) player outcomes
+        self.outcome_model = None # GameFactorModel behind the scenarios
+        self.field_lineups = None # (contest_entries x 9) field player ids, None = N(135, 15) field
+        self.placements = None    # (iterations x lineups) placements from the last run; sequential
+                                  # runs keep one array per lineup, as long as its own iterations
+        self.importance_weights = None  # (iterations,) likelihood ratios (importance runs)
+        self.portfolio_profit = None    # (iterations,) portfolio profit per contest (portfolio runs)
+        self.last_run = None            # Arrays a shared run keeps for update_projections
+        self.expected_duplicates = None # (lineups,) expected field copies of the last run's lineups
         
     def simulate_lineup(self, lineup: Dict, field_ownership: pd.DataFrame) -> Dict:
         """
@@ -33,52 +114,19 @@ class MonteCarloSimulator:
         
         Args:
             lineup: Dict with players, projections, ownership
-            field_ownership: Distribution of field's ownership
+            field_ownership: Player pool with projected Ownership (field is
+                             modeled as N(135, 15) when unavailable)
             
         Returns:
             Dict with win%, top10%, cash%, expected ROI
         """
         
         try:
-            # Vectorized simulation - all iterations at once
-            # Generate all lineup scores at once
-            lineup_scores = self._simulate_score_vectorized(lineup, self.iterations)
-            
-            # Generate all field scores at once
-            field_scores = self._simulate_field_vectorized(self.iterations)
-            
-            # Calculate placements (how many field entries beat each lineup score)
-            placements = np.sum(field_scores > lineup_scores[:, np.newaxis], axis=1) + 1
-            
-            # Calculate statistics
-            win_count = np.sum(placements == 1)
-            top_10pct = int(self.contest_entries * 0.10)
-            top10_count = np.sum(placements <= top_10pct)
-            
-            # Calculate cash and winnings
-            payouts = np.array([self._get_payout(p) for p in placements])
-            cash_count = np.sum(payouts > 0)
-            total_winnings = np.sum(payouts)
-            
-            # Calculate percentages
-            win_pct = (win_count / self.iterations) * 100
-            top10_pct = (top10_count / self.iterations) * 100
-            cash_pct = (cash_count / self.iterations) * 100
-            
-            # Calculate expected value and ROI
-            avg_winnings = total_winnings / self.iterations
-            entry_fee = self.payout_structure['entry_fee']
-            expected_roi = ((avg_winnings - entry_fee) / entry_fee) * 100
-            
-            return {
-                'win_pct': win_pct,
-                'top10_pct': top10_pct,
-                'cash_pct': cash_pct,
-                'expected_winnings': avg_winnings,
-                'expected_roi': expected_roi,
-                'avg_placement': np.mean(placements),
-                'median_placement': np.median(placements)
-            }
+            # Vectorized simulation - all iterations at once, against an
+            # ownership-driven field when field_ownership has the player pool.
+            # Fresh scenarios every call: the bank would hand each lineup (and
+            # every unseeded rerun) the same slates
+            return self._simulate_shared([lineup], field_ownership, parallel=False, use_bank=False)[0]
             
         except Exception as e:
             print(f"Error in simulation: {e}")
@@ -86,6 +134,7 @@ class MonteCarloSimulator:
             return {
                 'win_pct': 0.0,
                 'top10_pct': 0.0,
+                'top01_pct': 0.0,
                 'cash_pct': 0.0,
                 'expected_winnings': 0.0,
                 'expected_roi': 0.0,
@@ -93,149 +142,289 @@ class MonteCarloSimulator:
                 'median_placement': self.contest_entries / 2
             }
     
-    def _simulate_score_vectorized(self, lineup: Dict, n_iterations: int) -> np.ndarray:
+    def _placement_statistics(self, placements: np.ndarray) -> Dict[str, np.ndarray]:
         """
-        Simulate lineup scores for all iterations at once (FAST)
+        Summarize placements for one or more lineups
         
+        Args:
+            placements: Integer array of shape (n_iterations, n_lineups)
+            
         Returns:
-            Array of shape (n_iterations,) with lineup scores
+            Dict of arrays (one value per lineup) with win%, top10%, cash%, ROI
         """
-        lineup_scores = np.zeros(n_iterations)
-        
-        for player in lineup['players']:
-            mean = player['Projection']
-            stddev = player.get('StdDev', 6.0)
-            
-            # Generate all scores for this player at once
-            player_scores = np.random.normal(mean, stddev, n_iterations)
-            player_scores = np.maximum(0, player_scores)  # Can't score negative
-            
-            lineup_scores += player_scores
-        
-        return lineup_scores
+        tallies = _payout_tallies(placements, self._lineup_payouts(placements), self._top10_cutoff(),
+                                  self._top01_cutoff())
+        return self._statistics_from_tallies(tallies, placements)
     
-    def _simulate_field_vectorized(self, n_iterations: int) -> np.ndarray:
+    def _statistics_from_tallies(self, tallies: Dict[str, np.ndarray], placements: np.ndarray) -> Dict[str, np.ndarray]:
         """
-        Simulate field scores for all iterations at once (FAST)
+        Turn merged per-lineup tallies into win%, top10%, cash%, ROI
         
-        Returns:
-            Array of shape (n_iterations, contest_entries) with all field scores
+        tallies['iterations'] may be a scalar or one count per lineup (adaptive
+        runs); each lineup's iterations are the first rows of its placements column.
+        placements is an (iterations x lineups) matrix or, for sequential runs,
+        a list of one placements array per lineup.
         """
-        # Generate all field scores at once
-        field_scores = np.random.normal(
-            loc=135,  # Average field score
-            scale=15,  # Variance in field
-            size=(n_iterations, self.contest_entries)
-        )
+        n_iterations = np.broadcast_to(tallies['iterations'], tallies['wins'].shape)
+        columns = placements if isinstance(placements, list) else placements.T
+        avg_winnings = tallies['payout_sum'] / n_iterations
+        entry_fee = self._entry_fee()
         
-        return field_scores
+        stats = {
+            'win_pct': tallies['wins'] / n_iterations * 100,
+            'top10_pct': tallies['top10'] / n_iterations * 100,
+            'top01_pct': tallies['top01'] / n_iterations * 100,
+            'cash_pct': tallies['cashes'] / n_iterations * 100,
+            'expected_winnings': avg_winnings,
+            'expected_roi': (avg_winnings - entry_fee) / entry_fee * 100,
+            'avg_placement': tallies['placement_sum'] / n_iterations,
+            'median_placement': np.array([
+                np.median(columns[i][:n]) for i, n in enumerate(n_iterations)
+            ]),
+            'iterations': n_iterations.copy()
+        }
+        stats.update(self._confidence_half_widths(tallies, n_iterations))
+        if self.expected_duplicates is not None:
+            stats['expected_duplicates'] = self.expected_duplicates.copy()
+        
+        return stats
     
-    def _simulate_score(self, lineup: Dict) -> float:
+    def _confidence_half_widths(self, tallies: Dict[str, np.ndarray], n_iterations: np.ndarray) -> Dict[str, np.ndarray]:
         """
-        Simulate lineup score using normal distribution
-        Each player's score ~ N(projection, stddev)
+        Confidence-interval half-widths (+/-) for ROI, cash% and win%
+        
+        Rates use the (x + 1) / (n + 2) estimate so a lineup that has never
+        won still reports a non-zero interval.
         """
-        total_score = 0
+        z = NormalDist().inv_cdf(0.5 + self.confidence / 2)
+        entry_fee = self._entry_fee()
+        n = n_iterations.astype(float)
         
-        for player in lineup['players']:
-            mean = player['Projection']
-            stddev = player.get('StdDev', 6.0)  # Default if not provided
-            
-            # Sample from normal distribution
-            player_score = np.random.normal(mean, stddev)
-            player_score = max(0, player_score)  # Can't score negative
-            
-            total_score += player_score
+        mean_payout = tallies['payout_sum'] / n
+        payout_var = np.maximum(tallies['payout_sq_sum'] / n - mean_payout ** 2, 0) * n / np.maximum(n - 1, 1)
+        
+        def rate_half_width(count):
+            p = (count + 1) / (n + 2)
+            return z * np.sqrt(p * (1 - p) / n) * 100
         
-        return total_score
+        return {
+            'expected_roi_ci': z * np.sqrt(payout_var / n) / entry_fee * 100,
+            'cash_pct_ci': rate_half_width(tallies['cashes']),
+            'win_pct_ci': rate_half_width(tallies['wins'])
+        }
     
-    def _simulate_field(self, field_ownership: pd.DataFrame) -> np.ndarray:
-        """
-        Simulate scores for entire field
-        More owned players = more field entries have them
+    def _entry_fee(self):
+        """Entry fee the ROI statistics are measured against"""
+        return self.payout_structure['entry_fee']
+    
+    def _top10_cutoff(self) -> int:
+        """Last placement that counts as a top-10% finish"""
+        return int(self.contest_entries * 0.10)
+    
+    def _top01_cutoff(self) -> int:
+        """Last placement that counts as a top-0.1% (TOP_PERCENTILE) finish"""
+        return max(1, int(np.ceil(self.contest_entries * TOP_PERCENTILE)))
+    
+    def _field_chunk_size(self, n_iterations: int = None, resident_bytes: int = 0,
+                          extra_bytes: int = 0) -> int:
         """
+        Number of iterations per block that keeps the run inside memory_budget
         
-        # For now, simplified: generate random scores for field
-        # In production, would model field lineup construction based on ownership
+        A block holds its field scores (plus one gather temporary), its normal
+        inputs and its scenario rows. resident_bytes is what the run already
+        holds (scenario and placement matrices, field lineups); the rest of the
+        budget is what one block may use. Parallel runs limit how many blocks
+        are in flight instead, so block boundaries never depend on workers.
+        extra_bytes is any additional working memory per iteration.
         
-        field_scores = np.random.normal(
-            loc=135,  # Average field score
-            scale=15,  # Variance in field
-            size=self.contest_entries
-        )
+        When the resident matrices alone leave no room for a block, a warning
+        is printed and blocks are sized against the whole budget: shrinking
+        them further saves almost nothing and only multiplies per-block cost.
+        """
+        n_iterations = n_iterations or self.iterations
+        bytes_per_iteration = self._bytes_per_iteration() + extra_bytes
+        available = self.memory_budget - resident_bytes
+        if available < bytes_per_iteration:
+            print(f"Warning: simulation matrices need {resident_bytes / 1e6:,.0f} MB, over the "
+                  f"{self.memory_budget / 1e6:,.0f} MB memory budget; raise memory_budget "
+                  f"or simulate fewer lineups or iterations")
+            available = self.memory_budget
         
-        return field_scores
+        return max(1, min(n_iterations, available // bytes_per_iteration))
     
-    def _calculate_placement(self, lineup_score: float, field_scores: np.ndarray) -> int:
-        """
-        Calculate lineup's placement in field
-        Returns placement (1 = first place)
+    def _bytes_per_iteration(self) -> int:
+        """Working memory of one simulated iteration inside a block"""
+        n_players = 0 if self.player_index is None else len(self.player_index)
+        if self.field_sketch_bins and self.field_lineups is None:
+            field = 2 * len(self._sketch_places())  # Sampled straight into the sketch
+        else:
+            field = 2 * self.contest_entries
+        return self.dtype.itemsize * (field + 3 * n_players)
+    
+    def _sketch_places(self) -> np.ndarray:
         """
-        # Count how many field entries scored higher
-        better_scores = np.sum(field_scores > lineup_score)
-        placement = better_scores + 1
+        Field places kept by the quantile sketch, in descending order (last = 1st place)
         
-        return placement
+        Evenly spaced places plus the last place of every payout band and the
+        top-10% / top-0.1% cutoffs, so payouts, cash% and win% come out exact
+        and only the placement within a band is interpolated.
+        """
+        entries = self.contest_entries
+        band_ends = np.flatnonzero(np.diff(self.payout_table) != 0) + 1
+        places = np.concatenate([
+            np.linspace(1, entries, max(2, self.field_sketch_bins)).round(),
+            band_ends, [1, entries, self._top10_cutoff(), self._top01_cutoff()]
+        ])
+        places = np.unique(np.clip(places, 1, entries).astype(np.int64))
+        return places[::-1]
     
-    def _get_payout(self, placement: int) -> float:
-        """Get payout amount for placement"""
+    def _iteration_blocks(self, n_iterations: int, seed_sequence: np.random.SeedSequence,
+                          resident_bytes: int = 0, extra_bytes: int = 0) -> List[Tuple]:
+        """
+        Split iterations into fixed-size blocks, each with its own RNG stream
         
-        payouts = self.payout_structure.get('payouts', {})
+        Block boundaries depend only on the iteration count and memory settings,
+        never on the worker count, so a seeded run is reproducible anywhere.
         
-        # Check if this placement gets paid
-        if placement in payouts:
-            return payouts[placement]
+        Returns:
+            List of (start, stop, SeedSequence) tuples
+        """
+        block_size = max(1, min(SIMULATION_BLOCK_ITERATIONS, self._field_chunk_size(n_iterations, resident_bytes, extra_bytes)))
+        if self.sampling == 'antithetic' and block_size > 1:
+            block_size -= block_size % 2  # Keep antithetic pairs inside one block
+        starts = list(range(0, n_iterations, block_size))
+        seeds = seed_sequence.spawn(len(starts))
         
-        # Check if in paying range (flat payout)
-        places_paid = self.payout_structure.get('places_paid', 0)
-        if placement <= places_paid:
-            # Calculate proportional payout (simplified)
-            # In production, would use exact payout structure
-            entry_fee = self.payout_structure['entry_fee']
-            return entry_fee * 1.5  # Rough estimate
+        return [
+            (start, min(start + block_size, n_iterations), block_seed)
+            for start, block_seed in zip(starts, seeds)
+        ]
+    
+    def _lineup_payouts(self, placements: np.ndarray, columns: np.ndarray = None) -> np.ndarray:
+        """
+        Payouts for (iterations x lineups) placements of the last run's lineups,
+        split with each lineup's expected field copies when duplication is on
         
-        return 0
+        columns picks which of the run's lineups the placement columns belong
+        to (None = all of them, in order).
+        """
+        if self.expected_duplicates is None:
+            return _lookup_payouts(self.payout_table, placements)
+        duplicates = self.expected_duplicates if columns is None else self.expected_duplicates[columns]
+        payout_cumsum = np.concatenate([[0.0], np.cumsum(self.payout_table)])
+        return _split_payouts(payout_cumsum, placements, duplicates)
     
-    def batch_simulate(self, lineups: List[Dict], field_ownership: pd.DataFrame) -> pd.DataFrame:
+    def batch_simulate(self, lineups: List[Dict], field_ownership: pd.DataFrame,
+                       shared_scenarios: bool = True, precision: Dict = None,
+                       time_budget: float = None, max_iterations: int = None,
+                       importance_sampling: bool = False, prescreen: int = None,
+                       top_n: int = None) -> pd.DataFrame:
         """
         Simulate multiple lineups and return results
         
+        With shared_scenarios (default) one player-outcome matrix and one field per
+        iteration are sampled for the whole batch, so every lineup is scored against
+        the same outcomes. Otherwise each lineup is simulated independently.
+        
+        Passing precision and/or time_budget switches to adaptive mode: iterations
+        run block by block and each lineup stops as soon as its confidence
+        intervals are inside the requested half-widths.
+        
+        importance_sampling tilts each lineup's scenarios toward its upside and
+        re-weights them, for stable win% / top10% / top 0.1% estimates in large
+        GPPs where plain sampling almost never sees a first place.
+        
+        prescreen ranks the lineups with analytic_screen and only simulates the
+        best prescreen of them (by approximate ROI).
+        
+        top_n runs successive halving: iterations go to the contenders for the
+        top_n lineups by expected ROI instead of to every lineup equally.
+        
         Args:
             lineups: List of lineup dicts
             field_ownership: Field ownership distribution
+            shared_scenarios: Score all lineups against one shared scenario matrix
+            precision: Target CI half-widths, e.g. {'expected_roi': 5.0, 'cash_pct': 1.0,
+                       'win_pct': 0.05}; a number is read as the expected_roi target
+            time_budget: Wall-clock seconds for the adaptive run
+            max_iterations: Iteration cap for the adaptive run (default ADAPTIVE_MAX_ITERATIONS)
+            importance_sampling: Estimate tail probabilities with importance sampling
+            prescreen: Number of analytic-screen survivors to simulate (None = all)
+            top_n: Number of best lineups to race for with successive halving
             
         Returns:
-            DataFrame with simulation results for each lineup
+            DataFrame with simulation results (and +/- confidence intervals) for each lineup
         """
         
-        results = []
-        
-        for i, lineup in enumerate(lineups):
-            # Progress indicator
-            progress = (i + 1) / len(lineups) * 100
-            print(f"Simulating lineup {i+1}/{len(lineups)} ({progress:.0f}%)...", end='\r')
+        if prescreen and len(lineups) > prescreen:
+            screen = self.analytic_screen(lineups, field_ownership)
+            survivors = np.sort(screen['expected_roi'].to_numpy().argsort()[::-1][:prescreen])
+            print(f"Analytic pre-screen kept {len(survivors)}/{len(lineups)} lineups")
             
-            sim_result = self.simulate_lineup(lineup, field_ownership)
+            df = self.batch_simulate([lineups[i] for i in survivors], field_ownership, shared_scenarios,
+                                     precision, time_budget, max_iterations, importance_sampling,
+                                     top_n=top_n)
+            df['lineup_id'] = survivors + 1
+            df['analytic_roi'] = screen['expected_roi'].to_numpy()[survivors]
+            return df
+        
+        if top_n and 0 < top_n < len(lineups):
+            print(f"Racing {len(lineups)} lineups for the top {top_n}...")
+            sim_results = self._simulate_halving(lineups, field_ownership, top_n,
+                                                 max_iterations=max_iterations)
+        elif importance_sampling and lineups:
+            print(f"Simulating {len(lineups)} lineups with importance sampling...")
+            sim_results = self._simulate_importance(lineups, field_ownership)
+        elif (precision is not None or time_budget is not None) and lineups:
+            print(f"Simulating {len(lineups)} lineups adaptively...")
+            sim_results = self._simulate_adaptive(lineups, field_ownership, precision,
+                                                  time_budget, max_iterations)
+        elif shared_scenarios and lineups:
+            print(f"Simulating {len(lineups)} lineups against shared scenarios...")
+            sim_results = self._simulate_shared(lineups, field_ownership)
+        else:
+            sim_results = []
+            for i, lineup in enumerate(lineups):
+                # Progress indicator
+                progress = (i + 1) / len(lineups) * 100
+                print(f"Simulating lineup {i+1}/{len(lineups)} ({progress:.0f}%)...", end='\r')
+                
+                sim_results.append(self.simulate_lineup(lineup, field_ownership))
             
+            print()  # New line after progress
+        
+        return self._results_frame(lineups, sim_results)
+    
+    def _results_frame(self, lineups: List[Dict], sim_results: List[Dict]) -> pd.DataFrame:
+        """One row per lineup: lineup info plus its simulation results"""
+        results = []
+        
+        for i, (lineup, sim_result) in enumerate(zip(lineups, sim_results)):
             # Combine lineup info with simulation results
             result = {
                 'lineup_id': i + 1,
-                'salary': lineup['salary'],
-                'projection': lineup['projection'],
-                'ownership': lineup['ownership'],
+                'salary': lineup.get('salary', lineup.get('total_salary')),
+                'projection': lineup.get('projection', lineup.get('total_projection')),
+                'ownership': lineup.get('ownership', lineup.get('total_ownership')),
                 'win_pct': sim_result['win_pct'],
                 'top10_pct': sim_result['top10_pct'],
+                'top01_pct': sim_result.get('top01_pct', 0.0),
                 'cash_pct': sim_result['cash_pct'],
                 'expected_roi': sim_result['expected_roi'],
                 'expected_winnings': sim_result['expected_winnings'],
                 'avg_placement': sim_result['avg_placement'],
+                'expected_duplicates': sim_result.get('expected_duplicates', 0.0),
+                'iterations': sim_result.get('iterations', self.iterations),
+                'ess_gain': sim_result.get('ess_gain', 1.0),
+                'expected_roi_ci': sim_result.get('expected_roi_ci', np.nan),
+                'cash_pct_ci': sim_result.get('cash_pct_ci', np.nan),
+                'win_pct_ci': sim_result.get('win_pct_ci', np.nan),
+                'race_round': sim_result.get('race_round', 0),
                 'players': ', '.join([p['Name'] for p in lineup['players']])
             }
             
             results.append(result)
         
-        print()  # New line after progress
-        
         df = pd.DataFrame(results)
         
         # Ensure all expected columns exist
@@ -249,79 +438,1886 @@ class MonteCarloSimulator:
             df['cash_pct'] = 0.0
             
         return df
-
-
-def create_payout_structure(contest_type: str, entry_fee: float) -> Dict:
-    """
-    Create payout structure for contest
     
-    Args:
-        contest_type: 'small_gpp', 'mid_gpp', 'milly_maker'
-        entry_fee: Entry fee in dollars
+    def analytic_screen(self, lineups: List[Dict], field_ownership: pd.DataFrame) -> pd.DataFrame:
+        """
+        Closed-form approximate win% / cash% / ROI for many lineups (pre-screen)
         
-    Returns:
-        Payout structure dict
-    """
-    from config import CONTEST_STRUCTURES
-    
-    rules = CONTEST_STRUCTURES[contest_type]
-    entries = rules['entries']
-    total_pool = entries * entry_fee
+        The lineup score L and the field are both linear in the factor model's
+        normal inputs z. Each field entry is split into a common part, the
+        ownership-weighted average lineup m(z), and a roster part with spread
+        tau across entries (from the field's exposure covariance). So
+        
+            D = L - m ~ N(mu_D, sigma_D^2) across slates
+            share of the field beating L = Phi(-D / tau)
+            P(place <= p) = P(D > tau * Phi^-1(1 - p / entries))
+        
+        Expected payout telescopes over the payout ladder's band ends:
+        sum_k (payout_k - payout_k+1) * P(place <= last place of band k).
+        Field moments come from an ANALYTIC_FIELD_SAMPLE-entry ownership field
+        (N(135, 15) when ownership data is missing); clipping at zero and score
+        skew are ignored, so use it for ranking, then simulate the survivors.
+        
+        Returns:
+            DataFrame with approximate results for each lineup
+        """
+        players = self._build_player_index(lineups, field_ownership)
+        model = GameFactorModel(players, None if self.correlated else {})
+        means = model.expected_scores()
+        loadings = model.loading_matrix()
+        covariance = loadings @ loadings.T
+        
+        column = {name: i for i, name in enumerate(players['Name'])}
+        ids = np.array([[column[p['Name']] for p in lineup['players']] for lineup in lineups])
+        
+        # Field: average-lineup exposure e and roster spread tau
+        field = None
+        if isinstance(field_ownership, pd.DataFrame) and FieldGenerator.can_build(players):
+            n_sample = min(self.contest_entries, ANALYTIC_FIELD_SAMPLE)
+            field = FieldGenerator(players).generate(n_sample, np.random.default_rng(self.seed_sequence.spawn(1)[0]))
+        
+        if field is None:
+            exposure = np.zeros(len(players))
+            field_mean, tau = 135.0, 15.0
+        else:
+            field = field.astype(np.int64)
+            exposure = np.bincount(field.ravel(), minlength=len(players)) / len(field)
+            pairs = np.zeros((len(players), len(players)))
+            np.add.at(pairs, (np.repeat(field, field.shape[1], axis=1), np.tile(field, field.shape[1])), 1.0)
+            roster_covariance = pairs / len(field) - np.outer(exposure, exposure)
+            field_mean = exposure @ means
+            tau = np.sqrt(max(np.sum(roster_covariance * (covariance + np.outer(means, means))), 1e-9))
+        
+        # mu_D and sigma_D^2 = (x - e) Cov (x - e) for every lineup's incidence x
+        cov_exposure = covariance @ exposure
+        mu_d = means[ids].sum(axis=1) - field_mean
+        var_d = (covariance[ids[:, :, None], ids[:, None, :]].sum(axis=(1, 2))
+                 - 2 * cov_exposure[ids].sum(axis=1) + exposure @ cov_exposure)
+        sigma_d = np.sqrt(np.maximum(var_d, 1e-9))
+        
+        entries = self.contest_entries
+        
+        def top_probability(place):
+            threshold = tau * ndtri(np.clip(1 - place / entries, 1e-12, 1 - 1e-12))
+            return ndtr((mu_d - threshold) / sigma_d)
+        
+        band_ends = np.flatnonzero(np.diff(self.payout_table) != 0) + 1
+        expected_winnings = np.zeros(len(lineups))
+        for place in band_ends:
+            expected_winnings += (self.payout_table[place - 1] - self.payout_table[place]) * top_probability(place)
+        
+        entry_fee = self.payout_structure['entry_fee']
+        
+        return pd.DataFrame({
+            'lineup_id': np.arange(1, len(lineups) + 1),
+            'salary': [lineup.get('salary', lineup.get('total_salary')) for lineup in lineups],
+            'projection': [lineup.get('projection', lineup.get('total_projection')) for lineup in lineups],
+            'ownership': [lineup.get('ownership', lineup.get('total_ownership')) for lineup in lineups],
+            'win_pct': top_probability(1) * 100,
+            'top10_pct': top_probability(self._top10_cutoff()) * 100,
+            'top01_pct': top_probability(self._top01_cutoff()) * 100,
+            'cash_pct': top_probability(len(self.payout_table) - 1) * 100,
+            'expected_winnings': expected_winnings,
+            'expected_roi': (expected_winnings - entry_fee) / entry_fee * 100,
+            'avg_placement': 1 + entries * ndtr(-mu_d / np.sqrt(tau ** 2 + var_d)),
+            'score_mean': mu_d + field_mean,
+            'score_std': np.sqrt(np.maximum(covariance[ids[:, :, None], ids[:, None, :]].sum(axis=(1, 2)), 0))
+        })
     
-    if contest_type == 'small_gpp':
-        # 4,444 entries, 25% to 1st
-        first_place = total_pool * 0.25
-        
-        # Simplified payout structure
-        payouts = {
-            1: first_place,
-            2: total_pool * 0.10,
-            3: total_pool * 0.06,
-            4: total_pool * 0.04,
-            5: total_pool * 0.03
-            # Continue with declining payouts...
-        }
+    def simulate_portfolio(self, lineups: List[Dict], field_ownership: pd.DataFrame) -> Dict:
+        """
+        Simulate all our lineups entered together in one contest
+        
+        Every iteration places the whole portfolio into the same field in one
+        vectorized pass, so our lineups compete with each other. Scores are
+        rounded to 0.01 like DraftKings scoring, and tied entries (ours or the
+        field's) split the combined payout of the places they occupy. The field
+        stays contest_entries opponents, as in batch_simulate.
+        
+        Profit per simulated contest = total winnings - total entry fees.
+        Drawdown is measured over seasons of PORTFOLIO_SEASON_CONTESTS
+        consecutive simulated contests.
+        
+        Returns:
+            Dict with portfolio ROI, profit variance / percentiles, drawdown and
+            a per-lineup results DataFrame ('lineups'); self_competition_cost is
+            the expected winnings lost to our own entries
+        """
+        run = self._prepare_run(lineups, field_ownership, use_bank=True)
+        run['portfolio'] = True
+        self.expected_duplicates = run['duplicates'] = None  # Real ties with the field are split instead
+        run['portfolio_payouts'] = np.zeros(self.iterations)
+        
+        # Ties need a float64 copy of the rounded field
+        blocks = self._iteration_blocks(self.iterations, run.pop('seed_sequence'), _resident_bytes(run),
+                                        extra_bytes=8 * self.contest_entries)
+        
+        print(f"Simulating a {len(lineups)}-entry portfolio...")
+        block_tallies = self._run_blocks(run, blocks)
+        
+        self._save_to_bank(run)
+        self.scenarios = run['scenarios']
+        self.placements = run['placements']
+        
+        tallies = _merge_tallies(block_tallies)
+        stats = self._statistics_from_tallies(tallies, self.placements)
+        per_lineup = [{key: values[i] for key, values in stats.items()} for i in range(len(lineups))]
+        
+        entry_fee = self.payout_structure['entry_fee']
+        total_fees = len(lineups) * entry_fee
+        winnings = run['portfolio_payouts']
+        profit = winnings - total_fees
+        self.portfolio_profit = profit
+        
+        # Max drawdown of cumulative profit within each simulated season
+        n_seasons = max(1, len(profit) // PORTFOLIO_SEASON_CONTESTS)
+        seasons = profit[:n_seasons * PORTFOLIO_SEASON_CONTESTS].reshape(n_seasons, -1)
+        cumulative = np.concatenate([np.zeros((n_seasons, 1)), np.cumsum(seasons, axis=1)], axis=1)
+        drawdowns = np.max(np.maximum.accumulate(cumulative, axis=1) - cumulative, axis=1)
         
         return {
-            'entry_fee': entry_fee,
-            'places_paid': int(entries * 0.20),  # Top 20% cash
-            'payouts': payouts,
-            'total_pool': total_pool
+            'lineups': self._results_frame(lineups, per_lineup),
+            'entries': len(lineups),
+            'total_fees': total_fees,
+            'expected_winnings': winnings.mean(),
+            'expected_profit': profit.mean(),
+            'expected_roi': profit.mean() / total_fees * 100,
+            'roi_std': profit.std(ddof=1) / total_fees * 100,
+            'profit_variance': profit.var(ddof=1),
+            'profit_std': profit.std(ddof=1),
+            'profit_p05': np.percentile(profit, 5),
+            'profit_p50': np.percentile(profit, 50),
+            'profit_p95': np.percentile(profit, 95),
+            'prob_profit': np.mean(profit > 0) * 100,
+            'expected_max_drawdown': drawdowns.mean(),
+            'max_drawdown_p95': np.percentile(drawdowns, 95),
+            'self_competition_cost': (tallies['solo_payout_sum'].sum() - winnings.sum()) / len(profit)
         }
     
-    elif contest_type == 'mid_gpp':
-        # 14k entries, 10% payout
-        # Very flat structure (why ROI is negative)
+    def select_portfolio(self, lineups: List[Dict], field_ownership: pd.DataFrame,
+                         n_select: int) -> pd.DataFrame:
+        """
+        Greedily pick n_select lineups that maximize portfolio expected payout
         
-        places_paid = int(entries * 0.10)
-        avg_payout = (total_pool * 0.90) / places_paid  # 90% to field, 10% rake
+        All candidates are simulated once against shared scenarios. A portfolio
+        is worth, in each iteration, the summed payout of all its lineups, and
+        our own entries compete with each other: a candidate placed behind k
+        picks takes place + k, and every pick it outscores drops one place. Each
+        pick is the candidate with the largest expected gain in summed payout
+        net of that displacement. Per-iteration pick placements and the payout
+        each pick would lose by dropping a place are kept sorted, so a step
+        costs one row-wise searchsorted over the candidates; candidates are
+        scanned in solo-payout order and the scan stops once no remaining
+        candidate's solo payout (an upper bound on its gain) can win.
+        
+        Args:
+            lineups: Candidate lineups (M)
+            field_ownership: Field ownership distribution
+            n_select: Number of lineups to pick (N)
+            
+        Returns:
+            DataFrame of picked lineups in pick order, with their simulation
+            results, marginal_payout and the running summed portfolio_payout
+        """
+        sim_results = self._simulate_shared(lineups, field_ownership)
+        placements = self.placements
+        copies = self.expected_duplicates
+        payout_cumsum = np.concatenate([[0.0], np.cumsum(self.payout_table)])
         
-        payouts = {i: avg_payout * 1.2 for i in range(1, 11)}  # Top 10 get slight boost
+        def payouts_at(places, cols):
+            if copies is None:
+                return _lookup_payouts(self.payout_table, places)
+            return _split_payouts(payout_cumsum, places, copies[cols])
         
-        return {
-            'entry_fee': entry_fee,
-            'places_paid': places_paid,
-            'payouts': payouts,
-            'total_pool': total_pool
-        }
+        solo_payouts = self._lineup_payouts(placements).mean(axis=0)
+        order = np.argsort(-solo_payouts, kind='stable')
+        chunk = 256
+        
+        n_iterations = len(placements)
+        held = np.empty((n_iterations, 0), dtype=placements.dtype)
+        loss_after = np.zeros((n_iterations, 1))
+        total = np.zeros(n_iterations)
+        available = np.ones(len(lineups), dtype=bool)
+        
+        picks, gains, totals = [], [], []
+        for _ in range(min(n_select, len(lineups))):
+            # held: picks' field placements ascending per row (ties in pick order);
+            # loss_after[:, j]: payout lost by held[:, j:] when each drops one place
+            pick, pick_gain = -1, -np.inf
+            for start in range(0, len(order), chunk):
+                if pick >= 0 and pick_gain >= solo_payouts[order[start]]:
+                    break
+                cols = order[start:start + chunk]
+                cols = cols[available[cols]]
+                if not len(cols):
+                    continue
+                
+                field_places = placements[:, cols]
+                if held.shape[1]:
+                    ahead = _searchsorted_rows(held, field_places, side='right')
+                else:
+                    ahead = np.zeros(field_places.shape, dtype=np.int64)
+                gain = (payouts_at(field_places + ahead, cols)
+                        - np.take_along_axis(loss_after, ahead, axis=1)).mean(axis=0)
+                
+                best = int(np.argmax(gain))
+                if gain[best] > pick_gain:
+                    pick, pick_gain = int(cols[best]), float(gain[best])
+            
+            available[pick] = False
+            picks.append(pick)
+            
+            picked = np.array(picks)
+            pick_places = placements[:, picked]
+            sort = np.argsort(pick_places, axis=1, kind='stable')
+            held = np.take_along_axis(pick_places, sort, axis=1)
+            portfolio_places = pick_places + np.argsort(sort, axis=1)
+            
+            current = payouts_at(portfolio_places, picked)
+            drops = np.take_along_axis(current - payouts_at(portfolio_places + 1, picked), sort, axis=1)
+            loss_after = np.zeros((n_iterations, len(picks) + 1))
+            loss_after[:, :-1] = np.cumsum(drops[:, ::-1], axis=1)[:, ::-1]
+            
+            previous = total.mean()
+            total = current.sum(axis=1)
+            gains.append(float(total.mean() - previous))
+            totals.append(float(total.mean()))
+        
+        print(f"Picked {len(picks)}/{len(lineups)} lineups | portfolio payout "
+              f"${totals[-1]:,.2f} per contest | cash in {np.mean(total > 0) * 100:.1f}% of contests")
+        
+        df = self._results_frame([lineups[i] for i in picks], [sim_results[i] for i in picks])
+        df['lineup_id'] = np.array(picks) + 1
+        df['pick'] = np.arange(1, len(picks) + 1)
+        df['marginal_payout'] = gains
+        df['portfolio_payout'] = totals
+        
+        return df
     
-    elif contest_type == 'milly_maker':
-        # 150k entries, $1M to first
+    def update_projections(self, changes: Dict[str, float]) -> pd.DataFrame:
+        """
+        Refresh the last shared batch_simulate run after a few projections change
         
-        payouts = {
-            1: 1000000,
-            2: 250000,
-            3: 150000,
-            4: 100000,
-            5: 75000
-            # Continue with declining payouts...
+        A player's scenario column depends only on its game / team factors
+        (outcome_model.factor_index) and its own noise. The run kept its factor
+        draws, so each changed player's column is resampled from those factors
+        with fresh player noise. Only lineups and field entries that roster a
+        changed player are rescored. Their old field scores are swapped for the
+        new ones in each iteration's sorted field, then every lineup is re-placed.
+        Falls back to a full re-simulation when the run kept no cache (memory
+        budget, banked scenarios without factors) or a sketched field would
+        need patching.
+        
+        Args:
+            changes: New Projection by player Name, e.g. {'Travis Etienne': 12.5}
+            
+        Returns:
+            DataFrame with refreshed simulation results (as batch_simulate)
+        """
+        cache = self.last_run
+        if cache is None:
+            print("No shared simulation to update; run batch_simulate first")
+            return pd.DataFrame()
+        
+        column = {name: i for i, name in enumerate(self.player_index['Name'])}
+        unknown = [name for name in changes if name not in column]
+        if unknown:
+            print(f"Not in the simulated slate, skipped: {', '.join(unknown)}")
+        changes = {name: float(value) for name, value in changes.items() if name in column}
+        lineups = _with_projections(cache['lineups'], changes)
+        
+        columns = np.array([column[name] for name in changes], dtype=np.int64)
+        entries = np.array([], dtype=np.int64)
+        if self.field_lineups is not None:
+            entries = np.flatnonzero(np.isin(self.field_lineups, columns).any(axis=1))
+        
+        if (cache['factors'] is None or np.isnan(cache['factors']).any()
+                or (len(entries) and cache['sketch_places'] is not None)):
+            print("No reusable scenarios for an incremental update; re-simulating")
+            field_ownership = cache['field_ownership']
+            if isinstance(field_ownership, pd.DataFrame) and 'Name' in field_ownership.columns:
+                field_ownership = field_ownership.copy()
+                changed = field_ownership['Name'].isin(list(changes))
+                field_ownership.loc[changed, 'Projection'] = field_ownership.loc[changed, 'Name'].map(changes)
+            return self.batch_simulate(lineups, field_ownership)
+        
+        model = self.outcome_model
+        scenarios = self.scenarios
+        field_sorted = cache['field_sorted']
+        old_field = FieldGenerator.score(self.field_lineups[entries], scenarios) if len(entries) else None
+        
+        # Resample the changed columns from the kept factor draws and fresh noise
+        self.player_index.loc[columns, 'Projection'] = list(changes.values())
+        model.means = model.means.copy()
+        model.means[columns] = list(changes.values())
+        
+        rng = np.random.default_rng(self.seed_sequence.spawn(1)[0])
+        z = rng.standard_normal((len(scenarios), len(columns))) * model.noise_weight[columns]
+        for k in range(model.factor_index.shape[1]):
+            z += cache['factors'][:, model.factor_index[columns, k]] * model.factor_weight[columns, k]
+        scenarios[:, columns] = np.maximum(0, model.means[columns] + model.stddevs[columns] * z)
+        
+        # Rescore only the lineups and field entries that contain them
+        incidence = cache['incidence']
+        rescored = np.flatnonzero(incidence[:, columns].any(axis=1))
+        cache['lineup_scores'][:, rescored] = scenarios @ incidence[rescored].T
+        if len(entries):
+            _replace_sorted_values(field_sorted, old_field, FieldGenerator.score(self.field_lineups[entries], scenarios))
+        
+        print(f"Updated {len(columns)} players: rescored {len(rescored)}/{len(lineups)} lineups "
+              f"and {len(entries):,}/{self.contest_entries:,} field entries")
+        
+        run = {'sketch_places': cache['sketch_places']}
+        self.placements = _place_in_field(run, cache['lineup_scores'], field_sorted).astype(np.int32)
+        cache['lineups'] = lineups
+        
+        tallies = _payout_tallies(self.placements, self._lineup_payouts(self.placements), self._top10_cutoff(),
+                                  self._top01_cutoff())
+        stats = self._statistics_from_tallies(tallies, self.placements)
+        
+        return self._results_frame(lineups, [
+            {key: values[i] for key, values in stats.items()}
+            for i in range(len(lineups))
+        ])
+    
+    def projection_sensitivity(self, lineups: List[Dict], field_ownership: pd.DataFrame,
+                               players: List[str] = None, shift: float = 2.0) -> pd.DataFrame:
+        """
+        ROI gradient of every lineup with respect to each player's projection
+        
+        Runs one shared simulation, then for each player shifts that player's
+        scenario column by +/- shift points on the same draws (common random
+        numbers) and re-places all lineups. Lineups and field entries that
+        roster the player move by the same per-iteration amount; everything
+        else is reused, so no perturbation resamples or rescores the slate.
+        Cells already clipped at zero stay at zero.
+        
+        Args:
+            lineups: List of lineup dicts
+            field_ownership: Field ownership distribution
+            players: Player names to perturb (default: everyone in our lineups)
+            shift: Projection change in fantasy points
+            
+        Returns:
+            DataFrame with lineup_id, expected_roi and one column per player
+            holding the central-difference ROI change (% per projection point)
+        """
+        sim_results = self._simulate_shared(lineups, field_ownership)
+        cache = self.last_run
+        if cache is None or cache['field_sorted'] is None:
+            print("Sensitivity needs the run's cached field scores; raise memory_budget")
+            return pd.DataFrame()
+        if self.field_lineups is not None and cache['sketch_places'] is not None:
+            print("Sensitivity needs the exact field (field_sketch_bins=None)")
+            return pd.DataFrame()
+        
+        if players is None:
+            players = list(dict.fromkeys(p['Name'] for lineup in lineups for p in lineup['players']))
+        column = {name: i for i, name in enumerate(self.player_index['Name'])}
+        players = [name for name in players if name in column]
+        
+        incidence = cache['incidence']
+        lineup_scores = cache['lineup_scores']
+        field_sorted = cache['field_sorted']
+        base_above = self.placements.astype(np.int64) - 1  # Field entries that beat each lineup
+        entry_fee = self._entry_fee()
+        run = {'sketch_places': cache['sketch_places']}
+        
+        print(f"Perturbing {len(players)} projections by +/-{shift:g} points on shared scenarios...")
+        gradients = np.zeros((len(lineups), len(players)))
+        
+        for j, name in enumerate(players):
+            p = column[name]
+            old = self.scenarios[:, p]
+            rostered = np.flatnonzero(incidence[:, p])
+            entries = np.array([], dtype=np.int64)
+            if self.field_lineups is not None:
+                entries = np.flatnonzero((self.field_lineups == p).any(axis=1))
+            if len(entries):
+                # The player's field entries, and how many of them beat each lineup now
+                old_field = np.sort(FieldGenerator.score(self.field_lineups[entries], self.scenarios), axis=1)
+                base_count = len(entries) - _searchsorted_rows(old_field, lineup_scores, side='right')
+            
+            roi = []
+            for sign in (1, -1):
+                delta = np.where(old > 0, np.maximum(old + sign * shift, 0), 0) - old
+                scores = lineup_scores[:, rostered] + delta[:, None]
+                placed = _place_in_field(run, scores, field_sorted) - 1
+                
+                if len(entries):
+                    # The player's entries move by delta too. Other lineups meet them at
+                    # score - delta; rostered lineups keep their order against them, so
+                    # their unshifted entry scores are swapped out of the full-field count
+                    queries = lineup_scores - delta[:, None]
+                    queries[:, rostered] = scores
+                    counts = len(entries) - _searchsorted_rows(old_field, queries, side='right')
+                    above = base_above - base_count + counts
+                    above[:, rostered] = placed - counts[:, rostered] + base_count[:, rostered]
+                else:
+                    above = base_above.copy()
+                    above[:, rostered] = placed
+                
+                payouts = self._lineup_payouts(above + 1)
+                roi.append((payouts.mean(axis=0) - entry_fee) / entry_fee * 100)
+            
+            gradients[:, j] = (roi[0] - roi[1]) / (2 * shift)
+        
+        df = pd.DataFrame(gradients, columns=players)
+        df.insert(0, 'lineup_id', np.arange(1, len(lineups) + 1))
+        df.insert(1, 'expected_roi', [result['expected_roi'] for result in sim_results])
+        
+        return df
+    
+    def _simulate_shared(self, lineups: List[Dict], field_ownership: pd.DataFrame,
+                         parallel: bool = True, use_bank: bool = True) -> List[Dict]:
+        """
+        Score every lineup against one shared scenario matrix and one field per iteration
+        
+        Iterations run in blocks, split across a process pool when the run is
+        large enough (see _run_blocks) and parallel is set.
+        Each block's per-lineup tallies are merged exactly in block order.
+        With use_bank, outcomes and sorted field scores are read from / saved to
+        the scenario bank, so re-running a slate skips sampling, field scoring
+        and sorting.
+        
+        Returns:
+            List of per-lineup result dicts (same keys as simulate_lineup)
+        """
+        run = self._prepare_run(lineups, field_ownership, use_bank=use_bank)
+        
+        # Keep factor draws, sorted fields and lineup scores for update_projections
+        # when they fit in half the memory budget next to the run
+        field_width = self.contest_entries if run['sketch_places'] is None else len(run['sketch_places'])
+        cache_bytes = self.iterations * self.dtype.itemsize * (self.outcome_model.n_factors + field_width + len(lineups))
+        if _resident_bytes(run) + cache_bytes <= self.memory_budget // 2:
+            run['factors'] = np.full((self.iterations, self.outcome_model.n_factors), np.nan, dtype=self.dtype)
+            run['field_sorted'] = np.empty((self.iterations, field_width), dtype=self.dtype)
+            run['lineup_scores'] = np.empty((self.iterations, len(lineups)), dtype=self.dtype)
+        
+        blocks = self._iteration_blocks(self.iterations, run.pop('seed_sequence'), _resident_bytes(run))
+        
+        block_tallies = self._run_blocks(run, blocks, parallel)
+        
+        self._save_to_bank(run)
+        self.scenarios = run['scenarios']
+        self.placements = run['placements']
+        
+        tallies = _merge_tallies(block_tallies)
+        stats = self._statistics_from_tallies(tallies, self.placements)
+        self._apply_variance_reduction(stats, run['incidence'], blocks)
+        
+        self.last_run = {
+            'lineups': lineups,
+            'field_ownership': field_ownership,
+            'incidence': run['incidence'],
+            'sketch_places': run['sketch_places'],
+            'factors': run.get('factors'),
+            'field_sorted': run.get('field_sorted'),
+            'lineup_scores': run.get('lineup_scores')
         }
         
-        return {
-            'entry_fee': entry_fee,
-            'places_paid': int(entries * 0.20),
-            'payouts': payouts,
-            'total_pool': total_pool
+        return [
+            {key: values[i] for key, values in stats.items()}
+            for i in range(len(lineups))
+        ]
+    
+    def _simulate_adaptive(self, lineups: List[Dict], field_ownership: pd.DataFrame,
+                           precision, time_budget: float, max_iterations: int) -> List[Dict]:
+        """
+        Sequential simulation with per-lineup confidence-interval early stopping
+        
+        Lineups whose ROI / cash% / win% intervals meet the precision targets
+        (after at least ADAPTIVE_MIN_ITERATIONS) stop; the rest keep going until
+        the iteration cap or the time budget runs out.
+        """
+        if precision is not None and not isinstance(precision, dict):
+            precision = {'expected_roi': float(precision)}
+        precision = precision or {}
+        deadline = time.monotonic() + time_budget if time_budget else None
+        
+        def retire(stop, tallies, active):
+            if not precision or stop < ADAPTIVE_MIN_ITERATIONS:
+                return
+            columns = np.flatnonzero(active)
+            half_widths = self._confidence_half_widths(
+                {key: value[columns] for key, value in tallies.items()},
+                tallies['iterations'][columns]
+            )
+            converged = np.ones(len(columns), dtype=bool)
+            for metric, target in precision.items():
+                converged &= half_widths[f'{metric}_ci'] <= target
+            active[columns[converged]] = False
+        
+        return self._simulate_sequential(lineups, field_ownership, max_iterations or ADAPTIVE_MAX_ITERATIONS,
+                                         retire, deadline)
+    
+    def _simulate_halving(self, lineups: List[Dict], field_ownership: pd.DataFrame, top_n: int,
+                          initial_iterations: int = None, max_iterations: int = None) -> List[Dict]:
+        """
+        Successive halving: find the top_n lineups by expected ROI without
+        simulating every candidate to full precision
+        
+        Every lineup gets initial_iterations. At the end of each round the
+        bottom half by expected_roi is dropped (never leaving fewer than
+        top_n + 1 contenders), as is any lineup whose ROI interval lies wholly
+        below the top_n-th lineup's, and the survivors' iteration count
+        doubles. It stops once the top_n are statistically separated from the
+        rest (top_n-th lower CI bound above every challenger's upper bound) or
+        at max_iterations. Each result carries the round it reached.
+        
+        With top_n >= len(lineups) there is nothing to race: every lineup gets
+        the full shared simulation and race_round 0.
+        """
+        if top_n >= len(lineups):
+            results = self._simulate_shared(lineups, field_ownership)
+            for result in results:
+                result['race_round'] = 0
+            return results
+        
+        entry_fee = self.payout_structure['entry_fee']
+        rounds = np.zeros(len(lineups), dtype=int)
+        round_end = [initial_iterations or HALVING_INITIAL_ITERATIONS]
+        
+        def retire(stop, tallies, active):
+            if stop < round_end[0]:
+                return
+            round_end[0] *= 2
+            rounds[active] += 1
+            
+            columns = np.flatnonzero(active)
+            n = tallies['iterations'][columns]
+            roi = (tallies['payout_sum'][columns] / n - entry_fee) / entry_fee * 100
+            half_width = self._confidence_half_widths(
+                {key: value[columns] for key, value in tallies.items()}, n
+            )['expected_roi_ci']
+            
+            order = np.argsort(-roi)
+            if len(order) <= top_n:
+                # Only the top_n are left: every challenger was raced out below them
+                active[:] = False
+                return
+            
+            # Separated: the top_n's worst lower bound beats every challenger's upper bound
+            cutoff = roi[order[top_n - 1]] - half_width[order[top_n - 1]]
+            challengers = order[top_n:]
+            if cutoff > np.max(roi[challengers] + half_width[challengers]):
+                active[:] = False
+                return
+            
+            keep = max(int(np.ceil(len(order) / 2)), top_n + 1)
+            dropped = order[keep:]
+            raced_out = challengers[roi[challengers] + half_width[challengers] < cutoff]
+            active[columns[np.union1d(dropped, raced_out)]] = False
+        
+        results = self._simulate_sequential(lineups, field_ownership,
+                                            max_iterations or ADAPTIVE_MAX_ITERATIONS, retire)
+        for result, reached in zip(results, rounds):
+            result['race_round'] = int(reached)
+        
+        return results
+    
+    def _simulate_sequential(self, lineups: List[Dict], field_ownership: pd.DataFrame,
+                             max_iterations: int, retire, deadline: float = None) -> List[Dict]:
+        """
+        Run iteration blocks in order against shared scenarios, retiring lineups as it goes
+        
+        After each block retire(stop, tallies, active) may switch lineups off
+        in the boolean active array; retired lineups keep the tallies they have.
+        Runs until no lineup is active, the blocks run out or the deadline
+        passes. Each lineup's iterations are a prefix of the scenario matrix,
+        so results stay comparable. Placements are kept per block for the
+        lineups it simulated only, so retired lineups stop costing memory.
+        """
+        run = self._prepare_run(lineups, field_ownership, max_iterations, keep_placements=False)
+        blocks = self._iteration_blocks(max_iterations, run.pop('seed_sequence'), _resident_bytes(run),
+                                        len(lineups) * np.dtype(np.int32).itemsize)
+        
+        n_lineups = len(lineups)
+        active = np.ones(n_lineups, dtype=bool)
+        tallies = None
+        segments = []  # (columns, block placements) per simulated block
+        done = 0
+        
+        for start, stop, seed in blocks:
+            columns = np.flatnonzero(active)
+            run['columns'] = columns
+            block = _simulate_block(run, start, stop, seed)
+            segments.append((columns, run.pop('block_placements')))
+            done = stop
+            
+            if tallies is None:
+                tallies = {key: np.zeros(n_lineups, dtype=np.asarray(value).dtype) for key, value in block.items()}
+                tallies['iterations'] = np.zeros(n_lineups, dtype=np.int64)
+            for key, value in block.items():
+                tallies[key][columns] += value
+            
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            
+            retire(stop, tallies, active)
+            
+            print(f"   {stop:,} iterations | {active.sum()}/{n_lineups} lineups still running", end='\r')
+            
+            if not active.any():
+                break
+        
+        print()
+        
+        self.scenarios = run['scenarios'][:done]
+        self.placements = _placements_by_lineup(segments, n_lineups)
+        stats = self._statistics_from_tallies(tallies, self.placements)
+        self._apply_variance_reduction(stats, run['incidence'], blocks)
+        
+        return [
+            {key: values[i] for key, values in stats.items()}
+            for i in range(n_lineups)
+        ]
+    
+    def _apply_variance_reduction(self, stats: Dict[str, np.ndarray], incidence: np.ndarray,
+                                  blocks: List[Tuple]):
+        """
+        Apply the control variate and measure the effective-sample-size gain
+        
+        With control_variate, each metric's per-iteration values Y are replaced
+        by Y - beta * (X - E[X]), where X is the lineup's simulated score and
+        E[X] its exact mean from the projections; beta is the sample regression
+        slope. The estimator variance is then measured the way the sampling
+        method allows (pair means for antithetic, independent scrambles of
+        QMC_REPLICATE_POINTS rows for Sobol'/Halton) and compared with plain
+        Monte Carlo:
+        
+            ess_gain = (Var(Y) / n) / Var(estimator)
+        
+        so ess_gain = 4 means plain sampling would need 4x the iterations for
+        the same precision. Var(estimator) is taken at its one-sided upper
+        confidence bound for the degrees of freedom it was measured with, so a
+        lucky handful of replicates can't shrink the CI, and the gain is 1 (the
+        plain CI) below QMC_MIN_REPLICATES replicates or when no reduction is
+        shown. Means and CIs in stats are updated in place.
+        """
+        n_lineups = len(incidence)
+        stats['ess_gain'] = np.ones(n_lineups)
+        stats['effective_iterations'] = stats['iterations'].astype(float)
+        
+        if self.sampling == 'plain' and not self.control_variate:
+            return
+        
+        entry_fee = self.payout_structure['entry_fee']
+        placements = self.placements if isinstance(self.placements, list) else self.placements.T
+        
+        if self.control_variate:
+            expected_scores = incidence @ self.outcome_model.expected_scores()
+        
+        for i in range(n_lineups):
+            n = int(stats['iterations'][i])
+            if n < 2:
+                continue
+            
+            placement = placements[i][:n]
+            payouts = self._lineup_payouts(placement[:, None], [i])[:, 0]
+            metrics = [
+                ('expected_winnings', 'expected_roi_ci', payouts),
+                ('cash_pct', 'cash_pct_ci', (payouts > 0) * 100.0),
+                ('win_pct', 'win_pct_ci', (placement == 1) * 100.0)
+            ]
+            if self.control_variate:
+                x = self.scenarios[:n] @ incidence[i]
+                x_variance = x.var(ddof=1)
+            
+            for metric, ci_key, y in metrics:
+                plain_variance = y.var(ddof=1) / n
+                if plain_variance <= 0:
+                    continue
+                
+                if self.control_variate:
+                    beta = np.cov(x, y)[0, 1] / x_variance if x_variance > 0 else 0.0
+                    y = y - beta * (x - expected_scores[i])
+                    stats[metric][i] = y.mean()
+                
+                estimator_variance, dof = _estimator_variance(y, blocks, self.sampling)
+                if estimator_variance <= 0 or dof < QMC_MIN_REPLICATES - 1:
+                    continue
+                
+                upper_variance = estimator_variance * dof / chi2.ppf(1 - self.confidence, dof)
+                gain = max(1.0, plain_variance / upper_variance)
+                stats[ci_key][i] /= np.sqrt(gain)
+                if metric == 'expected_winnings':
+                    stats['ess_gain'][i] = gain
+                    stats['effective_iterations'][i] = n * gain
+        
+        stats['expected_roi'] = (stats['expected_winnings'] - entry_fee) / entry_fee * 100
+    
+    def _simulate_importance(self, lineups: List[Dict], field_ownership: pd.DataFrame) -> List[Dict]:
+        """
+        Importance-sampled tournament results for each lineup
+        
+        Each lineup gets its own mean shift theta on the normal inputs, pointing
+        along the gradient of (lineup score - average field score), i.e. toward
+        slates where this lineup's players boom and the chalk doesn't. Its size
+        closes the median gap between the lineup and the winning field score
+        seen in a plain pilot block (capped at IMPORTANCE_MAX_TILT).
+        
+        All lineups share one scenario matrix drawn from the equal mixture of
+        those shifts plus the untilted model: iteration rows cycle through the
+        components, so each block samples, builds and scores its field once and
+        places every lineup against it. Every row is re-weighted by the mixture
+        likelihood ratio (the balance heuristic over K components)
+        
+            w = 1 / mean_k exp(theta_k . z - |theta_k|^2 / 2)
+        
+        so every reported mean is unbiased for every lineup.
+        """
+        run = self._prepare_run(lineups, field_ownership)
+        pilot_seed, run_seed = run.pop('seed_sequence').spawn(2)
+        blocks = self._iteration_blocks(self.iterations, run_seed, _resident_bytes(run))
+        
+        model = run['model']
+        tilts = np.vstack([np.zeros((1, model.dimension)),
+                           self._importance_tilts(run, blocks[0][1] - blocks[0][0], pilot_seed)])
+        half_norms = np.square(tilts).sum(axis=1) / 2
+        
+        n_iterations = self.iterations
+        placements = run['placements']
+        log_weights = np.empty(n_iterations)
+        
+        for start, stop, seed in blocks:
+            rng = np.random.default_rng(seed)
+            normals = standard_normals(stop - start, model.dimension, rng, self.sampling, self.dtype)
+            normals += tilts[np.arange(start, stop) % len(tilts)].astype(self.dtype)
+            
+            # log mean_k exp(theta_k . z - |theta_k|^2 / 2), shifted by its row max for stability
+            log_ratios = normals.astype(float) @ tilts.T - half_norms
+            peak = log_ratios.max(axis=1)
+            log_weights[start:stop] = -(peak + np.log(np.exp(log_ratios - peak[:, None]).mean(axis=1)))
+            
+            scenarios = model.transform(normals)
+            del normals
+            lineup_scores = scenarios @ run['incidence'].T
+            field = _field_block(run, scenarios, rng)
+            placements[start:stop] = _place_in_field(run, lineup_scores, field)
+        
+        weights = np.exp(log_weights)[:, None]
+        self.scenarios = None  # Mixture-tilted scenarios are only meaningful with their weights
+        self.placements = placements
+        self.importance_weights = weights[:, 0]
+        
+        payouts = self._lineup_payouts(placements)
+        entry_fee = self.payout_structure['entry_fee']
+        z = NormalDist().inv_cdf(0.5 + self.confidence / 2)
+        
+        def weighted_mean(values):
+            return (weights * values).mean(axis=0)
+        
+        def half_width(values):
+            return z * (weights * values).std(axis=0, ddof=1) / np.sqrt(n_iterations)
+        
+        wins = (placements == 1) * 100.0
+        cashes = (payouts > 0) * 100.0
+        expected_winnings = weighted_mean(payouts)
+        
+        stats = {
+            'win_pct': weighted_mean(wins),
+            'top10_pct': weighted_mean((placements <= run['top10_cutoff']) * 100.0),
+            'top01_pct': weighted_mean((placements <= run['top01_cutoff']) * 100.0),
+            'cash_pct': weighted_mean(cashes),
+            'expected_winnings': expected_winnings,
+            'expected_roi': (expected_winnings - entry_fee) / entry_fee * 100,
+            'avg_placement': weighted_mean(placements),
+            'median_placement': np.array([
+                _weighted_median(placements[:, i], weights[:, 0]) for i in range(len(lineups))
+            ]),
+            'iterations': np.full(len(lineups), n_iterations),
+            'expected_roi_ci': half_width(payouts) / entry_fee * 100,
+            'cash_pct_ci': half_width(cashes),
+            'win_pct_ci': half_width(wins),
+            # Kish effective sample size of the likelihood-ratio weights
+            'effective_iterations': np.full(len(lineups), weights.sum() ** 2 / np.square(weights).sum())
         }
+        if self.expected_duplicates is not None:
+            stats['expected_duplicates'] = self.expected_duplicates
+        
+        return [
+            {key: values[i] for key, values in stats.items()}
+            for i in range(len(lineups))
+        ]
+    
+    def _importance_tilts(self, run: Dict, n_pilot: int, seed: np.random.SeedSequence) -> np.ndarray:
+        """
+        Mean shift of the normal inputs for each lineup (lineups x dimension)
+        
+        A plain pilot block measures how far each lineup's score sits below
+        the winning field score; the shift along the lineup's advantage
+        gradient is the distance that closes that gap to first order.
+        """
+        model = run['model']
+        rng = np.random.default_rng(seed)
+        scenarios = model.sample(n_pilot, rng)
+        
+        lineup_scores = scenarios @ run['incidence'].T
+        winning_scores = _field_block(run, scenarios, rng)[:, -1]
+        gaps = np.median(winning_scores[:, None] - lineup_scores, axis=0)
+        
+        if run['field_lineups'] is None:
+            field_exposure = np.zeros(model.n_players)
+        else:
+            field_exposure = np.bincount(run['field_lineups'].ravel().astype(np.int64),
+                                         minlength=model.n_players) / len(run['field_lineups'])
+        
+        thetas = np.zeros((len(lineup_scores.T), model.dimension))
+        for i, gap in enumerate(gaps):
+            gradient = model.score_gradient(run['incidence'][i] - field_exposure)
+            norm = np.linalg.norm(gradient)
+            if gap > 0 and norm > 0:
+                thetas[i] = gradient / norm * min(gap / norm, IMPORTANCE_MAX_TILT)
+        
+        return thetas
+    
+    def _prepare_run(self, lineups: List[Dict], field_ownership: pd.DataFrame,
+                     n_iterations: int = None, use_bank: bool = False,
+                     keep_placements: bool = True) -> Dict:
+        """
+        Build everything a block of iterations needs: player index, outcome model,
+        field lineups, incidence matrix and output buffers
+        
+        Without keep_placements no placements matrix is allocated and each
+        block leaves its placements in run['block_placements'] instead.
+        
+        With use_bank, banked iterations for this slate are attached for reading
+        (bank_rows of them) and, unless the bank already covers the run, a
+        staging entry is opened that blocks write their sorted field scores to.
+        """
+        n_iterations = n_iterations or self.iterations
+        field_seed, run_seed, duplicate_seed = self.seed_sequence.spawn(3)
+        self.last_run = None
+        
+        self.player_index = self._build_player_index(lineups, field_ownership)
+        self.outcome_model = GameFactorModel(self.player_index, None if self.correlated else {})
+        
+        # Only seeded runs are banked: seed=None must keep meaning fresh scenarios every run
+        banked = use_bank and self.scenario_bank and self.seed is not None
+        bank = self._open_bank(field_ownership, n_iterations) if banked else {}
+        if bank.get('field_lineups') is not None:
+            self.field_lineups = np.array(bank['field_lineups'])
+        else:
+            self.field_lineups = self._generate_field(field_ownership, np.random.default_rng(field_seed))
+        
+        self.expected_duplicates = self._expected_duplicates(lineups, np.random.default_rng(duplicate_seed))
+        
+        if bank.get('bank_write'):
+            field_width = self.contest_entries if not self.field_sketch_bins else len(self._sketch_places())
+            ScenarioBank.create(bank['bank_write'], 'field_scores', (n_iterations, field_width), self.dtype)
+        
+        return {
+            'model': self.outcome_model,
+            'incidence': self._lineup_incidence(lineups, self.player_index).astype(self.dtype),
+            'field_lineups': self.field_lineups,
+            'contest_entries': self.contest_entries,
+            'payout_table': self.payout_table,
+            'top10_cutoff': self._top10_cutoff(),
+            'top01_cutoff': self._top01_cutoff(),
+            'scenarios': np.empty((n_iterations, len(self.player_index)), dtype=self.dtype),
+            'placements': np.zeros((n_iterations, len(lineups)), dtype=np.int32) if keep_placements else None,
+            'columns': None,  # Lineup columns to simulate (None = all)
+            'sampling': self.sampling,
+            'dtype': self.dtype,
+            'sketch_places': self._sketch_places() if self.field_sketch_bins else None,
+            'duplicates': self.expected_duplicates,
+            'payout_cumsum': np.concatenate([[0.0], np.cumsum(self.payout_table)]),
+            'bank_key': bank.get('bank_key'),
+            'bank_rows': bank.get('bank_rows', 0),     # Leading iterations read from the bank
+            'bank_read': bank.get('bank_read'),        # Entry directory to read them from
+            'bank_write': bank.get('bank_write'),      # Staging directory for this run's arrays
+            'seed_sequence': run_seed
+        }
+    
+    def _expected_duplicates(self, lineups: List[Dict], rng: np.random.Generator) -> np.ndarray:
+        """Expected field copies of each lineup (None without duplication or an ownership-driven field)"""
+        if not self.duplication or self.field_lineups is None:
+            return None
+        
+        column = {name: i for i, name in enumerate(self.player_index['Name'])}
+        full = [i for i, lineup in enumerate(lineups) if len(lineup['players']) == ROSTER_SIZE]
+        ids = np.array([[column[p['Name']] for p in lineups[i]['players']] for i in full],
+                       dtype=np.int64).reshape(-1, ROSTER_SIZE)
+        
+        copies = np.zeros(len(lineups))
+        copies[full] = FieldGenerator(self.player_index).expected_copies(ids, self.contest_entries, rng)
+        return copies
+    
+    def _open_bank(self, field_ownership: pd.DataFrame, n_iterations: int) -> Dict:
+        """Look up this slate in the scenario bank (empty dict if the bank is unavailable)"""
+        settings = {
+            'loadings': CORRELATION_LOADINGS if self.correlated else {},
+            'sampling': self.sampling,
+            'dtype': self.dtype.str,
+            'contest_entries': self.contest_entries,
+            'field': isinstance(field_ownership, pd.DataFrame),
+            'salary_floor': FIELD_SALARY_FLOOR,
+            'sketch_places': self._sketch_places().tolist() if self.field_sketch_bins else None,
+            'seed': self.seed
+        }
+        
+        try:
+            key = ScenarioBank.key(self.player_index, settings)
+            rows = self.scenario_bank.rows(key)
+            bank = {
+                'bank_key': key,
+                'bank_rows': min(rows, n_iterations),
+                'bank_read': self.scenario_bank.path(key) if rows else None,
+                'field_lineups': self.scenario_bank.load(key, 'field_lineups') if rows else None
+            }
+            if rows < n_iterations:
+                bank['bank_write'] = self.scenario_bank.writer(key)
+            else:
+                print(f"   Reusing {n_iterations:,} banked scenarios")
+            return bank
+        
+        except OSError as e:
+            print(f"Scenario bank unavailable: {e}")
+            return {}
+    
+    def _save_to_bank(self, run: Dict):
+        """Write the run's outcomes and field into its staging entry and commit it"""
+        if not run.get('bank_write'):
+            return
+        
+        try:
+            np.save(os.path.join(run['bank_write'], 'scenarios.npy'), run['scenarios'])
+            if run.get('factors') is not None:
+                np.save(os.path.join(run['bank_write'], 'factors.npy'), run['factors'])
+            if run['field_lineups'] is not None:
+                np.save(os.path.join(run['bank_write'], 'field_lineups.npy'), run['field_lineups'])
+            self.scenario_bank.commit(run['bank_key'], run['bank_write'])
+        
+        except OSError as e:
+            print(f"Could not save scenarios to bank: {e}")
+    
+    def _run_blocks(self, run: Dict, blocks: List[Tuple], parallel: bool = True) -> List[Dict]:
+        """
+        Run iteration blocks in-process, or in the process pool when workers > 1
+        and the run scores at least SIMULATION_PARALLEL_MIN_SCORES lineup and
+        field entries (smaller runs finish before a pool would start)
+        """
+        field_width = run['contest_entries'] if run.get('sketch_places') is None else len(run['sketch_places'])
+        scores = sum(stop - start for start, stop, _ in blocks) * (len(run['incidence']) + field_width)
+        
+        if parallel and self.workers > 1 and len(blocks) > 1 and scores >= SIMULATION_PARALLEL_MIN_SCORES:
+            return self._run_blocks_parallel(run, blocks)
+        return [_simulate_block(run, start, stop, seed) for start, stop, seed in blocks]
+    
+    def _run_blocks_parallel(self, run: Dict, blocks: List[Tuple]) -> List[Dict]:
+        """
+        Run iteration blocks in a process pool
+        
+        The scenario, placement and field-lineup matrices live in shared memory
+        so workers read and write them in place without pickling copies.
+        """
+        segments = []
+        try:
+            shared = {}
+            for name in _SHARED_ARRAYS:
+                array = run.get(name)
+                if array is None:
+                    continue
+                segment = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+                segments.append(segment)
+                view = np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)
+                view[...] = array
+                shared[name] = (segment.name, array.shape, array.dtype.str)
+            
+            context = {key: value for key, value in run.items() if key not in shared}
+            
+            # Parent arrays + shared copies stay resident; each worker holds one block
+            block_bytes = max(stop - start for start, stop, _ in blocks) * self._bytes_per_iteration()
+            in_flight = max(1, (self.memory_budget - 2 * _resident_bytes(run)) // block_bytes)
+            n_workers = min(self.workers, len(blocks), in_flight)
+            
+            with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                     initargs=(context, shared)) as pool:
+                futures = [pool.submit(_simulate_block_in_worker, start, stop, seed)
+                           for start, stop, seed in blocks]
+                block_tallies = [future.result() for future in futures]
+            
+            # Copy results out before the shared segments are released
+            for segment, name in zip(segments, [n for n in _SHARED_ARRAYS if n in shared]):
+                _, shape, dtype = shared[name]
+                run[name] = np.array(np.ndarray(shape, dtype=dtype, buffer=segment.buf))
+            
+            return block_tallies
+        
+        finally:
+            for segment in segments:
+                segment.close()
+                segment.unlink()
+    
+    def _generate_field(self, field_ownership: pd.DataFrame, rng: np.random.Generator = None) -> np.ndarray:
+        """
+        Sample contest_entries opponent lineups from projected ownership
+        
+        Returns:
+            (contest_entries x 9) player ids into the player index, or None to
+            fall back to the N(135, 15) field when ownership data is missing
+        """
+        if not isinstance(field_ownership, pd.DataFrame) or not FieldGenerator.can_build(self.player_index):
+            return None
+        
+        return FieldGenerator(self.player_index).generate(self.contest_entries, rng)
+    
+    def _build_player_index(self, lineups: List[Dict], field_ownership: pd.DataFrame) -> pd.DataFrame:
+        """
+        One row per unique player (by Name) across the field pool and our lineups
+        
+        The row position is the player's column in the scenario matrix.
+        """
+        frames = []
+        if isinstance(field_ownership, pd.DataFrame) and 'Name' in field_ownership.columns:
+            frames.append(field_ownership)
+        frames.append(pd.DataFrame([p for lineup in lineups for p in lineup['players']]))
+        
+        players = pd.concat(frames, ignore_index=True)
+        players = players.dropna(subset=['Name', 'Projection'])
+        players = players.drop_duplicates(subset='Name', keep='first').reset_index(drop=True)
+        
+        if 'StdDev' not in players.columns:
+            players['StdDev'] = 6.0
+        players['StdDev'] = players['StdDev'].fillna(6.0)
+        
+        return players
+    
+    def _lineup_incidence(self, lineups: List[Dict], players: pd.DataFrame) -> np.ndarray:
+        """
+        Lineup x player incidence matrix (1 if the player is in the lineup)
+        
+        Returns:
+            Array of shape (n_lineups, n_players)
+        """
+        column = {name: i for i, name in enumerate(players['Name'])}
+        incidence = np.zeros((len(lineups), len(players)))
+        
+        for row, lineup in enumerate(lineups):
+            for player in lineup['players']:
+                incidence[row, column[player['Name']]] = 1.0
+        
+        return incidence
+
+
+class MultiContestSimulator(MonteCarloSimulator):
+    """
+    Simulate our lineups across many contests at once
+    
+    All contests share one player scenario matrix (they are on the same slate)
+    and one pool of opponent lineups generated from projected ownership. Each
+    contest's field is an independent draw of its contest_entries from that
+    pool, so contests only move together through the slate, and each keeps
+    its own field size and payout ladder. This is how the single-entry
+    grinder plays: one lineup in each of 150 tournaments.
+    """
+    
+    def __init__(self, contests: List[Dict], **kwargs):
+        """
+        Args:
+            contests: One dict per contest:
+                {
+                    'contest_entries': 4444,
+                    'payout_structure': {...},  # As for MonteCarloSimulator
+                    'name': 'SE $20 #1'         # Optional
+                }
+            **kwargs: MonteCarloSimulator options (iterations, workers, seed, sampling, ...)
+        """
+        # Contest fields are drawn from the whole sorted field pool, so neither the
+        # sketch nor the bank's sorted field scores apply
+        kwargs['field_sketch_bins'] = None
+        kwargs['duplication'] = False  # Payouts come from per-contest ladders, not one split table
+        super().__init__(max(c['contest_entries'] for c in contests), contests[0]['payout_structure'], **kwargs)
+        
+        self.contests = contests
+        self.contest_sizes = np.array([c['contest_entries'] for c in contests], dtype=np.int64)
+        self.entry_fees = np.array([c['payout_structure']['entry_fee'] for c in contests], dtype=float)
+        
+        tables = [np.append(_payout_table_from_structure(c['payout_structure']), 0.0) for c in contests]
+        self.payout_matrix = np.zeros((len(contests), max(len(table) for table in tables)))
+        for row, table in enumerate(tables):
+            self.payout_matrix[row, :len(table)] = table
+        
+        self.lineup_entry_fees = None  # Per-lineup entry fees while simulate_contests computes ROI
+    
+    @classmethod
+    def from_contest_type(cls, contest_type: str, entry_fee: float, n_contests: int, **kwargs):
+        """
+        n_contests identical contests of one CONTEST_STRUCTURES type
+        
+        Example:
+            MultiContestSimulator.from_contest_type('single_entry_grinder', 20, 150)
+        """
+        from config import CONTEST_STRUCTURES
+        
+        payout_structure = create_payout_structure(contest_type, entry_fee)
+        contests = [
+            {
+                'contest_entries': CONTEST_STRUCTURES[contest_type]['entries'],
+                'payout_structure': payout_structure,
+                'name': f"{contest_type} #{i + 1}"
+            }
+            for i in range(n_contests)
+        ]
+        return cls(contests, **kwargs)
+    
+    def simulate_contests(self, lineups: List[Dict], field_ownership: pd.DataFrame,
+                          contest_ids: List[int] = None) -> Dict:
+        """
+        Simulate every lineup in its contest in one run
+        
+        Each iteration samples one slate, scores our lineups and the field pool
+        once, then places every lineup against its own contest's independently
+        drawn field and pays it from that contest's ladder. Our entries in the
+        same contest face the same field but not each other (see
+        simulate_portfolio for self-competition).
+        
+        Args:
+            lineups: Our lineups
+            field_ownership: Field ownership distribution
+            contest_ids: Contest index of each lineup (default: lineup i in contest i)
+            
+        Returns:
+            Dict with per-lineup ('lineups') and per-contest ('contests') results
+            and aggregate fees, EV, ROI and profit distribution
+        """
+        if contest_ids is None:
+            if len(lineups) != len(self.contests):
+                print(f"Got {len(lineups)} lineups for {len(self.contests)} contests; pass contest_ids")
+                return {}
+            contest_ids = range(len(lineups))
+        contest_ids = np.asarray(contest_ids, dtype=np.int64)
+        
+        run = self._prepare_run(lineups, field_ownership)
+        run['contest_ids'] = contest_ids
+        run['contest_sizes'] = self.contest_sizes
+        run['payout_matrix'] = self.payout_matrix
+        run['top10_cutoff'] = (self.contest_sizes * 0.10).astype(np.int64)[contest_ids]
+        run['top01_cutoff'] = np.maximum(1, np.ceil(self.contest_sizes * TOP_PERCENTILE)).astype(np.int64)[contest_ids]
+        run['portfolio_payouts'] = np.zeros(self.iterations)
+        
+        # The block's sorted field pool
+        blocks = self._iteration_blocks(self.iterations, run.pop('seed_sequence'), _resident_bytes(run),
+                                        extra_bytes=self.dtype.itemsize * self.contest_entries)
+        
+        print(f"Simulating {len(lineups)} lineups across {len(np.unique(contest_ids))} contests...")
+        block_tallies = self._run_blocks(run, blocks)
+        
+        self.scenarios = run['scenarios']
+        self.placements = run['placements']
+        fees = self.entry_fees[contest_ids]
+        
+        tallies = _merge_tallies(block_tallies)
+        self.lineup_entry_fees = fees
+        stats = self._statistics_from_tallies(tallies, self.placements)
+        self.lineup_entry_fees = None
+        per_lineup = [{key: values[i] for key, values in stats.items()} for i in range(len(lineups))]
+        
+        df = self._results_frame(lineups, per_lineup)
+        df.insert(1, 'contest', contest_ids + 1)
+        df.insert(2, 'contest_name', [self.contests[c].get('name', f"Contest {c + 1}") for c in contest_ids])
+        df.insert(3, 'contest_entries', self.contest_sizes[contest_ids])
+        df.insert(4, 'entry_fee', fees)
+        
+        contests = df.groupby(['contest', 'contest_name', 'contest_entries'], as_index=False).agg(
+            lineups=('lineup_id', 'count'),
+            total_fees=('entry_fee', 'sum'),
+            expected_winnings=('expected_winnings', 'sum'),
+            cash_pct=('cash_pct', 'mean'),
+            win_pct=('win_pct', 'mean')
+        )
+        contests['expected_roi'] = (contests['expected_winnings'] - contests['total_fees']) / contests['total_fees'] * 100
+        
+        total_fees = fees.sum()
+        profit = run['portfolio_payouts'] - total_fees
+        self.portfolio_profit = profit
+        
+        return {
+            'lineups': df,
+            'contests': contests,
+            'entries': len(lineups),
+            'total_fees': total_fees,
+            'expected_winnings': run['portfolio_payouts'].mean(),
+            'expected_profit': profit.mean(),
+            'expected_roi': profit.mean() / total_fees * 100,
+            'roi_std': profit.std(ddof=1) / total_fees * 100,
+            'profit_std': profit.std(ddof=1),
+            'profit_p05': np.percentile(profit, 5),
+            'profit_p50': np.percentile(profit, 50),
+            'profit_p95': np.percentile(profit, 95),
+            'prob_profit': np.mean(profit > 0) * 100
+        }
+    
+    def _entry_fee(self):
+        """Each lineup's own contest entry fee during simulate_contests"""
+        if self.lineup_entry_fees is not None:
+            return self.lineup_entry_fees
+        return super()._entry_fee()
+
+
+# Run arrays placed in shared memory for process-pool workers
+_SHARED_ARRAYS = ('scenarios', 'placements', 'field_lineups', 'portfolio_payouts',
+                  'factors', 'field_sorted', 'lineup_scores')
+
+# Per-worker view of the current run (set by _init_worker)
+_WORKER_RUN = {}
+
+
+def _init_worker(context: Dict, shared: Dict):
+    """Attach a pool worker to the run's shared-memory arrays"""
+    _WORKER_RUN.clear()
+    _WORKER_RUN.update(context)
+    _WORKER_RUN['_segments'] = []
+    
+    for name, (segment_name, shape, dtype) in shared.items():
+        segment = shared_memory.SharedMemory(name=segment_name)
+        _WORKER_RUN['_segments'].append(segment)  # Keep the mapping alive
+        _WORKER_RUN[name] = np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+
+
+def _simulate_block_in_worker(start: int, stop: int, seed: np.random.SeedSequence) -> Dict:
+    """Process-pool entry point for one block of iterations"""
+    return _simulate_block(_WORKER_RUN, start, stop, seed)
+
+
+def _simulate_block(run: Dict, start: int, stop: int, seed: np.random.SeedSequence) -> Dict:
+    """
+    Simulate iterations [start, stop) and return per-lineup tallies
+    
+    Samples the block's player outcomes with its own RNG stream, scores our
+    lineups and the field against them, and writes scenarios and placements
+    into the run's output arrays.
+    """
+    rng = np.random.default_rng(seed)
+    
+    if stop <= run.get('bank_rows', 0):
+        # Banked iterations: outcomes and already-sorted field scores from disk
+        scenarios = np.array(np.load(os.path.join(run['bank_read'], 'scenarios.npy'), mmap_mode='r')[start:stop])
+        field = np.load(os.path.join(run['bank_read'], 'field_scores.npy'), mmap_mode='r')[start:stop]
+        factors_path = os.path.join(run['bank_read'], 'factors.npy')
+        if run.get('factors') is not None and os.path.exists(factors_path):
+            run['factors'][start:stop] = np.load(factors_path, mmap_mode='r')[start:stop]
+    else:
+        model = run['model']
+        normals = standard_normals(stop - start, model.dimension, rng, run.get('sampling', 'plain'),
+                                   run.get('dtype', np.float64))
+        if run.get('factors') is not None:
+            run['factors'][start:stop] = normals[:, :model.n_factors]
+        scenarios = model.transform(normals)
+        del normals
+        field = _field_block(run, scenarios, rng)
+    
+    if run.get('bank_write'):
+        banked = np.load(os.path.join(run['bank_write'], 'field_scores.npy'), mmap_mode='r+')
+        banked[start:stop] = field
+        banked.flush()
+    
+    run['scenarios'][start:stop] = scenarios
+    
+    # (rows x players) @ (players x lineups) -> (rows x lineups)
+    columns = run.get('columns')
+    incidence = run['incidence'] if columns is None else run['incidence'][columns]
+    lineup_scores = scenarios @ incidence.T
+    
+    if run.get('field_sorted') is not None:
+        run['field_sorted'][start:stop] = field
+        run['lineup_scores'][start:stop] = lineup_scores
+    
+    if run.get('portfolio'):
+        placements, payouts, solo_payouts = _place_portfolio(run, lineup_scores, field)
+        run['placements'][start:stop] = placements
+        run['portfolio_payouts'][start:stop] = payouts.sum(axis=1)
+        tallies = _payout_tallies(placements, payouts, run['top10_cutoff'], run['top01_cutoff'])
+        tallies['solo_payout_sum'] = solo_payouts.sum(axis=0)
+        return tallies
+    
+    if run.get('contest_ids') is not None:
+        placements, payouts = _place_in_contests(run, lineup_scores, field, rng)
+        run['placements'][start:stop] = placements
+        run['portfolio_payouts'][start:stop] = payouts.sum(axis=1)
+        return _payout_tallies(placements, payouts, run['top10_cutoff'], run['top01_cutoff'])
+    
+    placements = _place_in_field(run, lineup_scores, field)
+    if run['placements'] is None:
+        run['block_placements'] = placements
+    elif columns is None:
+        run['placements'][start:stop] = placements
+    else:
+        run['placements'][start:stop, columns] = placements
+    
+    duplicates = run.get('duplicates')
+    if duplicates is not None:
+        payouts = _split_payouts(run['payout_cumsum'], placements, duplicates if columns is None else duplicates[columns])
+        return _payout_tallies(placements, payouts, run['top10_cutoff'], run['top01_cutoff'])
+    
+    return _placement_tallies(placements, run['payout_table'], run['top10_cutoff'], run['top01_cutoff'])
+
+
+def _field_block(run: Dict, scenarios: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """
+    A block's field, ascending per row: every field score, or with a sketch
+    only the scores at run['sketch_places'] (reversed to ascending order)
+    """
+    places = run.get('sketch_places')
+    if places is None:
+        field_scores = _field_scores(run, scenarios, rng)
+        field_scores.sort(axis=1)
+        return field_scores
+    
+    positions = run['contest_entries'] - places  # 0-based ascending rank of each kept place
+    if run['field_lineups'] is None:
+        return _normal_order_statistics(positions, run['contest_entries'], len(scenarios), rng, scenarios.dtype)
+    
+    field_scores = FieldGenerator.score(run['field_lineups'], scenarios)
+    field_scores.sort(axis=1)
+    return field_scores[:, positions]
+
+
+def _normal_order_statistics(positions: np.ndarray, n_entries: int, n_rows: int,
+                             rng: np.random.Generator, dtype) -> np.ndarray:
+    """
+    Sample selected order statistics of n_entries iid N(135, 15) field scores
+    
+    Uniform order statistics are ratios of exponential partial sums, and the
+    sum of the exponentials between two kept ranks is Gamma(gap), so only
+    O(len(positions)) draws are needed per iteration instead of n_entries.
+    """
+    gaps = np.diff(np.concatenate([[-1], positions, [n_entries]]))
+    sums = np.cumsum(rng.standard_gamma(gaps, size=(n_rows, len(gaps))), axis=1)
+    uniforms = sums[:, :-1] / sums[:, -1:]
+    return (135 + 15 * ndtri(uniforms)).astype(dtype)
+
+
+def _place_in_field(run: Dict, lineup_scores: np.ndarray, field: np.ndarray) -> np.ndarray:
+    """Placements against a block's field from _field_block (exact or sketch)"""
+    if run.get('sketch_places') is None:
+        return _place_against_sorted_field(lineup_scores, field, presorted=True)
+    return _place_against_sketch(lineup_scores, field, run['sketch_places'])
+
+
+def _place_portfolio(run: Dict, lineup_scores: np.ndarray, field: np.ndarray) -> Tuple:
+    """
+    Place every lineup of a portfolio into each iteration's field at once
+    
+    Scores are rounded to 0.01. A lineup's place is 1 + (field entries above
+    it) + (our lineups above it); the entries tied with it share the payouts
+    of the places they occupy together, split evenly (DraftKings rules).
+    
+    Returns:
+        (placements, payouts, solo_payouts), each (n_rows x n_lineups);
+        solo_payouts is what each lineup would win as our only entry, under
+        the same tie splitting
+    """
+    scores = np.round(lineup_scores.astype(np.float64), 2)
+    
+    if run.get('sketch_places') is None:
+        field = np.round(field.astype(np.float64), 2)
+        n_entries = field.shape[1]
+        at_or_below = _searchsorted_rows(field, scores, side='right')
+        field_above = n_entries - at_or_below
+        field_tied = at_or_below - _searchsorted_rows(field, scores, side='left')
+    else:
+        field_above = _place_against_sketch(scores, field, run['sketch_places']) - 1
+        field_tied = 0  # The sketch can't see exact ties
+    
+    # (rows x lineup k x lineup j): compare lineup j's score with lineup k's
+    ours_above = np.sum(scores[:, None, :] > scores[:, :, None], axis=2)
+    ours_tied = np.sum(scores[:, None, :] == scores[:, :, None], axis=2)  # Includes itself
+    
+    placements = 1 + field_above + ours_above
+    group = field_tied + ours_tied
+    
+    cumulative = run['payout_cumsum']
+    last = len(cumulative) - 1
+    payouts = (cumulative[np.minimum(placements - 1 + group, last)]
+               - cumulative[np.minimum(placements - 1, last)]) / group
+    
+    # Alone, a lineup still splits with the field entries tied with it (field
+    # duplicates of it included), so a one-lineup portfolio costs nothing
+    solo_group = field_tied + 1
+    solo_payouts = (cumulative[np.minimum(field_above + solo_group, last)]
+                    - cumulative[np.minimum(field_above, last)]) / solo_group
+    
+    return placements, payouts, solo_payouts
+
+
+def _place_in_contests(run: Dict, lineup_scores: np.ndarray, field: np.ndarray,
+                       rng: np.random.Generator) -> Tuple:
+    """
+    Place each lineup in its own contest and look up that contest's payout
+    
+    The block's field (ascending per row) is a pool of opponent lineups, and
+    each contest's field is an independent draw of contest_sizes[c] entries
+    from it. If a lineup is beaten by a share q of the pool, the entries that
+    beat it in contest c are Binomial(contest_sizes[c], q), so no contest
+    field is ever built. Our lineups in one contest share its field: taken in
+    score order, the entries landing between consecutive lineups are drawn as
+    sequential conditional binomials (one multinomial field per iteration).
+    
+    Returns:
+        (placements, payouts), both of shape (n_rows, n_lineups)
+    """
+    contest_ids = run['contest_ids']
+    sizes = run['contest_sizes'][contest_ids]
+    beaten_share = (_place_against_sorted_field(lineup_scores, field, presorted=True) - 1) / field.shape[1]
+    
+    placements = np.empty(lineup_scores.shape, dtype=np.int64)
+    shared = np.bincount(contest_ids)[contest_ids] > 1
+    placements[:, ~shared] = 1 + rng.binomial(sizes[~shared], beaten_share[:, ~shared])
+    
+    for contest in np.unique(contest_ids[shared]):
+        columns = np.flatnonzero(contest_ids == contest)
+        order = np.argsort(beaten_share[:, columns], axis=1, kind='stable')
+        shares = np.take_along_axis(beaten_share[:, columns], order, axis=1)
+        
+        remaining = np.full(len(shares), run['contest_sizes'][contest], dtype=np.int64)
+        beaten = np.zeros(len(shares), dtype=np.int64)
+        covered = np.zeros(len(shares))
+        ranked = np.empty(shares.shape, dtype=np.int64)
+        for j in range(shares.shape[1]):
+            # Share of the entries not yet drawn that land between lineups j - 1 and j
+            gap = np.clip((shares[:, j] - covered) / np.maximum(1 - covered, 1e-12), 0, 1)
+            drawn = rng.binomial(remaining, gap)
+            beaten += drawn
+            remaining -= drawn
+            covered = shares[:, j]
+            ranked[:, j] = beaten
+        
+        contest_places = np.empty(shares.shape, dtype=np.int64)
+        np.put_along_axis(contest_places, order, 1 + ranked, axis=1)
+        placements[:, columns] = contest_places
+    
+    # Row c of payout_matrix is contest c's payout table, zero-padded to a common width
+    payout_matrix = run['payout_matrix']
+    payouts = payout_matrix[contest_ids, np.clip(placements, 1, payout_matrix.shape[1]) - 1]
+    
+    return placements, payouts
+
+
+def _searchsorted_rows(sorted_rows: np.ndarray, values: np.ndarray, side: str = 'left') -> np.ndarray:
+    """
+    np.searchsorted of each row of values into the same row of sorted_rows, in one call
+    
+    Rows are shifted apart by a per-row offset larger than the data range, so
+    the flattened array is globally sorted and one binary search serves all rows.
+    
+    Args:
+        sorted_rows: Array of shape (n_rows, n_cols), each row ascending
+        values: Array of shape (n_rows, n_values)
+    
+    Returns:
+        Integer array of shape (n_rows, n_values) with positions within each row
+    """
+    n_rows, n_cols = sorted_rows.shape
+    low = min(sorted_rows.min(), values.min())
+    span = max(sorted_rows.max(), values.max()) - low + 1.0
+    offsets = (np.arange(n_rows) * span - low)[:, None]
+    
+    keys = (sorted_rows + offsets).ravel()
+    positions = np.searchsorted(keys, values + offsets, side=side)
+    return positions - np.arange(n_rows)[:, None] * n_cols
+
+
+def _replace_sorted_values(sorted_rows: np.ndarray, old_values: np.ndarray, new_values: np.ndarray):
+    """
+    Swap old_values for new_values in each row of sorted_rows, in place
+    
+    Old values are located by binary search and overwritten with the new
+    ones, then rows are re-sorted; a row with a few displaced values is nearly
+    sorted, which is much cheaper than rebuilding the field.
+    
+    Args:
+        sorted_rows: Array of shape (n_rows, n_cols), each row ascending
+        old_values: Array of shape (n_rows, k); every value occurs in its row
+        new_values: Array of shape (n_rows, k)
+    """
+    old = np.sort(old_values, axis=1)
+    
+    # Repeated old values take successive slots of their run in the row
+    slots = np.broadcast_to(np.arange(old.shape[1]), old.shape)
+    run_start = np.ones(old.shape, dtype=bool)
+    run_start[:, 1:] = old[:, 1:] != old[:, :-1]
+    offsets = slots - np.maximum.accumulate(np.where(run_start, slots, 0), axis=1)
+    
+    for row in range(sorted_rows.shape[0]):
+        sorted_rows[row, np.searchsorted(sorted_rows[row], old[row]) + offsets[row]] = new_values[row]
+    
+    sorted_rows.sort(axis=1)
+
+
+def _place_against_sketch(lineup_scores: np.ndarray, knots: np.ndarray, places: np.ndarray) -> np.ndarray:
+    """
+    Placements from a field quantile sketch
+    
+    knots[row, k] is the score that finished in places[k] (knots ascending,
+    places descending). A lineup's placement is exact at every kept place and
+    linearly interpolated in score between neighbouring kept places, so the
+    error is bounded by the gap between them.
+    
+    Args:
+        lineup_scores: Array of shape (n_rows,) or (n_rows, n_lineups)
+        knots: Array of shape (n_rows, n_places)
+        places: Field places of the knots, descending
+    """
+    n_entries = places[0]
+    placements = np.empty(lineup_scores.shape, dtype=np.int64)
+    
+    for row in range(knots.shape[0]):
+        values = knots[row]
+        scores = lineup_scores[row]
+        above = np.searchsorted(values, scores, side='right')  # Knots at or below the score
+        
+        lo = np.clip(above - 1, 0, len(values) - 1)   # Highest knot the score reaches
+        hi = np.clip(above, 0, len(values) - 1)       # Lowest knot that beats the score
+        span = np.maximum(values[hi] - values[lo], 1e-9)
+        frac = np.clip((values[hi] - scores) / span, 0, 1)
+        interpolated = places[hi] + np.ceil(frac * (places[lo] - places[hi]))
+        
+        placement = np.clip(interpolated, places[hi] + 1, places[lo])
+        placement = np.where(above == len(values), 1, placement)          # Beat the whole field
+        placement = np.where(above == 0, n_entries + 1, placement)        # Below every entry
+        placements[row] = placement
+    
+    return placements
+
+
+def _with_projections(lineups: List[Dict], changes: Dict[str, float]) -> List[Dict]:
+    """Copies of lineups with changed player Projections and lineup totals"""
+    updated = []
+    for lineup in lineups:
+        if not any(p['Name'] in changes for p in lineup['players']):
+            updated.append(lineup)
+            continue
+        
+        players = [dict(p, Projection=changes.get(p['Name'], p['Projection'])) for p in lineup['players']]
+        lineup = dict(lineup, players=players)
+        for key in ('projection', 'total_projection'):
+            if key in lineup:
+                lineup[key] = sum(p['Projection'] for p in players)
+        updated.append(lineup)
+    
+    return updated
+
+
+def _placements_by_lineup(segments: List[Tuple], n_lineups: int) -> List[np.ndarray]:
+    """
+    Regroup per-block (columns, placements) segments of a sequential run
+    into one placements array per lineup, in iteration order
+    """
+    parts = [[] for _ in range(n_lineups)]
+    for columns, placements in segments:
+        for j, lineup in enumerate(columns):
+            parts[lineup].append(placements[:, j])
+    
+    return [np.concatenate(part) if part else np.zeros(0, dtype=np.int32) for part in parts]
+
+
+def _resident_bytes(run: Dict) -> int:
+    """Memory held by a run's matrices for its whole duration"""
+    return sum(run[name].nbytes for name in ('scenarios', 'placements', 'field_lineups', 'incidence',
+                                             'factors', 'field_sorted', 'lineup_scores')
+               if run.get(name) is not None)
+
+
+def _field_scores(run: Dict, scenarios: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Field entry scores for a block of scenarios (N(135, 15) when no field lineups)"""
+    if run['field_lineups'] is None:
+        field_scores = rng.standard_normal((len(scenarios), run['contest_entries']), dtype=scenarios.dtype)
+        field_scores *= 15
+        field_scores += 135
+        return field_scores
+    return FieldGenerator.score(run['field_lineups'], scenarios)
+
+
+def _weighted_median(values: np.ndarray, weights: np.ndarray) -> float:
+    """Median of values under (unnormalized) sample weights"""
+    order = np.argsort(values)
+    cumulative = np.cumsum(weights[order])
+    return float(values[order][np.searchsorted(cumulative, cumulative[-1] / 2)])
+
+
+def _estimator_variance(values: np.ndarray, blocks: List[Tuple], sampling: str) -> Tuple[float, int]:
+    """
+    Variance of values.mean() under the sampling method that produced them
+    
+    Antithetic rows are averaged in (z, -z) pairs and quasi-random rows per
+    replicate (each block draws independent scrambles of QMC_REPLICATE_POINTS
+    rows); the spread of those independent units gives the estimator variance.
+    
+    Returns:
+        (variance, degrees of freedom of the estimate)
+    """
+    n = len(values)
+    
+    if sampling == 'antithetic' and n >= 4:
+        pairs = values[:n - n % 2].reshape(-1, 2).mean(axis=1)
+        return pairs.var(ddof=1) / len(pairs), len(pairs) - 1
+    
+    if sampling in ('sobol', 'halton'):
+        offsets = np.array([offset for start, stop, _ in blocks if start < n
+                            for offset in range(start, min(stop, n), QMC_REPLICATE_POINTS)])
+        if len(offsets) >= 2:
+            sizes = np.diff(np.append(offsets, n))
+            means = np.add.reduceat(values, offsets) / sizes
+            weights = sizes / n
+            variance = np.sum(weights ** 2 * (means - values.mean()) ** 2) * len(sizes) / (len(sizes) - 1)
+            return variance, len(sizes) - 1
+        return 0.0, 0
+    
+    return values.var(ddof=1) / n, n - 1
+
+
+def _place_against_sorted_field(lineup_scores: np.ndarray, field_scores: np.ndarray,
+                                presorted: bool = False) -> np.ndarray:
+    """
+    Placement = (number of field entries that beat the lineup) + 1
+    
+    Each iteration's field is sorted once (in place) and every lineup is
+    placed with a binary search.
+    
+    Args:
+        lineup_scores: Array of shape (n_rows,) or (n_rows, n_lineups)
+        field_scores: Array of shape (n_rows, n_entries)
+        presorted: Rows of field_scores are already sorted ascending
+    """
+    if not presorted:
+        field_scores.sort(axis=1)
+    n_entries = field_scores.shape[1]
+    placements = np.empty(lineup_scores.shape, dtype=np.int64)
+    
+    for row in range(field_scores.shape[0]):
+        at_or_below = np.searchsorted(field_scores[row], lineup_scores[row], side='right')
+        placements[row] = n_entries - at_or_below + 1
+    
+    return placements
+
+
+def _lookup_payouts(payout_table: np.ndarray, placements: np.ndarray) -> np.ndarray:
+    """Payouts for placements; payout_table ends with a 0 used for every unpaid place"""
+    unpaid = len(payout_table)
+    return payout_table[np.clip(placements, 1, unpaid) - 1]
+
+
+def _split_payouts(payout_cumsum: np.ndarray, placements: np.ndarray, expected_copies: np.ndarray) -> np.ndarray:
+    """
+    Expected payouts when a Poisson(expected_copies) number of field entries
+    duplicate each lineup: with d copies the d + 1 identical entries split
+    places placement .. placement + d
+    
+    Args:
+        payout_cumsum: [0, cumsum(payout_table)]
+        placements: Array of shape (n_rows, n_lineups)
+        expected_copies: Array of shape (n_lineups,)
+    """
+    last = len(payout_cumsum) - 1
+    start = np.clip(placements, 1, last) - 1
+    
+    # Poisson weights up to far into the tail, renormalized
+    largest = float(np.max(expected_copies, initial=0.0))
+    n_copies = int(np.ceil(largest + 6 * np.sqrt(largest))) + 1
+    weights = np.empty((n_copies + 1, len(expected_copies)))
+    weights[0] = np.exp(-expected_copies)
+    for d in range(1, n_copies + 1):
+        weights[d] = weights[d - 1] * expected_copies / d
+    weights /= weights.sum(axis=0)
+    
+    payouts = np.zeros(placements.shape)
+    for d in range(n_copies + 1):
+        shared = payout_cumsum[np.minimum(start + d + 1, last)] - payout_cumsum[start]
+        payouts += weights[d] * shared / (d + 1)
+    
+    return payouts
+
+
+def _placement_tallies(placements: np.ndarray, payout_table: np.ndarray, top10_cutoff: int,
+                       top01_cutoff: int = 1) -> Dict:
+    """Per-lineup counts and sums for a block of placements (merged by addition)"""
+    return _payout_tallies(placements, _lookup_payouts(payout_table, placements), top10_cutoff, top01_cutoff)
+
+
+def _payout_tallies(placements: np.ndarray, payouts: np.ndarray, top10_cutoff: int,
+                    top01_cutoff: int = 1) -> Dict:
+    """Per-lineup tallies from placements and the payouts they earned"""
+    return {
+        'iterations': placements.shape[0],
+        'wins': np.sum(placements == 1, axis=0),
+        'top10': np.sum(placements <= top10_cutoff, axis=0),
+        'top01': np.sum(placements <= top01_cutoff, axis=0),
+        'cashes': np.sum(payouts > 0, axis=0),
+        'payout_sum': payouts.sum(axis=0),
+        'payout_sq_sum': np.square(payouts).sum(axis=0),
+        'placement_sum': placements.sum(axis=0, dtype=np.int64)
+    }
+
+
+def _merge_tallies(block_tallies: List[Dict]) -> Dict:
+    """Add block tallies together in block order (exact for counts, deterministic for sums)"""
+    merged = dict(block_tallies[0])
+    for tallies in block_tallies[1:]:
+        for key, value in tallies.items():
+            merged[key] = merged[key] + value
+    return merged
+
+
+def create_payout_structure(contest_type: str, entry_fee: float,
+                            payout_ladder: List[Tuple[int, float]] = None) -> Dict:
+    """
+    Create payout structure for contest
+    
+    Args:
+        contest_type: 'single_entry_grinder', 'small_gpp', 'mid_gpp', 'milly_maker'
+        entry_fee: Entry fee in dollars
+        payout_ladder: Optional posted DraftKings ladder as (last_place, amount)
+                       breakpoints, e.g. [(1, 25000), (2, 10000), (5, 2500), (880, 200)]
+        
+    Returns:
+        Payout structure dict
+    """
+    from config import CONTEST_STRUCTURES
+    
+    rules = CONTEST_STRUCTURES[contest_type]
+    entries = rules['entries']
+    total_pool = entries * entry_fee
+    prize_pool = total_pool * (1 - PAYOUT_LADDER['rake'])
+    
+    if payout_ladder:
+        ladder = [(int(last), float(amount)) for last, amount in payout_ladder]
+        places_paid = ladder[-1][0]
+    
+    elif contest_type in ('small_gpp', 'single_entry_grinder'):
+        # 4,444 entries, 25% to 1st
+        places_paid = int(entries * 0.20)  # Top 20% cash
+        top_payouts = [
+            total_pool * 0.25,
+            total_pool * 0.10,
+            total_pool * 0.06,
+            total_pool * 0.04,
+            total_pool * 0.03
+        ]
+        ladder = build_payout_ladder(prize_pool, places_paid, top_payouts, entry_fee)
+    
+    elif contest_type == 'mid_gpp':
+        # 14k entries, 10% payout
+        # Very flat structure (why ROI is negative)
+        places_paid = int(entries * 0.10)
+        top_payouts = [prize_pool * 0.10]
+        ladder = build_payout_ladder(prize_pool, places_paid, top_payouts, entry_fee)
+    
+    elif contest_type == 'milly_maker':
+        # 150k entries, $1M to first
+        places_paid = int(entries * 0.20)
+        top_payouts = [1000000, 250000, 150000, 100000, 75000]
+        ladder = build_payout_ladder(prize_pool, places_paid, top_payouts, entry_fee)
+    
+    else:
+        return {}
+    
+    payout_table = _payout_table_from_ladder(ladder)
+    places_paid = ladder[-1][0] if ladder else 0
+    
+    return {
+        'entry_fee': entry_fee,
+        'places_paid': places_paid,
+        'payouts': {place: payout_table[place - 1] for place in range(1, min(10, len(payout_table)) + 1)},
+        'payout_breakpoints': ladder,
+        'payout_table': payout_table,
+        'total_pool': total_pool,
+        'prize_pool': prize_pool
+    }
+
+
+def build_payout_ladder(prize_pool: float, places_paid: int, top_payouts: List[float],
+                        entry_fee: float) -> List[Tuple[int, float]]:
+    """
+    Build a DraftKings-style payout ladder as (last_place, amount) breakpoints
+    
+    The fixed top payouts are paid as given, scaled down when they would leave
+    less than one entry fee per remaining paid place (a low entry fee), or
+    dropped if even that can't be covered. The rest of the prize pool decays as
+    a power law from the last fixed payout down to a min cash, with the decay
+    rate solved so the ladder pays out the whole prize pool. Places after the first few
+    are grouped into bands that widen geometrically, each paying the band average.
+    
+    Args:
+        prize_pool: Total dollars paid out (entry fees minus rake)
+        places_paid: Number of paid places
+        top_payouts: Fixed payouts for places 1..k (descending)
+        entry_fee: Entry fee, used for the min cash
+    """
+    top = np.asarray(top_payouts[:places_paid], dtype=float)
+    
+    # Fit the fixed payouts in the pool, leaving an entry fee per remaining place
+    room = prize_pool - (places_paid - len(top)) * entry_fee
+    if room <= 0:
+        top = top[:0]  # Power law over the whole pool
+    elif top.sum() > room:
+        top = top * room / top.sum()
+    
+    k = len(top)
+    ranks = np.arange(k + 1, places_paid + 1, dtype=float)
+    remaining = prize_pool - top.sum()
+    
+    amounts = top
+    if len(ranks) > 0 and remaining > 0:
+        # Min cash ~2x entry, lowered if the pool can't cover it
+        min_cash = min(entry_fee * PAYOUT_LADDER['min_cash_multiple'], 0.75 * remaining / len(ranks))
+        anchor = top[-1] if k else remaining
+        
+        def ladder_for(decay):
+            return np.clip(anchor * (ranks / max(k, 1)) ** -decay, min_cash, anchor)
+        
+        # Bisect the decay rate so the ladder sums to the remaining pool
+        low, high = 0.0, 10.0
+        for _ in range(60):
+            decay = (low + high) / 2
+            if ladder_for(decay).sum() > remaining:
+                low = decay
+            else:
+                high = decay
+        amounts = np.concatenate([top, ladder_for(high)])
+    
+    # Individual places at the top, then geometrically widening bands
+    ladder = []
+    individual = max(k, PAYOUT_LADDER['individual_places'])
+    start, width = 0, 1.0
+    while start < len(amounts):
+        if start < individual:
+            stop = start + 1
+        else:
+            width *= PAYOUT_LADDER['band_growth']
+            stop = min(len(amounts), start + int(np.ceil(width)))
+        ladder.append((stop, float(amounts[start:stop].mean())))
+        start = stop
+    
+    return ladder
+
+
+def _payout_table_from_ladder(ladder: List[Tuple[int, float]]) -> np.ndarray:
+    """Expand (last_place, amount) breakpoints into a dense rank-indexed payout array"""
+    last_places = np.array([last for last, _ in ladder], dtype=np.int64)
+    amounts = np.array([amount for _, amount in ladder], dtype=float)
+    widths = np.diff(np.concatenate([[0], last_places]))
+    return np.repeat(amounts, widths)
+
+
+def _payout_table_from_structure(payout_structure: Dict) -> np.ndarray:
+    """
+    Dense payout array for any payout structure dict
+    
+    Uses 'payout_table' or 'payout_breakpoints' when present. Older hand-written
+    structures with only 'payouts' and 'places_paid' pay the explicit places and
+    a flat entry_fee * 1.5 for the rest of the paid range.
+    """
+    if payout_structure.get('payout_table') is not None:
+        return np.asarray(payout_structure['payout_table'], dtype=float)
+    if payout_structure.get('payout_breakpoints'):
+        return _payout_table_from_ladder(payout_structure['payout_breakpoints'])
+    
+    payouts = payout_structure.get('payouts', {})
+    places_paid = max([payout_structure.get('places_paid', 0)] + list(payouts.keys()))
+    table = np.full(places_paid, payout_structure.get('entry_fee', 0) * 1.5)
+    for place, amount in payouts.items():
+        table[place - 1] = amount
     
-    return {}
+    return table
@@ -16,6 +16,7 @@ import pandas as pd
 import numpy as np
 from typing import List, Dict, Tuple
 from config import SALARY_CAP, CONTEST_STRUCTURES
+from player_table import PlayerTable, LineupBitsets, POSITIONS
 
 
 class WinningOptimizer:
@@ -34,6 +35,18 @@ class WinningOptimizer:
         self.player_pool['Value'] = self.player_pool['Projection'] / (self.player_pool['Salary'] / 1000)
         self.locks = locks if locks else {}
         
+        # Array view for picks, with each player's category boost precomputed
+        self.table = PlayerTable(self.player_pool)
+        self.portfolio = LineupBitsets(self.table)
+        if self.contest_rules['entries'] >= 100000:
+            # Millionaire Maker
+            boosts = {'💎 Leverage': 0.30, '⭐ Core': 0.10, '🔥 Chalk': -0.20}
+        else:
+            # Small GPP
+            boosts = {'🔥 Chalk': 0.15, '⭐ Core': 0.20, '💎 Leverage': 0.25}
+        self.category_boost = self.table.category_scores(boosts)
+        self.excluded = self.table.category_scores({'🚫 Exclude': 1}) > 0
+        
         print(f"   🏆 Building {num_lineups} lineups with WINNING STRUCTURE...")
         print(f"   Strategy: {self.contest_rules['description']}")
         
@@ -106,23 +119,17 @@ class WinningOptimizer:
     def _identify_core_rb(self):
         """Identify the core RB anchor (18-25% owned, elite matchup)"""
         
-        rb_pool = self.player_pool[
-            (self.player_pool['Position'] == 'RB') &
-            (self.player_pool['Ownership'] >= self.contest_rules['core_rb_ownership'][0]) &
-            (self.player_pool['Ownership'] <= self.contest_rules['core_rb_ownership'][1]) &
-            (self.player_pool['Projection'] >= 15)  # Must have decent projection
-        ].copy()
+        ids = self.table.by_projection(self.table.candidates('RB'))
+        low, high = self.contest_rules['core_rb_ownership']
+        ownership = self.table.ownership[ids]
+        core = ids[(ownership >= low) & (ownership <= high) & (self.table.projection[ids] >= 15)]  # Must have decent projection
         
-        if not rb_pool.empty:
+        if len(core):
             # Pick the highest projected in the ownership range
-            rb_pool = rb_pool.sort_values('Projection', ascending=False)
-            self.core_rb = rb_pool.iloc[0].to_dict()
-        else:
+            self.core_rb = self.table.player(core[0])
+        elif len(ids):
             # Fallback: pick highest projected RB
-            rb_pool = self.player_pool[self.player_pool['Position'] == 'RB'].copy()
-            if not rb_pool.empty:
-                rb_pool = rb_pool.sort_values('Projection', ascending=False)
-                self.core_rb = rb_pool.iloc[0].to_dict()
+            self.core_rb = self.table.player(ids[0])
     
     def _determine_lineup_type(self, current_count: int, total_count: int, 
                                leverage_qb_count: int, game_stack_count: int) -> str:
@@ -163,7 +170,7 @@ class WinningOptimizer:
         # STEP 1: Add locked players first
         for lock_pos, lock_value in self.locks.items():
             if lock_pos == 'QB' and lock_value:
-                player = self.player_pool[self.player_pool['Name'] == lock_value].iloc[0].to_dict()
+                player = self.table.find(lock_value)
                 lineup.append(player)
                 budget -= player['Salary']
                 used_names.append(player['Name'])
@@ -173,7 +180,7 @@ class WinningOptimizer:
         # Continue with other locks...
         for rb_name in self.locks.get('RB', []):
             if rb_name:
-                player = self.player_pool[self.player_pool['Name'] == rb_name].iloc[0].to_dict()
+                player = self.table.find(rb_name)
                 lineup.append(player)
                 budget -= player['Salary']
                 used_names.append(player['Name'])
@@ -181,21 +188,21 @@ class WinningOptimizer:
         
         for wr_name in self.locks.get('WR', []):
             if wr_name:
-                player = self.player_pool[self.player_pool['Name'] == wr_name].iloc[0].to_dict()
+                player = self.table.find(wr_name)
                 lineup.append(player)
                 budget -= player['Salary']
                 used_names.append(player['Name'])
                 correlations.append(f"{player['Name']} (LOCKED)")
         
         if self.locks.get('TE'):
-            player = self.player_pool[self.player_pool['Name'] == self.locks['TE']].iloc[0].to_dict()
+            player = self.table.find(self.locks['TE'])
             lineup.append(player)
             budget -= player['Salary']
             used_names.append(player['Name'])
             correlations.append(f"{player['Name']} (LOCKED)")
         
         if self.locks.get('FLEX'):
-            player = self.player_pool[self.player_pool['Name'] == self.locks['FLEX']].iloc[0].to_dict()
+            player = self.table.find(self.locks['FLEX'])
             player['PositionSlot'] = f"FLEX ({player['Position']})"
             lineup.append(player)
             budget -= player['Salary']
@@ -203,7 +210,7 @@ class WinningOptimizer:
             correlations.append(f"{player['Name']} (LOCKED FLEX)")
         
         if self.locks.get('DST'):
-            player = self.player_pool[self.player_pool['Name'] == self.locks['DST']].iloc[0].to_dict()
+            player = self.table.find(self.locks['DST'])
             lineup.append(player)
             budget -= player['Salary']
             used_names.append(player['Name'])
@@ -221,13 +228,13 @@ class WinningOptimizer:
         if positions_filled['QB'] == 0:
             if lineup_type in ['leverage_qb', 'leverage_stack']:
                 # ULTRA-LEVERAGE QB (Trevor Lawrence 3.7% type)
-                qb = self._pick_leverage_qb(budget, used_names)
+                qb = self._pick_leverage_qb(used_names, lineup, budget)
                 if qb and qb['Ownership'] <= 8:
                     has_leverage_qb = True
                     correlations.append(f"💎 LEVERAGE QB: {qb['Name']} ({qb['Ownership']:.1f}%)")
             else:
                 # Balanced QB selection
-                qb = self._pick_balanced_qb(budget, used_names)
+                qb = self._pick_balanced_qb(used_names, lineup, budget)
             
             if not qb:
                 return None
@@ -241,7 +248,8 @@ class WinningOptimizer:
         if positions_filled['RB'] < 2:
             use_core_rb = np.random.random() < self.contest_rules['core_rb_usage_pct']
             
-            if use_core_rb and self.core_rb and self.core_rb['Name'] not in used_names:
+            if (use_core_rb and self.core_rb and self.core_rb['Name'] not in used_names
+                    and len(self.table.feasible(np.array([self.table.index[self.core_rb['Name']]]), lineup, budget))):
                 lineup.append(self.core_rb)
                 budget -= self.core_rb['Salary']
                 used_names.append(self.core_rb['Name'])
@@ -250,7 +258,7 @@ class WinningOptimizer:
         
         # STEP 4: Game Stack (if needed)
         if lineup_type in ['leverage_stack', 'game_stack'] and qb_team:
-            stack_players = self._build_game_stack(qb_team, budget, used_names, positions_filled)
+            stack_players = self._build_game_stack(qb_team, lineup, budget, used_names, positions_filled)
             if len(stack_players) >= 2:
                 for player in stack_players:
                     lineup.append(player)
@@ -267,7 +275,7 @@ class WinningOptimizer:
         # STEP 5: Fill remaining positions
         # Fill RBs
         while positions_filled['RB'] < 2:
-            rb = self._pick_player('RB', budget * 0.25, used_names, leverage_preferred=True)
+            rb = self._pick_player('RB', SALARY_CAP, used_names, lineup, budget, leverage_preferred=True)
             if not rb:
                 return None
             lineup.append(rb)
@@ -279,11 +287,11 @@ class WinningOptimizer:
         while positions_filled['WR'] < 3:
             # Try to stack with QB team first
             if qb_team and np.random.random() < 0.30:
-                wr = self._pick_stacked_player('WR', qb_team, budget * 0.30, used_names)
+                wr = self._pick_stacked_player('WR', qb_team, used_names, lineup, budget)
                 if wr:
                     correlations.append(f"🔗 Stack: {wr['Name']} (same team as QB)")
             else:
-                wr = self._pick_player('WR', budget * 0.30, used_names, leverage_preferred=True)
+                wr = self._pick_player('WR', SALARY_CAP, used_names, lineup, budget, leverage_preferred=True)
             
             if not wr:
                 return None
@@ -297,11 +305,11 @@ class WinningOptimizer:
             punt_te = np.random.random() < self.contest_rules['te_punt_pct']
             if punt_te:
                 te_max = self.contest_rules['te_punt_salary_max']
-                te = self._pick_player('TE', te_max, used_names)
+                te = self._pick_player('TE', te_max, used_names, lineup, budget)
                 if te:
                     correlations.append(f"💰 PUNT TE: {te['Name']} (${te['Salary']:,})")
             else:
-                te = self._pick_player('TE', budget * 0.20, used_names)
+                te = self._pick_player('TE', SALARY_CAP, used_names, lineup, budget)
             
             if not te:
                 return None
@@ -313,7 +321,10 @@ class WinningOptimizer:
         # Fill FLEX
         if positions_filled['FLEX'] == 0:
             flex_pos = np.random.choice(['RB', 'WR'], p=[0.40, 0.60])
-            flex = self._pick_player(flex_pos, budget * 0.80, used_names, leverage_preferred=True)
+            flex = self._pick_player(flex_pos, SALARY_CAP, used_names, lineup, budget, leverage_preferred=True)
+            if not flex:
+                # The completable fills may need another position in the FLEX
+                flex = self._pick_player(['RB', 'WR', 'TE'], SALARY_CAP, used_names, lineup, budget)
             if not flex:
                 return None
             flex['PositionSlot'] = f"FLEX ({flex['Position']})"
@@ -324,7 +335,7 @@ class WinningOptimizer:
         
         # Fill DST
         if positions_filled['DST'] == 0:
-            dst = self._pick_player('DST', 4000, used_names)
+            dst = self._pick_player('DST', 4000, used_names, lineup, budget)
             if not dst:
                 return None
             lineup.append(dst)
@@ -351,58 +362,54 @@ class WinningOptimizer:
             'lineup_type': lineup_type
         }
     
-    def _pick_leverage_qb(self, max_budget: int, used_names: List[str]) -> Dict:
+    def _pick_leverage_qb(self, used_names: List[str], lineup: List[Dict], budget: int) -> Dict:
         """Pick ultra-leverage QB (Trevor Lawrence 3.7% type)"""
         
         qb_min, qb_max = self.contest_rules['qb_salary_range']
         own_min, own_max = self.contest_rules['qb_ownership_target']
         
-        qb_pool = self.player_pool[
-            (self.player_pool['Position'] == 'QB') &
-            (self.player_pool['Salary'] >= qb_min) &
-            (self.player_pool['Salary'] <= qb_max) &
-            (self.player_pool['Ownership'] >= own_min) &
-            (self.player_pool['Ownership'] <= own_max) &
-            (self.player_pool['Projection'] >= 18) &
-            (~self.player_pool['Name'].isin(used_names))
-        ].copy()
-        
-        if qb_pool.empty:
+        ids = self.table.candidates('QB', qb_max, qb_min, exclude=used_names)
+        ownership = self.table.ownership[ids]
+        ids = ids[(ownership >= own_min) & (ownership <= own_max) & (self.table.projection[ids] >= 18)]
+        ids = self.table.feasible(ids, lineup, budget)
+        
+        if len(ids) == 0:
             # Fallback to any QB
-            return self._pick_player('QB', max_budget, used_names)
+            return self._pick_player('QB', SALARY_CAP, used_names, lineup, budget)
         
         # Score by projection primarily (85%) + low ownership bonus (15%)
-        qb_pool['proj_score'] = qb_pool['Projection'] / qb_pool['Projection'].max()
-        qb_pool['own_score'] = (100 - qb_pool['Ownership']) / 100
-        qb_pool['qb_score'] = (qb_pool['proj_score'] * 0.85) + (qb_pool['own_score'] * 0.15)
-        qb_pool['qb_score'] *= np.random.uniform(0.90, 1.10, len(qb_pool))
+        projection = self.table.projection[ids].astype(float)
+        proj_score = projection / projection.max()
+        own_score = (100 - self.table.ownership[ids].astype(float)) / 100
+        qb_score = (proj_score * 0.85) + (own_score * 0.15)
+        qb_score *= np.random.uniform(0.90, 1.10, len(ids))
         
-        weights = qb_pool['qb_score'] / qb_pool['qb_score'].sum()
-        return qb_pool.sample(1, weights=weights).iloc[0].to_dict()
+        return self.table.player(np.random.choice(ids, p=qb_score / qb_score.sum()))
     
-    def _pick_balanced_qb(self, max_budget: int, used_names: List[str]) -> Dict:
+    def _pick_balanced_qb(self, used_names: List[str], lineup: List[Dict], budget: int) -> Dict:
         """Pick balanced QB"""
-        return self._pick_player('QB', max_budget, used_names)
+        return self._pick_player('QB', SALARY_CAP, used_names, lineup, budget)
     
-    def _build_game_stack(self, qb_team: str, budget: int, used_names: List[str], 
+    def _build_game_stack(self, qb_team: str, lineup: List[Dict], budget: int, used_names: List[str], 
                          positions_filled: Dict) -> List[Dict]:
-        """Build 3-piece game stack (QB already selected, add RB + WR or 2 WRs)"""
+        """
+        Build 3-piece game stack (QB already selected, add RB + WR or 2 WRs)
+        
+        Each piece must keep the partial lineup (with the pieces before it)
+        completable within its remaining budget.
+        """
         
         stack_players = []
         
         # Pool of stackable players from QB's team
-        stack_pool = self.player_pool[
-            (self.player_pool['Team'] == qb_team) &
-            (self.player_pool['Position'].isin(['RB', 'WR', 'TE'])) &
-            (~self.player_pool['Name'].isin(used_names))
-        ].copy()
+        ids = self.table.candidates(['RB', 'WR', 'TE'], exclude=used_names, team=qb_team)
         
-        if stack_pool.empty:
+        if len(ids) == 0:
             return stack_players
         
         # Prioritize low-owned players for stack
-        stack_pool['stack_score'] = stack_pool['Projection'] / (stack_pool['Ownership'] + 1)
-        stack_pool = stack_pool.sort_values('stack_score', ascending=False)
+        stack_score = self.table.projection[ids] / (self.table.ownership[ids] + 1)
+        ids = ids[np.argsort(-stack_score, kind='stable')]
         
         # Try to add 2 players to create 3-piece stack
         needed = []
@@ -412,86 +419,70 @@ class WinningOptimizer:
             needed.append('WR')
         
         for pos in needed[:2]:  # Max 2 additional stack pieces
-            pos_pool = stack_pool[stack_pool['Position'] == pos].head(3)
-            if not pos_pool.empty:
+            pos_ids = ids[self.table.position[ids] == POSITIONS.index(pos)]
+            spent = sum(p['Salary'] for p in stack_players)
+            pos_ids = self.table.feasible(pos_ids, lineup + stack_players, budget - spent)
+            if len(pos_ids) > 0:
                 # Pick one
-                player = pos_pool.iloc[0].to_dict()
-                if player['Salary'] <= budget * 0.30:
-                    stack_players.append(player)
+                stack_players.append(self.table.player(pos_ids[0]))
         
         return stack_players
     
-    def _pick_stacked_player(self, position: str, team: str, max_budget: int, 
-                            used_names: List[str]) -> Dict:
+    def _pick_stacked_player(self, position: str, team: str, used_names: List[str],
+                            lineup: List[Dict], budget: int) -> Dict:
         """Pick player from specific team for stacking"""
         
-        pool = self.player_pool[
-            (self.player_pool['Position'] == position) &
-            (self.player_pool['Team'] == team) &
-            (self.player_pool['Salary'] <= max_budget) &
-            (~self.player_pool['Name'].isin(used_names))
-        ].copy()
+        ids = self.table.candidates(position, exclude=used_names, team=team)
+        ids = self.table.feasible(ids, lineup, budget)
         
-        if pool.empty:
+        if len(ids) == 0:
             return None
         
         # Prefer low ownership
-        pool['pick_score'] = pool['Projection'] / (pool['Ownership'] + 1)
-        pool = pool.sort_values('pick_score', ascending=False)
+        pick_score = self.table.projection[ids] / (self.table.ownership[ids] + 1)
         
-        return pool.iloc[0].to_dict()
+        return self.table.player(ids[np.argmax(pick_score)])
     
-    def _pick_player(self, position: str, max_budget: int, used_names: List[str], 
-                    leverage_preferred: bool = False) -> Dict:
-        """Generic player picker with optional leverage preference"""
+    def _pick_player(self, position: str, max_budget: int, used_names: List[str],
+                    lineup: List[Dict], budget: int, leverage_preferred: bool = False) -> Dict:
+        """
+        Generic player picker with optional leverage preference
         
-        pool = self.player_pool[
-            (self.player_pool['Position'] == position) &
-            (self.player_pool['Salary'] <= max_budget) &
-            (~self.player_pool['Name'].isin(used_names))
-        ].copy()
+        max_budget is the slot's own price cap; candidates must also keep the
+        partial lineup completable between the salary floor and the cap
+        (PlayerTable.feasible with its remaining budget).
+        """
         
-        if pool.empty:
-            return None
+        ids = self.table.candidates(position, max_budget, exclude=used_names)
         
-        # Apply category boosts if present
-        if 'Category' in pool.columns:
-            pool = pool[pool['Category'] != '🚫 Exclude']
-            pool['category_boost'] = 0.0
-            
-            if self.contest_rules['entries'] >= 100000:
-                # Millionaire Maker
-                pool.loc[pool['Category'] == '💎 Leverage', 'category_boost'] = 0.30
-                pool.loc[pool['Category'] == '⭐ Core', 'category_boost'] = 0.10
-                pool.loc[pool['Category'] == '🔥 Chalk', 'category_boost'] = -0.20
-            else:
-                # Small GPP
-                pool.loc[pool['Category'] == '🔥 Chalk', 'category_boost'] = 0.15
-                pool.loc[pool['Category'] == '⭐ Core', 'category_boost'] = 0.20
-                pool.loc[pool['Category'] == '💎 Leverage', 'category_boost'] = 0.25
-        else:
-            pool['category_boost'] = 0.0
+        # Drop excluded players (category boosts are precomputed per player)
+        ids = ids[~self.excluded[ids]]
+        ids = self.table.feasible(ids, lineup, budget)
+        
+        if len(ids) == 0:
+            return None
         
         # Score players
         proj_weight = self.contest_rules['projection_weight']
         own_weight = self.contest_rules['ownership_weight']
         
-        pool['proj_norm'] = pool['Projection'] / pool['Projection'].max()
-        pool['own_leverage'] = (100 - pool['Ownership']) / 100
-        pool['pick_score'] = (pool['proj_norm'] * proj_weight) + (pool['own_leverage'] * own_weight)
-        pool['pick_score'] = pool['pick_score'] * (1 + pool['category_boost'])
-        pool['pick_score'] *= np.random.uniform(0.90, 1.10, len(pool))
+        projection = self.table.projection[ids].astype(float)
+        proj_norm = projection / projection.max()
+        own_leverage = (100 - self.table.ownership[ids].astype(float)) / 100
+        pick_score = (proj_norm * proj_weight) + (own_leverage * own_weight)
+        pick_score = pick_score * (1 + self.category_boost[ids])
+        pick_score *= np.random.uniform(0.90, 1.10, len(ids))
         
         # Pick from top 30%
         top_pct = 0.30
-        cutoff = pool['pick_score'].quantile(1 - top_pct)
-        pool = pool[pool['pick_score'] >= cutoff]
+        cutoff = np.quantile(pick_score, 1 - top_pct)
+        top = pick_score >= cutoff
+        ids, pick_score = ids[top], pick_score[top]
         
-        if pool.empty:
+        if len(ids) == 0:
             return None
         
-        weights = pool['pick_score'] / pool['pick_score'].sum()
-        return pool.sample(1, weights=weights).iloc[0].to_dict()
+        return self.table.player(np.random.choice(ids, p=pick_score / pick_score.sum()))
     
     def _validate_winning_structure(self, lineup_dict: Dict) -> bool:
         """Validate lineup meets winning structure requirements"""
@@ -539,12 +530,14 @@ class WinningOptimizer:
         if not new_lineup or 'players' not in new_lineup:
             return True
         
-        new_names = set(p['Name'] for p in new_lineup['players'])
+        self.portfolio.sync(existing_lineups)
+        player_ids = self.portfolio.lineup_ids(new_lineup)
         
-        for existing in existing_lineups:
-            if 'players' in existing:
-                existing_names = set(p['Name'] for p in existing['players'])
-                if len(new_names.intersection(existing_names)) >= 7:
-                    return True
+        # Exact repeat (hash lookup), then 7+ matching players against every lineup at once
+        if self.portfolio.contains(player_ids):
+            return True
+        
+        if (self.portfolio.overlaps(player_ids) >= 7).any():
+            return True
         
         return False
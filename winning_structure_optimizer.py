@@ -3,8 +3,8 @@ Winning Structure Optimizer - Based on Actual Top 20 Analysis
 Replicates the exact patterns from winning lineups
 """
 
-import pandas as pd
 import numpy as np
+from player_table import PlayerTable
 
 SALARY_CAP = 50000
 
@@ -40,36 +40,32 @@ class WinningStructureOptimizer:
         return lineups if lineups else None
     
     def _categorize_players(self):
-        """Categorize players by ownership tiers"""
-        df = self.player_pool
+        """Categorize players by ownership tiers (each tier is an array of PlayerTable ids)"""
+        table = self.table = PlayerTable(self.player_pool)
+        own = table.ownership
+        # Ids in pool row order
+        qbs, rbs, wrs, tes, dsts = (np.sort(table.candidates(pos)) for pos in ['QB', 'RB', 'WR', 'TE', 'DST'])
         
         # QB tiers
-        self.leverage_qbs = df[(df['Position'] == 'QB') & (df['Ownership'] >= 3) & (df['Ownership'] <= 8)].copy()
-        self.core_qbs = df[(df['Position'] == 'QB') & (df['Ownership'] > 8) & (df['Ownership'] <= 15)].copy()
+        self.leverage_qbs = qbs[(own[qbs] >= 3) & (own[qbs] <= 8)]
+        self.core_qbs = qbs[(own[qbs] > 8) & (own[qbs] <= 15)]
         
         # RB tiers  
-        self.core_rbs = df[(df['Position'] == 'RB') & (df['Ownership'] >= 18) & (df['Ownership'] <= 35)].copy()
-        self.mid_rbs = df[(df['Position'] == 'RB') & (df['Ownership'] >= 10) & (df['Ownership'] < 18)].copy()
-        self.leverage_rbs = df[(df['Position'] == 'RB') & (df['Ownership'] < 10)].copy()
+        self.core_rbs = rbs[(own[rbs] >= 18) & (own[rbs] <= 35)]
+        self.mid_rbs = rbs[(own[rbs] >= 10) & (own[rbs] < 18)]
+        self.leverage_rbs = rbs[own[rbs] < 10]
         
         # WR tiers
-        self.core_wrs = df[(df['Position'] == 'WR') & (df['Ownership'] >= 10) & (df['Ownership'] <= 20)].copy()
-        self.mid_wrs = df[(df['Position'] == 'WR') & (df['Ownership'] > 20) & (df['Ownership'] <= 30)].copy()
-        self.leverage_wrs = df[(df['Position'] == 'WR') & (df['Ownership'] < 10)].copy()
+        self.core_wrs = wrs[(own[wrs] >= 10) & (own[wrs] <= 20)]
+        self.mid_wrs = wrs[(own[wrs] > 20) & (own[wrs] <= 30)]
+        self.leverage_wrs = wrs[own[wrs] < 10]
         
         # TE - mostly punt plays
-        self.punt_tes = df[(df['Position'] == 'TE') & (df['Salary'] <= 5000)].copy()
-        self.mid_tes = df[(df['Position'] == 'TE') & (df['Salary'] > 5000)].copy()
+        self.punt_tes = tes[table.salary[tes] <= 5000]
+        self.mid_tes = tes[table.salary[tes] > 5000]
         
         # DST
-        self.cheap_dsts = df[(df['Position'] == 'DST') & (df['Salary'] <= 3500)].copy()
-        
-        # Add value scores
-        for pool in [self.leverage_qbs, self.core_qbs, self.core_rbs, self.mid_rbs, 
-                     self.leverage_rbs, self.core_wrs, self.mid_wrs, self.leverage_wrs,
-                     self.punt_tes, self.mid_tes, self.cheap_dsts]:
-            if not pool.empty:
-                pool['value_score'] = pool['Projection'] / (pool['Salary'] / 1000)
+        self.cheap_dsts = dsts[table.salary[dsts] <= 3500]
     
     def _build_winning_structure(self):
         """Build lineup using WINNING STRUCTURE from Top 20 analysis"""
@@ -78,13 +74,13 @@ class WinningStructureOptimizer:
         used = []
         
         # STEP 1: LEVERAGE QB (3-8% owned) - 60% of time
-        if np.random.random() < 0.6 and not self.leverage_qbs.empty:
-            qb_pool = self.leverage_qbs[self.leverage_qbs['Salary'] <= min(7500, budget - 42000)]
+        if np.random.random() < 0.6 and len(self.leverage_qbs):
+            qb_pool = self._available(self.leverage_qbs, min(7500, budget - 42000), used)
         else:
             # Core QB fallback
-            qb_pool = self.core_qbs[self.core_qbs['Salary'] <= min(7500, budget - 42000)]
+            qb_pool = self._available(self.core_qbs, min(7500, budget - 42000), used)
         
-        if qb_pool.empty:
+        if not len(qb_pool):
             return None
             
         qb = self._pick_random_weighted(qb_pool)
@@ -93,12 +89,9 @@ class WinningStructureOptimizer:
         used.append(qb['Name'])
         
         # STEP 2: CORE RB ANCHOR (18-28% owned) - MANDATORY
-        core_rb_pool = self.core_rbs[
-            (self.core_rbs['Salary'] <= min(9000, budget - 33000)) &
-            (~self.core_rbs['Name'].isin(used))
-        ]
+        core_rb_pool = self._available(self.core_rbs, min(9000, budget - 33000), used)
         
-        if core_rb_pool.empty:
+        if not len(core_rb_pool):
             return None
             
         core_rb = self._pick_random_weighted(core_rb_pool)
@@ -112,12 +105,9 @@ class WinningStructureOptimizer:
         else:
             rb2_pool = self.leverage_rbs
             
-        rb2_pool = rb2_pool[
-            (rb2_pool['Salary'] <= min(8000, budget - 25000)) &
-            (~rb2_pool['Name'].isin(used))
-        ]
+        rb2_pool = self._available(rb2_pool, min(8000, budget - 25000), used)
         
-        if rb2_pool.empty:
+        if not len(rb2_pool):
             return None
             
         rb2 = self._pick_random_weighted(rb2_pool)
@@ -126,12 +116,9 @@ class WinningStructureOptimizer:
         used.append(rb2['Name'])
         
         # STEP 4: WR1 - Core (10-20% owned)
-        wr1_pool = self.core_wrs[
-            (self.core_wrs['Salary'] <= min(9000, budget - 18000)) &
-            (~self.core_wrs['Name'].isin(used))
-        ]
+        wr1_pool = self._available(self.core_wrs, min(9000, budget - 18000), used)
         
-        if wr1_pool.empty:
+        if not len(wr1_pool):
             return None
             
         wr1 = self._pick_random_weighted(wr1_pool)
@@ -145,12 +132,9 @@ class WinningStructureOptimizer:
         else:
             wr2_pool = self.mid_wrs
             
-        wr2_pool = wr2_pool[
-            (wr2_pool['Salary'] <= min(8000, budget - 13000)) &
-            (~wr2_pool['Name'].isin(used))
-        ]
+        wr2_pool = self._available(wr2_pool, min(8000, budget - 13000), used)
         
-        if wr2_pool.empty:
+        if not len(wr2_pool):
             return None
             
         wr2 = self._pick_random_weighted(wr2_pool)
@@ -164,12 +148,9 @@ class WinningStructureOptimizer:
         else:
             wr3_pool = self.core_wrs
             
-        wr3_pool = wr3_pool[
-            (wr3_pool['Salary'] <= min(7000, budget - 9000)) &
-            (~wr3_pool['Name'].isin(used))
-        ]
+        wr3_pool = self._available(wr3_pool, min(7000, budget - 9000), used)
         
-        if wr3_pool.empty:
+        if not len(wr3_pool):
             return None
             
         wr3 = self._pick_random_weighted(wr3_pool)
@@ -183,12 +164,9 @@ class WinningStructureOptimizer:
         else:
             te_pool = self.mid_tes
             
-        te_pool = te_pool[
-            (te_pool['Salary'] <= min(6000, budget - 6000)) &
-            (~te_pool['Name'].isin(used))
-        ]
+        te_pool = self._available(te_pool, min(6000, budget - 6000), used)
         
-        if te_pool.empty:
+        if not len(te_pool):
             return None
             
         te = self._pick_random_weighted(te_pool)
@@ -198,25 +176,19 @@ class WinningStructureOptimizer:
         
         # STEP 8: ULTRA-LEVERAGE FLEX (<5% owned preferred)
         # Combine leverage RBs/WRs for FLEX
-        flex_leverage = pd.concat([
+        flex_leverage = np.concatenate([
             self.leverage_rbs,
             self.leverage_wrs
         ])
         
-        flex_pool = flex_leverage[
-            (flex_leverage['Salary'] <= budget - 2500) &
-            (~flex_leverage['Name'].isin(used))
-        ]
+        flex_pool = self._available(flex_leverage, budget - 2500, used)
         
-        if flex_pool.empty:
+        if not len(flex_pool):
             # Fallback to any RB/WR
-            flex_pool = pd.concat([self.mid_rbs, self.core_wrs, self.mid_wrs])
-            flex_pool = flex_pool[
-                (flex_pool['Salary'] <= budget - 2500) &
-                (~flex_pool['Name'].isin(used))
-            ]
+            flex_pool = np.concatenate([self.mid_rbs, self.core_wrs, self.mid_wrs])
+            flex_pool = self._available(flex_pool, budget - 2500, used)
             
-        if flex_pool.empty:
+        if not len(flex_pool):
             return None
             
         flex = self._pick_random_weighted(flex_pool)
@@ -226,14 +198,13 @@ class WinningStructureOptimizer:
         used.append(flex['Name'])
         
         # STEP 9: CHEAP DST
-        dst_pool = self.cheap_dsts[self.cheap_dsts['Salary'] <= budget]
+        dst_pool = self._available(self.cheap_dsts, budget, used)
         
-        if dst_pool.empty:
+        if not len(dst_pool):
             # Any DST
-            dst_pool = self.player_pool[self.player_pool['Position'] == 'DST']
-            dst_pool = dst_pool[dst_pool['Salary'] <= budget]
+            dst_pool = np.sort(self.table.candidates('DST', budget))
             
-        if dst_pool.empty:
+        if not len(dst_pool):
             return None
             
         dst = self._pick_random_weighted(dst_pool)
@@ -254,8 +225,12 @@ class WinningStructureOptimizer:
             'salary_remaining': SALARY_CAP - total_sal
         }
     
+    def _available(self, pool, max_salary, used):
+        """Tier players at or under max_salary and not already in the lineup"""
+        pool = pool[self.table.salary[pool] <= max_salary]
+        return pool[~np.isin(pool, [self.table.index[name] for name in used])]
+    
     def _pick_random_weighted(self, pool):
         """Pick player with randomized weighting by value"""
-        pool = pool.copy()
-        pool['pick_score'] = pool['value_score'] * np.random.uniform(0.85, 1.15, len(pool))
-        return pool.nlargest(1, 'pick_score').iloc[0].to_dict()
+        pick_score = self.table.value[pool] * np.random.uniform(0.85, 1.15, len(pool))
+        return self.table.player(pool[np.argmax(pick_score)])